@@ -1,22 +1,22 @@
 # app.py
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 import streamlit as st
-from collections import defaultdict
 
-from utils.io import read_json, OUT, DATA
-from core.jd_parser import fetch_jd_from_url, clean_jd_text
-from core.retrieval import HybridRetriever, diversify
+# Only light modules at import time: models, openai and python-docx load on first use
+# (see `python -m scripts.import_profile`)
+from utils.io import read_json, OUT, DATA, CACHE
+from core.jd_parser import clean_jd_text
+from core.retrieval import HybridRetriever
 from core.reranker import Reranker
-from core.llm import compose_package
-from core.export_docx import (
-    render_resume_docx,
-    render_cover_letter_docx,
-    write_txt_mirrors,
-)
+from core.session import SessionCache
+from core.scheduler import BatchedCrossEncoder, BatchedEmbedder, batcher_stats
+from utils import tracing
 
 load_dotenv()
+tracing.configure_from_env()
 
 st.set_page_config(page_title="AI Job Application Agent", page_icon="🧰", layout="wide")
 st.title("AI Job Application Agent – MVP")
@@ -26,6 +26,23 @@ st.sidebar.header("Configuration")
 openai_model = os.getenv("OPENAI_LLM_MODEL", "gpt-4o-mini")
 embed_model = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 ce_model = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+embed_cache_dir = os.getenv("EMBEDDING_CACHE_DIR", str(CACHE / "embeddings"))
+vector_index = os.getenv("VECTOR_INDEX", "bruteforce")
+# Compiled index artifact (python -m scripts.build_index); rebuilt automatically when stale, empty = off
+index_path = os.getenv("INDEX_PATH", str(CACHE / "index" / "retrieval.idx"))
+# Send only the top-N hybrid hits to the cross-encoder when the hybrid ranking is decisive (0 = off; N is at
+# least rerank_k + 8, so it needs a candidate pool larger than the default 24)
+rerank_cascade_n = int(os.getenv("RERANK_CASCADE_N", "0"))
+# MMR relevance/novelty trade-off when picking rerank candidates (1 = relevance only; empty = prefix dedupe)
+mmr_lambda = os.getenv("MMR_LAMBDA", "0.7")
+# Build the index and load both models in a background thread at boot (0 = on first JD)
+model_warmup = os.getenv("MODEL_WARMUP", "1").lower() not in ("0", "false", "no")
+# Coalesce concurrent sessions' encode/predict calls into micro-batches on one worker thread per model
+# (max extra wait in ms while sessions overlap; 0 = every session calls the models directly)
+batch_wait_ms = float(os.getenv("INFERENCE_BATCH_WAIT_MS", "5"))
+# Per-stage timing breakdown of this run at the bottom of the page
+trace_panel = st.sidebar.checkbox("Show pipeline timings", value=os.getenv("TRACE_PANEL", "0") == "1")
+trace_records = tracing.start_collecting() if trace_panel else None
 
 # Load data
 master = read_json(DATA / "master_resume.json")
@@ -34,42 +51,49 @@ tone = read_json(DATA / "tone_examples.json")
 # ------------------------
 # Helpers
 # ------------------------
-def _extract_bullet_ids(llm_out: dict) -> list[str]:
-    """Safely pull bullet_ids from llm_out regardless of dict/list shapes."""
-    ids: list[str] = []
-    resume = llm_out.get("resume", {}) or {}
-    sections = resume.get("sections", []) or []
-    if isinstance(sections, dict):
-        sections = [sections]
-    for sec in sections:
-        items = (sec or {}).get("items", []) or []
-        if isinstance(items, dict):
-            items = [items]
-        for it in items:
-            ids.extend((it or {}).get("bullet_ids", []) or [])
-    # unique order-preserving strings
-    seen, clean = set(), []
-    for i in ids:
-        if isinstance(i, str) and i not in seen:
-            seen.add(i)
-            clean.append(i)
-    return clean
+def load_services():
+    embedder = cross_encoder = None
+    if batch_wait_ms > 0:
+        # Models load on first use, so a current index artifact or warm embedding cache opens without them
+        from core.models import load_cross_encoder, load_embedder
+        embedder = BatchedEmbedder(loader=lambda: load_embedder(embed_model), max_wait_ms=batch_wait_ms)
+        cross_encoder = BatchedCrossEncoder(loader=lambda: load_cross_encoder(ce_model), max_wait_ms=batch_wait_ms)
+    retriever = HybridRetriever(embedding_model=embed_model, vector_index=vector_index, embedder=embedder,
+                                cache_dir=Path(embed_cache_dir) if embed_cache_dir else None)
+    if index_path:
+        retriever.open_or_build_index(Path(index_path), master)
+    else:
+        retriever.index_from_master(master)
+    reranker = Reranker(model_name=ce_model, model=cross_encoder, cascade_n=rerank_cascade_n or None)
+    sessions = SessionCache(retriever, reranker, max_sessions=int(os.getenv("RETRIEVAL_SESSIONS", "32")),
+                            mmr_lambda=float(mmr_lambda) if mmr_lambda else None)
+    # Both models are needed for the first JD; load and warm them here, after the index is up
+    retriever.warmup()
+    reranker.warmup()
+    return retriever, reranker, sessions
 
 
 @st.cache_resource(show_spinner=False)
-def get_retriever():
-    r = HybridRetriever(embedding_model=embed_model)
-    r.index_from_master(master)
-    return r
+def get_services() -> Future:
+    """Retriever, reranker and per-JD session cache, loading off the script thread."""
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warmup")
+    fut = pool.submit(load_services)
+    pool.shutdown(wait=False)
+    return fut
 
 
-@st.cache_resource(show_spinner=False)
-def get_reranker():
-    return Reranker(model_name=ce_model)
+def services():
+    fut = get_services()
+    try:
+        with st.spinner("Loading models…"):
+            return fut.result()
+    except Exception:
+        get_services.clear()  # retry on the next rerun instead of caching the failure
+        raise
 
 
-retriever = get_retriever()
-reranker = get_reranker()
+if model_warmup:
+    get_services()
 
 # ------------------------
 # 1) Provide Job Description
@@ -84,24 +108,43 @@ if jd_text:
     with st.expander("Preview JD text"):
         st.write(jd_text)
 
+# Retrieval services are only awaited once a JD needs them, so the first render never blocks
+retriever = reranker = sessions = None
+if jd_text or (model_warmup and get_services().done()):
+    retriever, reranker, sessions = services()
+    # Pick up edits to master_resume.json by patching only the changed bullets
+    retriever.sync_master(master)
+    _cs = retriever.cache_stats
+    st.sidebar.caption(f"Embedding cache: {_cs['hits']} hit(s), {_cs['misses']} miss(es), {_cs['entries']} stored")
+elif model_warmup:
+    st.sidebar.caption("Loading models in the background…")
+
 # ------------------------
 # 2) Match & Select Bullets
 # ------------------------
 st.markdown("### 2) Match & Select Bullets")
 chosen = []
+session = None
 if jd_text:
     with st.spinner("Retrieving relevant bullets…"):
-        hits = retriever.search(jd_text, top_k=40)
-        diversified = diversify(hits, k=24)
-        reranked = reranker.rerank(jd_text, diversified, top_k=16)
+        session = sessions.get(jd_text)
 
     st.caption("Top matches (you can uncheck to exclude):")
-    for b in reranked:
+    for b in session.ranked:
         checked = st.checkbox(b.text, value=True, key=b.id)
         if checked:
             chosen.append(b)
 
     st.info(f"Selected {len(chosen)} bullet(s). You can adjust before generating.")
+    _rs = reranker.stats
+    st.sidebar.caption(
+        f"Cross-encoder: {_rs['model_pairs']} pair(s) scored, {reranker.avoided_model_pairs()} avoided "
+        f"({_rs['cache_hits']} cached, {_rs['cascade_skipped']} cascaded)"
+    )
+    st.sidebar.caption(f"Retrieval sessions: {sessions.hits} reused, {sessions.misses} computed, {len(sessions)} held")
+    for _name, _bs in batcher_stats(retriever.embed, reranker.model).items():
+        st.sidebar.caption(f"Micro-batched {_name}: {_bs['requests']} request(s) in {_bs['batches']} batch(es), "
+                           f"mean {_bs['mean_batch']} input(s)")
 
 # ------------------------
 # 3) Generate Package
@@ -109,189 +152,63 @@ if jd_text:
 st.markdown("### 3) Generate Package")
 company = st.text_input("Company (for filenames)")
 role = st.text_input("Role title (for filenames)")
+regenerate = st.checkbox("Regenerate (ignore cached response)", value=False)
 
 if st.button("Generate Resume + Cover Letter", type="primary", disabled=not (jd_text and chosen)):
+    # Stream the draft: headline and each cover-letter paragraph render as soon as they arrive
+    st.markdown("#### Draft")
+    headline_slot = st.empty()
+    data = None
     with st.spinner("Composing…"):
-        # Include source metadata so the LLM can attribute experiences in the cover letter
-        allowed = [
-            {
-                "id": b.id,
-                "text": b.text,
-                "meta": {"employer": b.meta.get("employer"), "role": b.meta.get("role")},
-            }
-            for b in chosen
-        ]        # Keep signature compatible with your current core/llm.py
-        data = compose_package(jd_text, allowed, tone, model=openai_model)
+        from core.llm import compose_package_stream
+        from core.package import allowed_bullets, build_resume_struct, build_cover_letter_struct
+
+        allowed = allowed_bullets(chosen)
+        # No bullet catalogue here: bullets the user unchecked must not reach the model
+        for kind, value in compose_package_stream(jd_text, allowed, tone, model=openai_model, regenerate=regenerate):
+            if kind == "headline":
+                headline_slot.markdown(f"**{value}**")
+            elif kind == "paragraph":
+                st.write(value)
+            elif kind == "package":
+                data = value
 
         # Debug: inspect raw JSON (optional)
         with st.expander("Debug: raw LLM JSON"):
             st.json(data)
 
-        # Preserve model’s bullet order if it provided IDs; otherwise keep UI order
-        id2bullet = {b.id: b for b in chosen}
-        bullet_ids = _extract_bullet_ids(data)
-        if bullet_ids:
-            ordered_bullets = [id2bullet[i] for i in bullet_ids if i in id2bullet]
-        else:
-            ordered_bullets = chosen
-
-        def _dates_to_str(d: dict) -> str:
-            if not isinstance(d, dict):
-                return ""
-            s = d.get("start", ""); e = d.get("end", "")
-            return f"{s}–{e}" if (s or e) else ""
-
-        # Group selected bullets by (section_id, item_id)
-        groups = defaultdict(list)
-        for b in ordered_bullets:
-            sec_id = b.meta.get("section_id") or "exp"
-            item_id = b.meta.get("item_id") or b.id
-            groups[(sec_id, item_id)].append(b)
-
-        # --- Enforce primary bullets + minimum 3 bullets per included item ---
-        MIN_BULLETS_PER_ITEM = 3
-        sections_map = defaultdict(list)  # title -> list of item dicts
-
-        for (sec_id, item_id), blist in groups.items():
-            ref = blist[0]
-            title = ref.meta.get("section_title") or "Experience"
-            employer_or_name = ref.meta.get("employer") or "Experience"
-            role_line = ref.meta.get("role") or ("Project" if title.lower().startswith("project") else "")
-            location = ref.meta.get("location") or ""
-            dates = _dates_to_str(ref.meta.get("dates", {}))
-            if title.lower().startswith("project"):
-                # Project name comes from employer_or_name (set to item.name in retrieval)
-                project_name_as_title = employer_or_name
-                # Aggregate unique skills across bullets for this project
-                skill_set = []
-                seen = set()
-                for b in blist:
-                    for s in (b.meta.get("skills") or []):
-                        if s and s not in seen:
-                            seen.add(s)
-                            skill_set.append(s)
-                top_skills = skill_set[:3]
-                skills_as_employer = " · ".join(top_skills)
-                role_line = project_name_as_title
-                employer_or_name = skills_as_employer
-
-            # Rank ALL bullets that belong to this item by relevance to JD
-            all_ranked = retriever.rank_item_bullets(item_id, jd_text)
-
-            primaries = [b for b in all_ranked if b.meta.get("primary")]
-            secondaries = [b for b in all_ranked if not b.meta.get("primary")]
-
-            # Start with ALL primaries (must include, even if user didn’t check them)
-            ordered_ids: list[str] = []
-            for b in primaries:
-                if b.id not in ordered_ids:
-                    ordered_ids.append(b.id)
-
-            # Add user-selected non-primary bullets in current (UI/LLM) order
-            for b in blist:
-                if not b.meta.get("primary") and b.id not in ordered_ids:
-                    ordered_ids.append(b.id)
-
-            # Backfill with remaining secondaries by relevance until minimum is met
-            for b in secondaries:
-                if len(ordered_ids) >= MIN_BULLETS_PER_ITEM:
-                    break
-                if b.id not in ordered_ids:
-                    ordered_ids.append(b.id)
-
-            # Materialize texts in enforced order
-            id_to_bullet = {b.id: b for b in (all_ranked + blist)}
-            enforced_texts = [id_to_bullet[i].text for i in ordered_ids if i in id_to_bullet]
+        resume_struct = build_resume_struct(master, session, chosen, data, jd_text)
+        cl_struct = build_cover_letter_struct(master, data)
 
-            sections_map[title].append({
-                "employer": employer_or_name,
-                "role": role_line,
-                "location": location,
-                "dates": dates,
-                "bullets": enforced_texts,
-            })
+    # Export files (rendered in memory; the same bytes are written to ./out and served for download)
+    from core.export_docx import render_package
 
-        # Order sections: Experience first, Projects second, then others
-        def _order_key(t: str):
-            tl = t.lower()
-            if tl == "experience":
-                return (0, t)
-            if tl.startswith("project"):
-                return (1, t)
-            return (2, t)
-
-        ordered_titles = sorted(sections_map.keys(), key=_order_key)
-        _resume_sections = [{"title": t, "items": sections_map[t]} for t in ordered_titles]
-
-        # --- Always include Education from master JSON ---
-        education_items = []
-        for section in master.get("sections", []):
-            if section.get("id") == "education":
-                for edu in section.get("items", []):
-                    dates = ""
-                    if isinstance(edu.get("dates"), dict):
-                        s = edu["dates"].get("start", ""); e = edu["dates"].get("end", "")
-                        dates = f"{s}–{e}" if (s or e) else ""
-                    education_items.append({
-                        "employer": edu.get("institution", "Education"),
-                        "role": edu.get("credential", ""),
-                        "location": edu.get("location", ""),
-                        "dates": dates,
-                        "bullets": [],
-                    })
-                break
-
-        if education_items:
-            resume_sections = [{"title": "Education", "items": education_items}] + _resume_sections
-            #resume_sections.append({"title": "Education", "items": education_items})
-        headline = data.get("resume.headline") or data.get("resume").get("headline")
-
-
-        resume_struct = {
-            "headline": headline,
-            "sections": resume_sections,
-        }
-
-        cl_struct = data.get(
-            "cover_letter",
-            {
-                "greeting": "Hiring Team",
-                "body_paragraphs": ["Thanks for considering my application."],
-                "closing": "Sincerely,",
-                "signature": master.get("profile", {}).get("full_name", ""),
-            },
-        )
-
-    # Export files
     slug_company = (company or "Company").replace(" ", "_")
     slug_role = (role or "Role").replace(" ", "_")
     resume_path = OUT / f"Savoy_Nate_Resume_{slug_company}_{slug_role}.docx"
     cl_path = OUT / f"Savoy_Nate_CoverLetter_{slug_company}_{slug_role}.docx"
 
-    render_resume_docx(master.get("profile", {}), resume_struct, resume_path)
-    render_cover_letter_docx(master.get("profile", {}), cl_struct, cl_path)
-
-    # Plain-text mirrors for portals
-    all_bullets_txt = []
-    for sec in resume_struct.get("sections", []):
-        for it in sec.get("items", []):
-            for bt in it.get("bullets", []):
-                all_bullets_txt.append(f"- {bt}")
-    resume_txt = (
-        f"{master.get('profile', {}).get('full_name','')}\n"
-        + (resume_struct.get("headline", ""))
-        + ("\n\n" if all_bullets_txt else "")
-        + "\n".join(all_bullets_txt)
-    )
-    cl_txt = "\n\n".join(cl_struct.get("body_paragraphs", []))
-#    write_txt_mirrors(resume_txt, cl_txt, resume_path, cl_path)
+    # Plain-text mirrors for portals come back with the documents (not written to disk)
+    rendered = render_package(master.get("profile", {}), resume_struct, cl_struct, resume_path, cl_path)
+    resume_txt, cl_txt = rendered["resume_txt"], rendered["cover_letter_txt"]
 
     st.success("Files generated in ./out. Use the buttons below to download.")
-    with open(resume_path, "rb") as f:
-        st.download_button("Download Resume (.docx)", f, file_name=resume_path.name)
-    with open(cl_path, "rb") as f:
-        st.download_button("Download Cover Letter (.docx)", f, file_name=cl_path.name)
+    st.download_button("Download Resume (.docx)", rendered["resume"], file_name=resume_path.name)
+    st.download_button("Download Cover Letter (.docx)", rendered["cover_letter"], file_name=cl_path.name)
 
     with st.expander("Plain-text mirrors (for paste into portals)"):
         st.code(resume_txt)
         st.code(cl_txt)
+
+# ------------------------
+# Debug: where this run's time went
+# ------------------------
+if trace_records is not None:
+    with st.expander("Debug: pipeline timings", expanded=True):
+        rows = tracing.summarize(trace_records)
+        if rows:
+            top_ms = sum(r["ms"] for r in trace_records if r["parent"] is None)
+            st.caption(f"{top_ms:.0f} ms in top-level stages this run (nested stages are included in their parents)")
+            st.dataframe(rows, use_container_width=True)
+        else:
+            st.caption("No pipeline stages ran on this rerun (results came from the session cache).")
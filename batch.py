@@ -0,0 +1,243 @@
+# batch.py
+"""Headless batch mode: tailor the master resume against many job descriptions.
+
+Reads a JSONL file with one JD per line and streams one JSON result line per JD
+(stdout, or --results) as soon as it is done, writing .docx files to --out-dir.
+
+    python batch.py jds.jsonl --out-dir out/batch --batch-size 16
+
+Each line needs the JD text under one of "job_description", "jd", "text", "body"
+(or a "url" to fetch); "id"/"request_id", "company" and "role"/"title" are optional.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from dotenv import load_dotenv
+
+from utils.io import read_json, OUT, DATA, CACHE
+from utils import tracing
+from core.jd_parser import clean_jd_text
+from core.fetcher import JDFetcher
+from core.retrieval import HybridRetriever, diversify
+from core.reranker import Reranker
+from core.llm import AsyncComposer
+from core.llm_cache import get_response_cache
+from core.package import allowed_bullets, bullet_catalogue, build_resume_struct, build_cover_letter_struct
+from core.export_docx import make_render_pool, render_package
+
+TEXT_KEYS = ("job_description", "jd", "text", "body")
+
+
+def read_jobs(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                # Reported as that line's result (like an empty JD) instead of ending the run
+                yield {"id": str(n), "company": "", "role": "", "jd_text": "", "url": "", "error": "invalid JSON"}
+                continue
+            text = next((row[k] for k in TEXT_KEYS if row.get(k)), "")
+            job_id = row.get("id", row.get("request_id"))
+            yield {
+                "id": str(job_id if job_id is not None else n),
+                "company": row.get("company") or "",
+                "role": row.get("role") or row.get("title") or "",
+                "jd_text": clean_jd_text(text),
+                # Fetched per chunk, concurrently (see _run)
+                "url": "" if text else row.get("url") or "",
+            }
+
+
+def _chunks(it: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    for x in it:
+        chunk.append(x)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _slug(s: str, default: str) -> str:
+    return (s or default).replace(" ", "_").replace("/", "_")
+
+
+async def process_job(job: Dict[str, Any], chosen, master, tone, retriever, composer, render_pool, args,
+                      catalogue=None) -> Dict[str, Any]:
+    profile = master.get("profile", {})
+    llm_out: Dict[str, Any] = {}
+    if composer is not None:
+        llm_out = await composer.compose(job["jd_text"], allowed_bullets(chosen), tone, catalogue=catalogue)
+    # CPU work (per-item ranking encodes the JD) runs off the event loop so LLM responses keep flowing
+    resume_struct = await asyncio.to_thread(build_resume_struct, master, retriever, chosen, llm_out, job["jd_text"])
+
+    stem = f"{_slug(job['company'], 'Company')}_{_slug(job['role'], 'Role')}_{_slug(job['id'], 'jd')}"
+    resume_path = args.out_dir / f"Resume_{stem}.docx"
+    outputs = {"resume": str(resume_path)}
+    cl_struct = cl_path = None
+    if composer is not None:
+        cl_struct = build_cover_letter_struct(master, llm_out)
+        cl_path = args.out_dir / f"CoverLetter_{stem}.docx"
+        outputs["cover_letter"] = str(cl_path)
+    # Off the event loop; with a render pool both documents render in worker processes
+    await asyncio.to_thread(render_package, profile, resume_struct, cl_struct, resume_path, cl_path,
+                            write_txt=args.txt, pool=render_pool)
+    return {"bullets": [b.id for b in chosen], "outputs": outputs}
+
+
+def _retrieve(texts: List[str], retriever, reranker, args) -> List[List[Any]]:
+    """Hybrid search, MMR and cross-encoder rerank for one chunk of JDs."""
+    hits = retriever.search_many(texts, top_k=args.top_k)
+    if args.mmr_lambda:
+        candidates = [retriever.diversify(h, k=args.diversify_k, lambda_=float(args.mmr_lambda)) for h in hits]
+    else:
+        candidates = [diversify(h, k=args.diversify_k) for h in hits]
+    hybrid = [{b.id: s for b, s in h} for h in hits]
+    return reranker.rerank_many(texts, candidates, top_k=args.rerank_k,
+                                scores=[[hy[b.id] for b in c] for hy, c in zip(hybrid, candidates)])
+
+
+def main(argv: List[str] | None = None) -> int:
+    load_dotenv()
+    tracing.configure_from_env()
+    ap = argparse.ArgumentParser(description="Tailor the master resume against a JSONL file of job descriptions.")
+    ap.add_argument("jobs", type=Path, help="JSONL file, one job description per line")
+    ap.add_argument("--out-dir", type=Path, default=OUT / "batch")
+    ap.add_argument("--results", type=Path, default=None, help="write result lines here instead of stdout")
+    ap.add_argument("--master", type=Path, default=DATA / "master_resume.json")
+    ap.add_argument("--tone", type=Path, default=DATA / "tone_examples.json")
+    ap.add_argument("--batch-size", type=int, default=16, help="JDs per batched encode/predict call")
+    ap.add_argument("--top-k", type=int, default=40)
+    ap.add_argument("--diversify-k", type=int, default=24)
+    ap.add_argument("--rerank-k", type=int, default=16)
+    ap.add_argument("--mmr-lambda", default=os.getenv("MMR_LAMBDA", "0.7"),
+                    help="MMR relevance/novelty trade-off for diversify; empty = text-prefix dedupe")
+    ap.add_argument("--fetch-concurrency", type=int, default=8, help="JD URLs fetched at once")
+    ap.add_argument("--per-host", type=int, default=2, help="max concurrent fetches per job-board host")
+    ap.add_argument("--model", default=os.getenv("OPENAI_LLM_MODEL", "gpt-4o-mini"))
+    ap.add_argument("--concurrency", type=int, default=8, help="max LLM compositions in flight")
+    ap.add_argument("--timeout", type=float, default=60.0, help="per-request LLM timeout (seconds)")
+    ap.add_argument("--no-cache", action="store_true", help="always call the LLM; don't read or write the response cache")
+    ap.add_argument("--no-llm", action="store_true", help="skip composition; render resumes from reranked bullets only")
+    ap.add_argument("--txt", action="store_true", help="also write plain-text mirrors")
+    ap.add_argument("--render-workers", type=int, default=min(4, (os.cpu_count() or 1) - 1),
+                    help="processes rendering .docx files (0 = render in this process; default leaves one core free)")
+    args = ap.parse_args(argv)
+
+    embed_model = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    ce_model = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    embed_cache_dir = os.getenv("EMBEDDING_CACHE_DIR", str(CACHE / "embeddings"))
+
+    master = read_json(args.master)
+    tone = read_json(args.tone)
+    retriever = HybridRetriever(embedding_model=embed_model, cache_dir=Path(embed_cache_dir) if embed_cache_dir else None,
+                                vector_index=os.getenv("VECTOR_INDEX", "bruteforce"))
+    retriever.index_from_master(master)
+    reranker = Reranker(model_name=ce_model, cascade_n=int(os.getenv("RERANK_CASCADE_N", "0")) or None)
+
+    sink = open(args.results, "a", encoding="utf-8") if args.results else sys.stdout
+    try:
+        counts = asyncio.run(_run(args, master, tone, retriever, reranker, sink))
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+    return 1 if counts["failed"] and not counts["done"] else 0
+
+
+async def _run(args, master, tone, retriever, reranker, sink) -> Dict[str, int]:
+    counts = {"done": 0, "failed": 0}
+    started = time.perf_counter()
+
+    def emit(result: Dict[str, Any]):
+        counts["failed" if "error" in result else "done"] += 1
+        print(json.dumps(result), file=sink, flush=True)
+
+    async def one(job, chosen, composer):
+        t0 = time.perf_counter()
+        try:
+            result = {"id": job["id"], **await process_job(job, chosen, master, tone, retriever, composer, render_pool, args,
+                                                           catalogue)}
+        except Exception as e:
+            result = {"id": job["id"], "error": f"{type(e).__name__}: {e}"}
+        result["seconds"] = round(time.perf_counter() - t0, 3)
+        emit(result)
+
+    composer = None if args.no_llm else AsyncComposer(
+        model=args.model, concurrency=args.concurrency, timeout=args.timeout,
+        cache=None if args.no_cache else get_response_cache(),
+    )
+    # Only used with PROMPT_CATALOGUE=1, and only when caching makes it cheaper (see core.prompt)
+    catalogue = bullet_catalogue(master)
+    page_cache = os.getenv("JD_PAGE_CACHE_DIR", str(CACHE / "pages"))
+    render_pool = make_render_pool(args.render_workers) if args.render_workers > 0 else None
+    fetcher = JDFetcher(cache_dir=Path(page_cache) if page_cache else None,
+                        concurrency=args.fetch_concurrency, per_host=args.per_host)
+    pending: set = set()
+    try:
+        for chunk in _chunks(read_jobs(args.jobs), args.batch_size):
+            to_fetch = [j for j in chunk if j["url"]]
+            if to_fetch:
+                pages = await asyncio.to_thread(fetcher.fetch_many, [j["url"] for j in to_fetch])
+                for j, text in zip(to_fetch, pages):
+                    j["jd_text"] = clean_jd_text(text or "")
+            for j in chunk:
+                if not j["jd_text"]:
+                    emit({"id": j["id"], "error": j.get("error") or (f"could not fetch {j['url']}" if j["url"]
+                                                                       else "empty job description")})
+            jobs = [j for j in chunk if j["jd_text"]]
+
+            # Off the event loop, so in-flight compositions are handled while this chunk is retrieved
+            reranked = await asyncio.to_thread(_retrieve, [j["jd_text"] for j in jobs], retriever, reranker, args)
+
+            # Compositions stay in flight while the next chunk is retrieved; cap the backlog.
+            pending.update(asyncio.create_task(one(j, c, composer)) for j, c in zip(jobs, reranked))
+            while len(pending) > 2 * max(args.concurrency, args.batch_size):
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            await asyncio.sleep(0)
+
+            n, elapsed = counts["done"] + counts["failed"], time.perf_counter() - started
+            print(f"[batch] {n} JDs done, {len(pending)} in flight, {elapsed:.1f}s ({n / elapsed:.2f} JDs/sec)",
+                  file=sys.stderr, flush=True)
+        if pending:
+            await asyncio.wait(pending)
+    finally:
+        fetcher.close()
+        if render_pool is not None:
+            render_pool.shutdown()
+        if composer is not None:
+            await composer.aclose()
+
+    n, elapsed = counts["done"] + counts["failed"], time.perf_counter() - started
+    rate = n / elapsed if elapsed else 0.0
+    print(f"[batch] done: {counts['done']} ok, {counts['failed']} failed, {elapsed:.1f}s, {rate:.2f} JDs/sec",
+          file=sys.stderr)
+    print(f"[batch] reranker: {reranker.stats}", file=sys.stderr)
+    if fetcher.stats["requests"] or fetcher.stats["fresh"]:
+        print(f"[batch] fetch: {fetcher.stats}", file=sys.stderr)
+    if composer is not None:
+        print(f"[batch] llm: {composer.stats}", file=sys.stderr)
+    for trace_sink in tracing.sinks():
+        if isinstance(trace_sink, tracing.HistogramSink):
+            for name, row in trace_sink.summary().items():
+                print(f"[batch] span {name}: " + ", ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}"
+                                                            for k, v in row.items()), file=sys.stderr)
+            break
+    return counts
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+# core/embed_cache.py
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from utils.text import normalize_text
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends from several processes are not serialized
+    fcntl = None
+
+DEFAULT_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", 200_000))
+# Appends beyond this many shard files are merged into one
+MAX_SHARDS = 16
+
+
+def _model_slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+
+
+def text_key(model_name: str, text: str) -> str:
+    """Content address for one embedding: sha1(model name + normalized text)."""
+    h = hashlib.sha1()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(normalize_text(text).encode("utf-8"))
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk embedding store: `<cache_dir>/<model>/index.json` + immutable `vectors-*.npy` shards.
+
+    `index.json` lists each shard file with the keys of its rows. Shards are
+    opened memory-mapped, so bullets that were encoded on a previous run are
+    served straight from disk and only new/edited text reaches the model.
+    `hits`/`misses` count texts served from disk vs. encoded.
+
+    An append writes the new rows to a new shard, then swaps in a new index
+    naming it, so readers in any process see either the old or the new index,
+    each pointing at complete shards. Writers from several processes (app
+    workers, batch.py, build_index) take a file lock and re-read the index
+    first, so none drops another's shard. Past `MAX_SHARDS` shards or
+    `max_rows` rows, the rows requested by the current call and then the
+    newest ones are compacted into one shard.
+    One instance may be shared by several retrievers on different threads (the
+    multi-tenant service does); lookups and appends go through an internal lock
+    and the model runs outside it.
+    """
+
+    def __init__(self, cache_dir: Path, model_name: str, max_rows: int = DEFAULT_MAX_ROWS):
+        self.model_name = model_name
+        self.dir = Path(cache_dir) / _model_slug(model_name)
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self._shards: List[Tuple[str, List[str], np.ndarray]] = []
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        with self._lock:
+            self._load()
+
+    @property
+    def _idx_path(self) -> Path:
+        return self.dir / "index.json"
+
+    def _read_shards(self) -> List[Tuple[str, List[str], np.ndarray]]:
+        index = json.loads(self._idx_path.read_text(encoding="utf-8"))
+        if index.get("model") != self.model_name:
+            return []
+        # Caches written before shards: one vectors.npy for all keys
+        entries = index["shards"] if "shards" in index else [{"file": "vectors.npy", "keys": index.get("keys", [])}]
+        shards, dim = [], None
+        for entry in entries:
+            keys = list(entry["keys"])
+            vectors = np.load(self.dir / entry["file"], mmap_mode="r")
+            if vectors.ndim != 2 or vectors.shape[0] != len(keys) or dim not in (None, vectors.shape[1]):
+                continue
+            dim = vectors.shape[1]
+            shards.append((entry["file"], keys, vectors))
+        return shards
+
+    def _load(self):
+        # Caller holds self._lock. A compaction in another process may delete a shard between
+        # reading the index and opening it; the index is re-read once.
+        for _ in range(2):
+            try:
+                shards = self._read_shards() if self._idx_path.exists() else []
+                break
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError, KeyError, TypeError):
+                shards = []
+                break
+        else:
+            shards = []
+        index: Dict[str, Tuple[int, int]] = {}
+        for s, (_, keys, _) in enumerate(shards):
+            for r, k in enumerate(keys):
+                index.setdefault(k, (s, r))
+        # Readers that already took the old (index, shards) pair keep a consistent view
+        self._shards, self._index = shards, index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._index), "shards": len(self._shards)}
+
+    def get_or_encode(self, texts: List[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Return one row per text, calling `encode` only for texts not yet cached."""
+        keys = [text_key(self.model_name, t) for t in texts]
+        with self._lock:
+            missing: Dict[str, str] = {}
+            for k, t in zip(keys, texts):
+                if k not in self._index and k not in missing:
+                    missing[k] = t
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+
+        fresh: Dict[str, np.ndarray] = {}
+        if missing:
+            vecs = np.asarray(encode(list(missing.values())), dtype=np.float32)
+            fresh = dict(zip(missing, vecs))
+            with self._lock, self._file_lock():
+                # Another caller (or process) may have stored some of these while the model ran
+                self._load()
+                new = [i for i, k in enumerate(missing) if k not in self._index]
+                if new:
+                    self._append([list(missing)[i] for i in new], vecs[new], set(keys))
+
+        with self._lock:
+            index, shards = self._index, self._shards
+        # Rows another process's compaction evicted after our lookup are encoded again, not stored
+        gone = {k: t for k, t in zip(keys, texts) if k not in index and k not in fresh}
+        if gone:
+            with self._lock:
+                self.misses += len(gone)
+            fresh.update(zip(gone, np.asarray(encode(list(gone.values())), dtype=np.float32)))
+        if not keys:
+            dim = shards[0][2].shape[1] if shards else 0
+            return np.zeros((0, dim), dtype=np.float32)
+        locs = np.array([index.get(k, (-1, -1)) for k in keys], dtype=np.int64)
+        sid, rows = locs[:, 0], locs[:, 1]
+        start = int(rows[0])
+        # Unchanged master => rows are one contiguous run of one shard; hand back the mmap view as-is.
+        if sid[0] >= 0 and (sid == sid[0]).all() and np.array_equal(rows, np.arange(start, start + len(rows))):
+            return shards[int(sid[0])][2][start : start + len(rows)]
+        dim = shards[0][2].shape[1] if shards else next(iter(fresh.values())).shape[0]
+        out = np.empty((len(keys), dim), dtype=np.float32)
+        for s in np.unique(sid[sid >= 0]):
+            mask = sid == s
+            out[mask] = shards[int(s)][2][rows[mask]]
+        for i in np.flatnonzero(sid < 0):
+            out[i] = fresh[keys[i]]
+        return out
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.dir / ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _append(self, keys: List[str], vecs: np.ndarray, wanted: set):
+        # Caller holds self._lock and the file lock, and has just reloaded the index
+        if self._shards and self._shards[0][2].shape[1] != vecs.shape[1]:
+            raise ValueError(
+                f"Embedding dim changed for {self.model_name}: {self._shards[0][2].shape[1]} -> {vecs.shape[1]}"
+            )
+        shards = [(f, k, v) for f, k, v in self._shards]
+        shards.append((self._write_shard(vecs), keys, vecs))
+        dropped: List[str] = []
+        if len(shards) > MAX_SHARDS or len(self._index) + len(keys) > self.max_rows:
+            # Under the file lock every shard not in the index is left over from a crashed writer
+            dropped = ([p.name for p in self.dir.glob("vectors*.npy")] if fcntl is not None
+                       else [f for f, _, _ in shards])
+            shards = [self._compact(shards, wanted)]
+        index = {"model": self.model_name, "shards": [{"file": f, "keys": k} for f, k, _ in shards]}
+        tmp_idx = self._idx_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_idx.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(tmp_idx, self._idx_path)
+        # Processes that mapped a dropped shard keep reading it until they reload
+        for f in dropped:
+            if f != shards[0][0]:
+                try:
+                    (self.dir / f).unlink()
+                except OSError:
+                    pass
+        self._load()
+
+    def _write_shard(self, vecs: np.ndarray) -> str:
+        name = f"vectors-{uuid.uuid4().hex}.npy"
+        tmp = self.dir / f".{name}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, vecs)
+        os.replace(tmp, self.dir / name)
+        return name
+
+    def _compact(self, shards: List[Tuple[str, List[str], np.ndarray]], wanted: set
+                 ) -> Tuple[str, List[str], np.ndarray]:
+        """One shard of at most `max_rows` rows: the keys in `wanted`, then the newest others."""
+        seen, rows = set(), []
+        for s, (_, keys, _) in enumerate(shards):
+            for r, k in enumerate(keys):
+                if k not in seen:
+                    seen.add(k)
+                    rows.append((k in wanted, s, r, k))
+        keep = [x for x in rows if x[0]]
+        keep += [x for x in rows if not x[0]][::-1][: max(self.max_rows - len(keep), 0)]
+        keep.sort(key=lambda x: (x[1], x[2]))
+        vecs = np.stack([shards[s][2][r] for _, s, r, _ in keep]).astype(np.float32, copy=False)
+        return self._write_shard(vecs), [k for *_, k in keep], vecs
@@ -1,11 +1,18 @@
 from __future__ import annotations
-from typing import Dict, Any, List
+import io
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from docx import Document
+from docx.text.paragraph import Paragraph
 from docx.shared import Pt, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.style import WD_STYLE_TYPE
 from pathlib import Path
 from utils.io import write_text
+from utils.tracing import span, traced
 
 
 def _set_base_styles(doc: Document):
@@ -52,11 +59,63 @@ def _set_base_styles(doc: Document):
     default.paragraph_format.space_before = Pt(0)
 
 
+STYLE_NAMES = ("Name", "Section Title", "Job Title", "Description", "Default")
 
 
-def render_resume_docx(profile: Dict[str, Any], resume_json: Dict[str, Any], out_path: Path) -> Path:
+@lru_cache(maxsize=1)
+def _template() -> Tuple[bytes, Dict[str, str]]:
+    """Empty document with the base styles registered, saved once per process, plus style name -> id."""
     doc = Document()
     _set_base_styles(doc)
+    ids = {n: doc.part.get_style_id(n, WD_STYLE_TYPE.PARAGRAPH) for n in STYLE_NAMES}
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue(), ids
+
+
+def _new_document() -> Tuple[Document, Dict[str, str]]:
+    """A fresh document cloned from the cached template (no per-render style setup)."""
+    data, ids = _template()
+    return Document(io.BytesIO(data)), ids
+
+
+def _add_paragraph(doc: Document, style_id: str, text: str = "") -> Paragraph:
+    """doc.add_paragraph with a pre-resolved style id (skips the per-call style lookup)."""
+    p = doc.element.body.add_p()
+    p.style = style_id
+    if text:
+        p.add_r().text = text
+    return Paragraph(p, doc)
+
+
+def _add_paragraphs(doc: Document, paragraphs: Iterable[Tuple[Optional[str], str]]):
+    """Append one single-run paragraph per (style id or None, text), building the XML directly."""
+    body = doc.element.body
+    for style_id, text in paragraphs:
+        p = body.add_p()
+        if style_id:
+            p.style = style_id
+        if text:
+            p.add_r().text = text
+
+
+def _save(doc: Document, out_path: Optional[Path]) -> bytes:
+    """Serialize to bytes in memory; also write them to out_path when given."""
+    with span("docx.save", to_disk=int(out_path is not None)) as s:
+        buf = io.BytesIO()
+        doc.save(buf)
+        data = buf.getvalue()
+        s["bytes"] = len(data)
+        if out_path is not None:
+            out_path = Path(out_path)
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            out_path.write_bytes(data)
+    return data
+
+
+@traced("docx.resume")
+def resume_docx_bytes(profile: Dict[str, Any], resume_json: Dict[str, Any], out_path: Optional[Path] = None) -> bytes:
+    doc, sid = _new_document()
 
     # --- Set page margins ---
     section = doc.sections[0]
@@ -66,7 +125,7 @@ def render_resume_docx(profile: Dict[str, Any], resume_json: Dict[str, Any], out
     section.right_margin = Inches(0.6)
 
     # Name / Contact (plain paragraphs; avoid headers/footers)
-    p = doc.add_paragraph(style = "Name")
+    p = _add_paragraph(doc, sid["Name"])
     run = p.add_run(profile.get("full_name", ""))
     p.alignment = WD_ALIGN_PARAGRAPH.LEFT
 
@@ -74,7 +133,7 @@ def render_resume_docx(profile: Dict[str, Any], resume_json: Dict[str, Any], out
     links = profile.get("contact", {}).get("links", [])
     for l in links:
         contact_bits.append(f"{l.get('url')}")
-    c = doc.add_paragraph(style = "Default")
+    c = _add_paragraph(doc, sid["Default"])
     c.add_run(" • ".join([b for b in contact_bits if b]))
     c.bold = True
     c.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
@@ -82,7 +141,7 @@ def render_resume_docx(profile: Dict[str, Any], resume_json: Dict[str, Any], out
     # Headline
     headline = resume_json.get("headline")
     if headline:
-        hdln = doc.add_paragraph(style = "Section Title")
+        hdln = _add_paragraph(doc, sid["Section Title"])
         runner = hdln.add_run(headline)
         runner.bold = True
         runner.italic = True
@@ -90,9 +149,9 @@ def render_resume_docx(profile: Dict[str, Any], resume_json: Dict[str, Any], out
     # Experience (only the bullets returned)
     for section in resume_json.get("sections", []):
         title = section.get("title", "Experience")
-        doc.add_paragraph(title.upper() + "  –––––––––––––––––––––––––––––––––––––––––––––––", style="Section Title")
+        _add_paragraph(doc, sid["Section Title"], title.upper() + "  –––––––––––––––––––––––––––––––––––––––––––––––")
         for item in section.get("items", []):
-            header = doc.add_paragraph(style = "Job Title")
+            header = _add_paragraph(doc, sid["Job Title"])
             header.add_run(item.get("role", "")).bold = True
             emp = item.get("employer", "")
             loc = item.get("location", "")
@@ -101,49 +160,86 @@ def render_resume_docx(profile: Dict[str, Any], resume_json: Dict[str, Any], out
             if tail_bits:
                 header.add_run(f" — {' | '.join(tail_bits)}")
             # bullets
-            for txt in item.get("bullets", []):
-                doc.add_paragraph(txt, style="Description")
+            _add_paragraphs(doc, ((sid["Description"], txt) for txt in item.get("bullets", [])))
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    doc.save(str(out_path))
-    return out_path
+    return _save(doc, out_path)
 
 
-def render_cover_letter_docx(profile: Dict[str, Any], cl_json: Dict[str, Any], out_path: Path) -> Path:
-    doc = Document()
-    _set_base_styles(doc)
+@traced("docx.cover_letter")
+def cover_letter_docx_bytes(profile: Dict[str, Any], cl_json: Dict[str, Any], out_path: Optional[Path] = None) -> bytes:
+    doc, sid = _new_document()
+    default = sid["Default"]
 
-    # Optional contact block
-    top = doc.add_paragraph(profile.get("full_name", ""), style = "Default")
+    # Optional contact block (spacer paragraphs keep the Normal style)
     contact = profile.get("contact", {})
-    doc.add_paragraph(
-        "\n".join([x for x in [contact.get("email"), contact.get("phone"), contact.get("city")] if x]),
-        style = "Default"
-    )
-    doc.add_paragraph("")
+    paras: List[Tuple[Optional[str], str]] = [
+        (default, profile.get("full_name", "")),
+        (default, "\n".join([x for x in [contact.get("email"), contact.get("phone"), contact.get("city")] if x])),
+        (None, ""),
+    ]
 
     # Greeting
     greet = cl_json.get("greeting", "Hiring Team")
-    doc.add_paragraph(f"Dear {greet}", style = "Default")
-    doc.add_paragraph("")
-
+    paras += [(default, f"Dear {greet}"), (None, "")]
 
-    for para in cl_json.get("body_paragraphs", []):
-        doc.add_paragraph(para, style = "Default")
-
-    doc.add_paragraph("")
-    doc.add_paragraph("")
+    paras += [(default, para) for para in cl_json.get("body_paragraphs", [])]
+    paras += [(None, ""), (None, "")]
 
     closing = cl_json.get("closing", "Sincerely,")
     #closing = "Sincerely,"
-    doc.add_paragraph(closing, style = "Default")
-    doc.add_paragraph(profile.get("full_name", ""), style = "Default")
+    paras += [(default, closing), (default, profile.get("full_name", ""))]
+    _add_paragraphs(doc, paras)
+
+    return _save(doc, out_path)
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    doc.save(str(out_path))
+
+def render_resume_docx(profile: Dict[str, Any], resume_json: Dict[str, Any], out_path: Path) -> Path:
+    resume_docx_bytes(profile, resume_json, out_path)
+    return out_path
+
+
+def render_cover_letter_docx(profile: Dict[str, Any], cl_json: Dict[str, Any], out_path: Path) -> Path:
+    cover_letter_docx_bytes(profile, cl_json, out_path)
     return out_path
 
 
 def write_txt_mirrors(resume_text: str, cl_text: str, out_resume: Path, out_cl: Path):
     write_text(out_resume.with_suffix('.txt'), resume_text)
     write_text(out_cl.with_suffix('.txt'), cl_text)
+
+
+def make_render_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Process pool for render_package; each worker builds the style template once at start.
+
+    Workers are spawned, not forked, so the pool is safe to create after the
+    models (and their thread pools) are loaded.
+    """
+    return ProcessPoolExecutor(max_workers=workers or max(1, min(4, (os.cpu_count() or 1) - 1)),
+                               mp_context=multiprocessing.get_context("spawn"), initializer=_template)
+
+
+def render_package(profile: Dict[str, Any], resume_struct: Dict[str, Any], cl_struct: Optional[Dict[str, Any]] = None,
+                   resume_path: Optional[Path] = None, cl_path: Optional[Path] = None, write_txt: bool = False,
+                   pool: Optional[Executor] = None) -> Dict[str, Any]:
+    """Resume and cover letter .docx bytes plus plain-text mirrors, in memory.
+
+    Documents are also written to resume_path / cl_path when given (and the
+    .txt mirrors next to them with write_txt). With a `pool` (make_render_pool)
+    the two documents render concurrently in worker processes while the
+    mirrors are built here.
+    """
+    from .package import build_txt_mirrors
+
+    jobs = {"resume": (resume_docx_bytes, resume_struct, resume_path)}
+    if cl_struct is not None:
+        jobs["cover_letter"] = (cover_letter_docx_bytes, cl_struct, cl_path)
+    with span("docx.render_package", documents=len(jobs), pooled=int(pool is not None)):
+        if pool is not None:
+            futures = {k: pool.submit(fn, profile, struct, path) for k, (fn, struct, path) in jobs.items()}
+        out: Dict[str, Any] = {"cover_letter": None}
+        out["resume_txt"], out["cover_letter_txt"] = build_txt_mirrors(profile, resume_struct, cl_struct or {})
+        for k, (fn, struct, path) in jobs.items():
+            out[k] = futures[k].result() if pool is not None else fn(profile, struct, path)
+        if write_txt and resume_path is not None and cl_path is not None:
+            write_txt_mirrors(out["resume_txt"], out["cover_letter_txt"], Path(resume_path), Path(cl_path))
+    return out
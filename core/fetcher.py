@@ -0,0 +1,209 @@
+# core/fetcher.py
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.io import CACHE
+from utils.tracing import span
+from .jd_parser import UA, extract_jd_text
+
+
+def _write_atomic(path: Path, data: bytes):
+    # Unique temp name: the same URL can be written by two threads or processes at once
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+def _decode(body: bytes, encoding: Optional[str]) -> str:
+    try:
+        return body.decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        # Unknown charset name from a server or an old cache entry
+        return body.decode("utf-8", errors="replace")
+
+
+class PageCache:
+    """On-disk HTTP page cache: `<dir>/<sha1(url)>.body` + `.json` (ETag, Last-Modified, encoding, fetched_at)."""
+
+    def __init__(self, cache_dir: Path):
+        self.dir = Path(cache_dir)
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.dir / f"{key}.json", self.dir / f"{key}.body"
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            meta["body"] = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("url") == url else None
+
+    def put(self, url: str, body: bytes, headers: Dict[str, str], encoding: Optional[str]):
+        meta_path, body_path = self._paths(url)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "encoding": encoding,
+            "fetched_at": time.time(),
+        }
+        # Body first: a crash before the metadata lands leaves the old validators, which at worst
+        # cost one full re-download
+        _write_atomic(body_path, body)
+        _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def touch(self, url: str):
+        meta_path, _ = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            meta["fetched_at"] = time.time()
+            _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+        except (OSError, ValueError):
+            pass
+
+
+class JDFetcher:
+    """Fetches job pages over one pooled `requests.Session`.
+
+    `fetch_many` runs up to `concurrency` requests at once, but at most `per_host`
+    in flight per host and request starts to one host at least `min_interval`
+    seconds apart. Pages are cached on disk: entries younger than `max_age` are
+    served without a request, older ones are revalidated with If-None-Match /
+    If-Modified-Since and a 304 reuses the stored body. `stats` counts what happened.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = CACHE / "pages", concurrency: int = 8, per_host: int = 2,
+                 min_interval: float = 0.25, timeout: float = 10.0, max_age: float = 3600.0):
+        self.cache = PageCache(cache_dir) if cache_dir else None
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.max_age = max_age
+        self.session = requests.Session()
+        self.session.headers.update(UA)
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.stats = {"requests": 0, "fresh": 0, "not_modified": 0, "downloaded": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._host_slots: Dict[str, threading.Semaphore] = {}
+        self._host_next: Dict[str, float] = {}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    @contextmanager
+    def _host_slot(self, host: str) -> Iterator[None]:
+        with self._lock:
+            sem = self._host_slots.setdefault(host, threading.Semaphore(self.per_host))
+        sem.acquire()
+        try:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._host_next.get(host, 0.0))
+                self._host_next[host] = start + self.min_interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+        finally:
+            sem.release()
+
+    def fetch_html(self, url: str, timeout: Optional[float] = None) -> Optional[str]:
+        """Page HTML, from the cache when fresh or unchanged; None on HTTP errors or network failure."""
+        cached = self.cache.get(url) if self.cache else None
+        if cached and time.time() - cached.get("fetched_at", 0) < self.max_age:
+            self._count("fresh")
+            return _decode(cached["body"], cached.get("encoding"))
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            with self._host_slot(urlsplit(url).netloc):
+                self._count("requests")
+                resp = self.session.get(url, headers=headers, timeout=timeout or self.timeout)
+        except requests.RequestException:
+            self._count("errors")
+            return None
+        if resp.status_code == 304 and cached:
+            self._count("not_modified")
+            self.cache.touch(url)
+            return _decode(cached["body"], cached.get("encoding"))
+        if resp.status_code != 200:
+            self._count("errors")
+            return None
+        self._count("downloaded")
+        if resp.encoding is None:
+            resp.encoding = resp.apparent_encoding
+        if self.cache:
+            try:
+                self.cache.put(url, resp.content, resp.headers, resp.encoding)
+            except OSError:
+                pass  # e.g. disk full: serve the page uncached
+        return _decode(resp.content, resp.encoding)
+
+    def fetch(self, url: str, timeout: Optional[float] = None) -> Optional[str]:
+        """Extracted JD text for one URL (see jd_parser.extract_jd_text)."""
+        with span("jd.fetch", host=urlsplit(url).netloc) as s:
+            html = self.fetch_html(url, timeout)
+            s["html_chars"] = len(html or "")
+        return extract_jd_text(html) if html else None
+
+    def _fetch_or_none(self, url: str) -> Optional[str]:
+        try:
+            return self.fetch(url)
+        except Exception:
+            # Any failure (cache I/O, parsing, ...) costs this URL only, not the whole batch
+            self._count("errors")
+            return None
+
+    def fetch_many(self, urls: List[str]) -> List[Optional[str]]:
+        """`fetch` for many URLs concurrently; results keep the input order, None where a URL failed."""
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(urls)), thread_name_prefix="fetch") as pool:
+            return list(pool.map(self._fetch_or_none, urls))
+
+    def close(self):
+        self.session.close()
+
+
+_default: Optional[JDFetcher] = None
+_default_lock = threading.Lock()
+
+
+def get_fetcher() -> JDFetcher:
+    """Process-wide fetcher; JD_PAGE_CACHE_DIR moves the page cache (empty disables it)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            cache_dir = os.getenv("JD_PAGE_CACHE_DIR", str(CACHE / "pages"))
+            _default = JDFetcher(cache_dir=Path(cache_dir) if cache_dir else None)
+        return _default
@@ -0,0 +1,133 @@
+# core/index_artifact.py
+"""Single-file, versioned retrieval index (`HybridRetriever.save_index` / `open_index`).
+
+Layout: 8-byte magic, little-endian u64 header length, JSON header, then
+64-byte-aligned raw arrays. The header records the format version, embedding
+model, analyzer signature, content hash of the master resume and each array's dtype/shape/offset,
+so reading is one mmap plus zero-copy views. `HybridRetriever.open_index`
+then decodes the string table and builds Bullet objects, and it copies the
+embeddings widened to float32 for search; the BM25 postings stay views.
+
+Bullet metadata is stored columnar: one UTF-8 string table, int32 string ids
+per item field (section, item id, employer, ...) and per bullet (id, text, item
+row), CSR lists for skills/domains (item fields and skills/domains are stored
+JSON-encoded, so numbers and bools come back as such) and item -> bullet rows, then the BM25
+postings as CSR (terms, doc ids, term frequencies) and a float16 embedding matrix.
+"""
+from __future__ import annotations
+import json
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"APPIDX\x00\x01"
+# 2: BM25 terms come from utils.analyzer (header records its signature)
+# 3: item fields and skills/domains are JSON-encoded in the string table
+FORMAT_VERSION = 3
+_ALIGN = 64
+
+ITEM_FIELDS = ("section_id", "section_title", "item_id", "employer", "role", "location")
+LIST_FIELDS = ("skills", "domains")
+
+
+def _align(n: int) -> int:
+    return -(-n // _ALIGN) * _ALIGN
+
+
+def write_artifact(path: Path, header: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+    """Write header + arrays atomically (uniquely named tmp file + os.replace), so concurrent builders
+    never share a partial file."""
+    path = Path(path)
+    layout, blobs, offset = {}, [], 0
+    for name, a in arrays.items():
+        a = np.ascontiguousarray(a)
+        offset = _align(offset)
+        layout[name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+        blobs.append((offset, a))
+        offset += a.nbytes
+    head = json.dumps({**header, "format": FORMAT_VERSION, "arrays": layout}).encode("utf-8")
+    base = _align(len(MAGIC) + 8 + len(head))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name + ".", suffix=".tmp", delete=False) as f:
+        tmp = f.name
+        try:
+            f.write(MAGIC + struct.pack("<Q", len(head)) + head)
+            for off, a in blobs:
+                f.write(b"\0" * (base + off - f.tell()))
+                f.write(a.tobytes())
+        except BaseException:
+            f.close()
+            os.unlink(tmp)
+            raise
+    os.replace(tmp, path)
+
+
+def read_header(path: Path) -> Optional[Dict[str, Any]]:
+    """Header only (cheap staleness check); None when missing, foreign or another format version."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (n,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(n).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None
+    return header if header.get("format") == FORMAT_VERSION else None
+
+
+def read_artifact(path: Path) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Header plus read-only array views into one memory map of the file."""
+    header = read_header(path)
+    if header is None:
+        raise ValueError(f"Not a format-{FORMAT_VERSION} index artifact: {path}")
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    (n,) = struct.unpack("<Q", bytes(raw[len(MAGIC):len(MAGIC) + 8]))
+    base = _align(len(MAGIC) + 8 + n)
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        start = base + spec["offset"]
+        arrays[name] = raw[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+    return header, arrays
+
+
+class StringTable:
+    """Interned strings -> ids; stored as one UTF-8 blob plus character offsets."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, s: Optional[str]) -> int:
+        if s is None:
+            return -1
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def arrays(self, prefix: str = "str") -> Dict[str, np.ndarray]:
+        lengths = np.fromiter((len(s) for s in self.strings), dtype=np.int64, count=len(self.strings))
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        blob = np.frombuffer("".join(self.strings).encode("utf-8"), dtype=np.uint8)
+        return {f"{prefix}_blob": blob, f"{prefix}_offsets": offsets}
+
+
+def decode_strings(blob: np.ndarray, offsets: np.ndarray) -> List[Optional[str]]:
+    text = blob.tobytes().decode("utf-8")
+    o = offsets.tolist()
+    return [text[o[i]:o[i + 1]] for i in range(len(o) - 1)]
+
+
+def csr(rows: Sequence[Sequence[int]], dtype=np.int32) -> Tuple[np.ndarray, np.ndarray]:
+    """(offsets, flat values) for a list of int lists."""
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(r) for r in rows])
+    flat = np.fromiter((v for r in rows for v in r), dtype=dtype, count=int(offsets[-1]))
+    return offsets, flat
@@ -1,9 +1,8 @@
 from __future__ import annotations
 import re
 from typing import Optional
-import requests
-from bs4 import BeautifulSoup
 from utils.text import normalize_text
+from utils.tracing import span
 
 UA = {
     "User-Agent": (
@@ -18,31 +17,59 @@ SITE_PATTERNS = {
 }
 
 
+_PARSER = None
+
+
+def _html_parser() -> str:
+    """lxml when installed (several times faster on large pages), else the stdlib parser."""
+    global _PARSER
+    if _PARSER is None:
+        try:
+            import lxml  # noqa: F401
+            _PARSER = "lxml"
+        except ImportError:
+            _PARSER = "html.parser"
+    return _PARSER
+
+
+def extract_jd_text(html: str) -> Optional[str]:
+    """Pull the job description out of a page's HTML; None if nothing JD-sized is found."""
+    with span("jd.extract", html_chars=len(html), parser=_html_parser()):
+        return _extract_jd_text(html)
+
+
+def _extract_jd_text(html: str) -> Optional[str]:
+    from bs4 import BeautifulSoup
+    # Heuristics for Indeed / generic pages
+    soup = BeautifulSoup(html, _html_parser())
+    # Try common containers
+    candidates = [
+        {"name": "Indeed", "nodes": soup.select('[id*="jobDescriptionText"], .jobsearch-JobComponent-description')},
+        {"name": "GenericMain", "nodes": soup.select("main, article")},
+        {"name": "Fallback", "nodes": [soup.body] if soup.body else []},
+    ]
+    for group in candidates:
+        for node in group["nodes"]:
+            text = node.get_text(" ") if node else ""
+            text = normalize_text(text)
+            # crude sanity check: at least 300 chars and includes keywords
+            if len(text) > 300 and any(k in text.lower() for k in ["responsibilities", "requirements", "qualifications", "role"]):
+                return text
+    # Fallback to whole page text
+    text = normalize_text(soup.get_text(" "))
+    return text if len(text) > 300 else None
+
+
 def fetch_jd_from_url(url: str, timeout: int = 10) -> Optional[str]:
-    """Best-effort JD fetcher. LinkedIn may require auth; returns None on failure."""
+    """Best-effort JD fetcher. LinkedIn may require auth; returns None on failure.
+
+    Goes through the shared pooled, disk-cached fetcher (core.fetcher); use
+    `JDFetcher.fetch_many` for many URLs at once.
+    """
+    # Imported here so the app does not pay for requests/bs4 until a URL is fetched
+    from .fetcher import get_fetcher
     try:
-        resp = requests.get(url, headers=UA, timeout=timeout)
-        if resp.status_code != 200:
-            return None
-        html = resp.text
-        # Heuristics for Indeed / generic pages
-        soup = BeautifulSoup(html, "html.parser")
-        # Try common containers
-        candidates = [
-            {"name": "Indeed", "nodes": soup.select('[id*="jobDescriptionText"], .jobsearch-JobComponent-description')},
-            {"name": "GenericMain", "nodes": soup.select("main, article")},
-            {"name": "Fallback", "nodes": [soup.body] if soup.body else []},
-        ]
-        for group in candidates:
-            for node in group["nodes"]:
-                text = node.get_text(" ") if node else ""
-                text = normalize_text(text)
-                # crude sanity check: at least 300 chars and includes keywords
-                if len(text) > 300 and any(k in text.lower() for k in ["responsibilities", "requirements", "qualifications", "role"]):
-                    return text
-        # Fallback to whole page text
-        text = normalize_text(soup.get_text(" "))
-        return text if len(text) > 300 else None
+        return get_fetcher().fetch(url, timeout)
     except Exception:
         return None
 
@@ -50,7 +77,8 @@ def fetch_jd_from_url(url: str, timeout: int = 10) -> Optional[str]:
 def clean_jd_text(raw: str) -> str:
     if not raw:
         return ""
-    raw = normalize_text(raw)
-    # Light section markers for readability
-    raw = re.sub(r"(Responsibilities|Requirements|Qualifications)", r"\n\n**\\1**\n", raw, flags=re.I)
-    return raw.strip()
\ No newline at end of file
+    with span("jd.clean", chars=len(raw)):
+        raw = normalize_text(raw)
+        # Light section markers for readability
+        raw = re.sub(r"(Responsibilities|Requirements|Qualifications)", r"\n\n**\\1**\n", raw, flags=re.I)
+        return raw.strip()
\ No newline at end of file
@@ -0,0 +1,109 @@
+# core/json_stream.py
+from __future__ import annotations
+import json
+from typing import Any, List, Tuple, Union
+
+PathKey = Union[str, int]
+
+_SCALAR_END = set(",]} \t\r\n")
+
+
+class JsonStreamParser:
+    """Incremental JSON scanner for streamed LLM output.
+
+    `feed()` takes the next text chunk and returns the scalar values completed by
+    it as (path, value) pairs, e.g. (("cover_letter", "body_paragraphs", 0), "...").
+    Text before the first "{" (preambles, code fences) is skipped. It only tracks
+    structure; call `json.loads` on the full text for the final document.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._done = False
+        # One frame per open container: [kind, key-or-index, expecting_key]
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escape = False
+        self._buf: List[str] = []
+        self._scalar: List[str] = []
+
+    def _path(self) -> Tuple[PathKey, ...]:
+        return tuple(frame[1] for frame in self._stack)
+
+    def _emit_value(self, value: Any, out: List[Tuple[Tuple[PathKey, ...], Any]]):
+        out.append((self._path(), value))
+
+    def _flush_scalar(self, out):
+        if not self._scalar:
+            return
+        raw = "".join(self._scalar)
+        self._scalar = []
+        try:
+            self._emit_value(json.loads(raw), out)
+        except ValueError:
+            pass
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple[PathKey, ...], Any]]:
+        out: List[Tuple[Tuple[PathKey, ...], Any]] = []
+        for ch in chunk:
+            if self._done:
+                break
+            if not self._started:
+                if ch != "{":
+                    continue
+                self._started = True
+                self._stack.append(["obj", None, True])
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._buf.append(ch)
+                    self._escape = False
+                elif ch == "\\":
+                    self._buf.append(ch)
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    try:
+                        text = json.loads('"' + "".join(self._buf) + '"')
+                    except ValueError:
+                        text = "".join(self._buf)
+                    self._buf = []
+                    frame = self._stack[-1]
+                    if frame[0] == "obj" and frame[2]:
+                        frame[1] = text
+                    else:
+                        self._emit_value(text, out)
+                else:
+                    self._buf.append(ch)
+                continue
+
+            if self._scalar and ch in _SCALAR_END:
+                self._flush_scalar(out)
+
+            frame = self._stack[-1]
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._stack.append(["obj", None, True])
+            elif ch == "[":
+                self._stack.append(["arr", 0, False])
+            elif ch in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    self._done = True
+            elif ch == ":":
+                frame[2] = False
+            elif ch == ",":
+                if frame[0] == "arr":
+                    frame[1] += 1
+                else:
+                    frame[1], frame[2] = None, True
+            elif ch not in " \t\r\n":
+                self._scalar.append(ch)
+        return out
+
+    @property
+    def done(self) -> bool:
+        """True once the top-level object has closed."""
+        return self._done
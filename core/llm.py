@@ -1,75 +1,59 @@
 from __future__ import annotations
+import asyncio
+import json
 import os
-from typing import Dict, Any, List
-from openai import OpenAI
+import random
+import re
+import threading
+import time
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
-DEFAULT_MODEL = os.getenv("OPENAI_LLM_MODEL", "gpt-4o-mini")
-
-SYSTEM_PROMPT = (
-    "You are a resume and cover-letter composer with strict guardrails.\n"
-    "• You may ONLY use work-history bullets provided in ALLOWED_BULLETS. Use their text verbatim.\n"
-    "• Generate a headline/summary (roughly 10-16 words) and a cover letter in the provided tone, but must not add new factual claims.\n"
-    "• The cover letter should reference 1–2 specific experiences by name and attribute them to their source role/company (e.g., 'At FieldCloser…', 'As Event Manager…').\n"
-    "• Integrate references naturally into prose (no bullet lists); aim for ~300–450 words.\n"
-    "• Optimize for ATS parsing: single column, standard headings, plain bullets.\n"
+from openai import (
+    OpenAI,
+    AsyncOpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
 )
 
+from .json_stream import JsonStreamParser
+from .llm_cache import ResponseCache, cache_key, get_response_cache
+from .prompt import SYSTEM_PROMPT, get_prompt_builder  # noqa: F401
+from utils.tracing import emit, span
 
+DEFAULT_MODEL = os.getenv("OPENAI_LLM_MODEL", "gpt-4o-mini")
 
-def compose_package(job_description: str, allowed_bullets: List[Dict[str, str]], tone_examples: Dict[str, Any],
-                    model: str = DEFAULT_MODEL, target_words: int = 380) -> Dict[str, Any]:
-    client = OpenAI()
-
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {
-            "role": "user",
-            "content": (
-                "JOB_DESCRIPTION:"
-                f"\n{job_description}\n\n"
-                "ALLOWED_BULLETS: (use verbatim text; refer by id in output)\n"
-                + "\n".join(
-                    [
-                        f"- {b['id']}: {b['text']}"
-                        + (
-                            f" (from {b.get('meta', {}).get('role')} at {b.get('meta', {}).get('employer')})"
-                            if b.get("meta") and (b["meta"].get("role") or b["meta"].get("employer"))
-                            else ""
-                        )
-                        for b in allowed_bullets
-                    ]
-                )
-                + "\n\nROLES (for attribution in the cover letter):\n"
-                + "\n".join(
-                    sorted(
-                        {
-                            f"{b.get('meta', {}).get('employer', '')} — {b.get('meta', {}).get('role', '')}"
-                            for b in allowed_bullets
-                            if b.get("meta")
-                        }
-                    )
-                )
-                + "\n\nGUIDANCE FOR COVER LETTER:\n"
-                "- Quote or paraphrase 1–2 ALLOWED_BULLETS verbatim and attribute them with their source role/company.\n"
-                "- Weave references into natural prose (no lists); keep length ~300–450 words.\n"
-                + "\n\nTONE_GUIDE (examples):\n"
-                + str(tone_examples)
-                + "\n\nReturn JSON with keys: resume.headline, resume.sections[experience], cover_letter{greeting, body_paragraphs[], closing, signature}."
-            ),
-        },
-    ]
-
-
-    resp = client.chat.completions.create(model=model, messages=messages, temperature=0.4)
-    content = resp.choices[0].message.content
 
+def build_messages(job_description: str, allowed_bullets: List[Dict[str, str]],
+                   tone_examples: Dict[str, Any], catalogue: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, str]]:
+    """Chat messages for one package (see core.prompt: stable prefix first, JD trimmed to budget)."""
+    return get_prompt_builder().build(job_description, allowed_bullets, tone_examples, catalogue=catalogue)["messages"]
+
+
+def _parse_json(content: str) -> Optional[Dict[str, Any]]:
     # Best-effort: parse JSON block from the content
-    import json, re
-    try:
-        json_str = re.search(r"\{[\s\S]*\}$", content).group(0)
-        data = json.loads(json_str)
-        return data
-    except Exception:
+    with span("llm.parse_json", chars=len(content or "")) as s:
+        try:
+            json_str = re.search(r"\{[\s\S]*\}$", content).group(0)
+            return json.loads(json_str)
+        except Exception:
+            s["failed"] = 1
+            return None
+
+
+def _usage_attrs(usage: Any) -> Dict[str, int]:
+    """Token counts (including prefix-cache hits) from an OpenAI `usage` object (empty when the server sent none)."""
+    if usage is None:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {"prompt_tokens": usage.prompt_tokens or 0, "completion_tokens": usage.completion_tokens or 0,
+            "cached_tokens": getattr(details, "cached_tokens", None) or 0}
+
+
+def parse_package(content: str) -> Dict[str, Any]:
+    data = _parse_json(content)
+    if data is None:
         # Fallback minimal structure
         return {
             "resume": {
@@ -82,4 +66,234 @@ def compose_package(job_description: str, allowed_bullets: List[Dict[str, str]],
                 "closing": "Sincerely,",
                 "signature": ""
             }
-        }
\ No newline at end of file
+        }
+    return data
+
+
+_client: Optional[OpenAI] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OpenAI:
+    """Process-wide OpenAI client, so repeated calls reuse its HTTP connection pool."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAI()
+        return _client
+
+
+def compose_package(job_description: str, allowed_bullets: List[Dict[str, str]], tone_examples: Dict[str, Any],
+                    model: str = DEFAULT_MODEL, target_words: int = 380, temperature: float = 0.4,
+                    regenerate: bool = False, cache: Optional[ResponseCache] = None,
+                    use_cache: bool = True, catalogue: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Compose headline + cover letter. Identical prompts are served from the response
+    cache (`cache`, else the process-wide one); `regenerate=True` skips the lookup and
+    overwrites the cached entry, `use_cache=False` neither reads nor writes it. The
+    candidate's `catalogue` (core.package.bullet_catalogue) is only used with PROMPT_CATALOGUE=1."""
+    if not use_cache:
+        cache = None
+    elif cache is None:
+        cache = get_response_cache()
+    prompt = get_prompt_builder().build(job_description, allowed_bullets, tone_examples, model, catalogue)
+    messages = prompt["messages"]
+    key = cache_key(model, temperature, messages)
+    if cache is not None and not regenerate:
+        cached = cache.get(key)
+        if cached is not None:
+            emit("llm.call", 0.0, model=model, cache_hits=1)
+            return cached
+
+    client = get_client()
+    with span("llm.call", model=model) as s:
+        resp = client.chat.completions.create(model=model, messages=messages, temperature=temperature)
+        s.update(_usage_attrs(resp.usage))
+    content = resp.choices[0].message.content
+    data = _parse_json(content)
+    if data is None:
+        return parse_package(content)
+    if cache is not None:
+        cache.put(key, data)
+    return data
+
+
+def _package_events(path: Tuple, value: Any) -> Iterator[Tuple[str, Any]]:
+    if path in (("resume", "headline"), ("resume.headline",)) and isinstance(value, str):
+        yield "headline", value
+    elif len(path) == 3 and path[:2] == ("cover_letter", "body_paragraphs") and isinstance(value, str):
+        yield "paragraph", value
+
+
+def compose_package_stream(job_description: str, allowed_bullets: List[Dict[str, str]],
+                           tone_examples: Dict[str, Any], model: str = DEFAULT_MODEL,
+                           target_words: int = 380, temperature: float = 0.4, regenerate: bool = False,
+                           cache: Optional[ResponseCache] = None, use_cache: bool = True,
+                           catalogue: Optional[List[Dict[str, Any]]] = None) -> Iterator[Tuple[str, Any]]:
+    """Streaming `compose_package`.
+
+    Yields ("headline", str) and ("paragraph", str) events as soon as each value is
+    complete in the token stream, then ("package", dict) with the full parsed result.
+    """
+    if not use_cache:
+        cache = None
+    elif cache is None:
+        cache = get_response_cache()
+    prompt = get_prompt_builder().build(job_description, allowed_bullets, tone_examples, model, catalogue)
+    messages = prompt["messages"]
+    key = cache_key(model, temperature, messages)
+    cached = cache.get(key) if cache is not None and not regenerate else None
+    if cached is not None:
+        emit("llm.call", 0.0, model=model, cache_hits=1)
+        headline = cached.get("resume.headline") or (cached.get("resume") or {}).get("headline")
+        if headline:
+            yield "headline", headline
+        for para in (cached.get("cover_letter") or {}).get("body_paragraphs", []) or []:
+            yield "paragraph", para
+        yield "package", cached
+        return
+
+    client = get_client()
+    parser = JsonStreamParser()
+    parts: List[str] = []
+    # Timed by hand, not with span(): a span would stay open across each yield and adopt every span the
+    # consumer opens between events. Time spent suspended in the consumer is excluded.
+    attrs: Dict[str, Any] = {"model": model, "streamed": 1}
+    t0 = time.perf_counter()
+    paused = 0.0
+    try:
+        stream = client.chat.completions.create(model=model, messages=messages, temperature=temperature, stream=True,
+                                                stream_options={"include_usage": True})
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                attrs.update(_usage_attrs(chunk.usage))
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ""
+            if not delta:
+                continue
+            if not parts:
+                emit("llm.first_token", (time.perf_counter() - t0) * 1000, model=model)
+            parts.append(delta)
+            for path, value in parser.feed(delta):
+                for event in _package_events(path, value):
+                    t = time.perf_counter()
+                    yield event
+                    paused += time.perf_counter() - t
+    except Exception as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        emit("llm.call", (time.perf_counter() - t0 - paused) * 1000, **attrs)
+
+    content = "".join(parts)
+    data = _parse_json(content)
+    if data is None:
+        yield "package", parse_package(content)
+        return
+    if cache is not None:
+        cache.put(key, data)
+    yield "package", data
+
+
+# Errors worth retrying: throttling, timeouts, dropped connections and 5xx.
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+class AsyncComposer:
+    """Concurrent `compose_package` over one pooled `AsyncOpenAI` client.
+
+    At most `concurrency` requests are in flight; each attempt is bounded by
+    `timeout` seconds and retryable errors back off exponentially (honouring
+    Retry-After when the server sends one). Pass `base_url` (or set
+    OPENAI_BASE_URL) to point it at a local stub server.
+    Use within a single event loop, e.g. `async with AsyncComposer() as c: ...`.
+    Pass a `ResponseCache` to reuse completions for identical prompts.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL, concurrency: int = 8, timeout: float = 60.0,
+                 max_retries: int = 4, backoff: float = 0.5, max_backoff: float = 20.0,
+                 base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 client: Optional[AsyncOpenAI] = None, temperature: float = 0.4,
+                 cache: Optional[ResponseCache] = None):
+        self.model = model
+        self.temperature = temperature
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.client = client or AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            timeout=timeout,
+            max_retries=0,  # retries are handled here so backoff is shared with the semaphore
+        )
+        self._sem = asyncio.Semaphore(concurrency)
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "cache_hits": 0, "tokens_saved": 0}
+
+    async def __aenter__(self) -> "AsyncComposer":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.close()
+
+    def _delay(self, attempt: int, err: Exception) -> float:
+        retry_after = None
+        response = getattr(err, "response", None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("retry-after", ""))
+            except ValueError:
+                retry_after = None
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        delay = min(self.backoff * (2 ** attempt), self.max_backoff)
+        return delay * (0.5 + random.random() / 2)
+
+    async def compose(self, job_description: str, allowed_bullets: List[Dict[str, str]],
+                      tone_examples: Dict[str, Any], target_words: int = 380,
+                      regenerate: bool = False, catalogue: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        prompt = get_prompt_builder().build(job_description, allowed_bullets, tone_examples, self.model, catalogue)
+        messages = prompt["messages"]
+        self.stats["tokens_saved"] += prompt["tokens_saved"]
+        key = cache_key(self.model, self.temperature, messages)
+        if self.cache is not None and not regenerate:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                emit("llm.call", 0.0, model=self.model, cache_hits=1)
+                return cached
+        attempt = 0
+        while True:
+            try:
+                async with self._sem:
+                    self.stats["requests"] += 1
+                    with span("llm.call", model=self.model, retry=int(attempt > 0)) as s:
+                        resp = await asyncio.wait_for(
+                            self.client.chat.completions.create(
+                                model=self.model, messages=messages, temperature=self.temperature
+                            ),
+                            timeout=self.timeout,
+                        )
+                        s.update(_usage_attrs(resp.usage))
+                content = resp.choices[0].message.content
+                data = _parse_json(content)
+                if data is None:
+                    return parse_package(content)
+                if self.cache is not None:
+                    self.cache.put(key, data)
+                return data
+            except (asyncio.TimeoutError, *RETRYABLE_ERRORS) as e:
+                if attempt >= self.max_retries:
+                    self.stats["failures"] += 1
+                    raise
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._delay(attempt, e))
+                attempt += 1
+
+    async def compose_many(self, jobs: List[Tuple[str, List[Dict[str, str]], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Compose several (job_description, allowed_bullets, tone_examples) packages concurrently."""
+        return await asyncio.gather(*(self.compose(*job) for job in jobs))
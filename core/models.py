@@ -0,0 +1,72 @@
+# core/models.py
+"""Model loading with an optional CPU inference backend.
+
+`EMBEDDING_MODEL` / `CROSS_ENCODER_MODEL` accept a backend prefix:
+
+    sentence-transformers/all-MiniLM-L6-v2        fp32 PyTorch (default)
+    onnx:sentence-transformers/all-MiniLM-L6-v2   ONNX Runtime (needs `optimum[onnxruntime]`)
+    int8:sentence-transformers/all-MiniLM-L6-v2   PyTorch with int8 dynamic quantization of Linear layers
+
+The full spec (prefix included) is what caches key on, so vectors and scores from
+different backends never mix.
+"""
+from __future__ import annotations
+from typing import Any, Tuple
+
+BACKENDS = ("torch", "onnx", "int8")
+
+
+def parse_model_spec(spec: str) -> Tuple[str, str]:
+    """'onnx:name' -> ('onnx', 'name'); unprefixed names use the fp32 torch backend."""
+    backend, sep, name = spec.partition(":")
+    if sep and backend in BACKENDS:
+        return backend, name
+    return "torch", spec
+
+
+def _quantize_int8(module: Any) -> Any:
+    import torch
+    return torch.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _onnx_missing(spec: str, err: Exception) -> RuntimeError:
+    return RuntimeError(f"{spec!r} needs ONNX Runtime: pip install 'optimum[onnxruntime]' ({err})")
+
+
+def _backend_unsupported(spec: str, version: str, err: Exception) -> RuntimeError:
+    # Older sentence-transformers reject the `backend` argument with a TypeError
+    return RuntimeError(f"{spec!r} needs sentence-transformers>={version} ({err})")
+
+
+def load_embedder(spec: str) -> Any:
+    """SentenceTransformer for a (possibly prefixed) EMBEDDING_MODEL spec."""
+    from sentence_transformers import SentenceTransformer
+    backend, name = parse_model_spec(spec)
+    if backend == "onnx":
+        try:
+            return SentenceTransformer(name, device="cpu", backend="onnx")
+        except ImportError as e:
+            raise _onnx_missing(spec, e) from e
+        except TypeError as e:
+            raise _backend_unsupported(spec, "3.2", e) from e
+    if backend == "int8":
+        return _quantize_int8(SentenceTransformer(name, device="cpu"))
+    return SentenceTransformer(name)
+
+
+def load_cross_encoder(spec: str) -> Any:
+    """CrossEncoder for a (possibly prefixed) CROSS_ENCODER_MODEL spec."""
+    from sentence_transformers import CrossEncoder
+    backend, name = parse_model_spec(spec)
+    if backend == "onnx":
+        try:
+            return CrossEncoder(name, device="cpu", backend="onnx")
+        except ImportError as e:
+            raise _onnx_missing(spec, e) from e
+        except TypeError as e:
+            raise _backend_unsupported(spec, "4.0", e) from e
+    if backend == "int8":
+        ce = CrossEncoder(name, device="cpu")
+        ce.model = _quantize_int8(ce.model)
+        return ce
+    return CrossEncoder(name)
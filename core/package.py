@@ -0,0 +1,210 @@
+# core/package.py
+from __future__ import annotations
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple, Union
+
+from .retrieval import Bullet, HybridRetriever, bullets_from_master
+from .session import RetrievalSession
+
+MIN_BULLETS_PER_ITEM = 3
+
+
+def extract_bullet_ids(llm_out: dict) -> list[str]:
+    """Safely pull bullet_ids from llm_out regardless of dict/list shapes."""
+    ids: list[str] = []
+    resume = llm_out.get("resume", {}) or {}
+    sections = resume.get("sections", []) or []
+    if isinstance(sections, dict):
+        sections = [sections]
+    for sec in sections:
+        items = (sec or {}).get("items", []) or []
+        if isinstance(items, dict):
+            items = [items]
+        for it in items:
+            ids.extend((it or {}).get("bullet_ids", []) or [])
+    # unique order-preserving strings
+    seen, clean = set(), []
+    for i in ids:
+        if isinstance(i, str) and i not in seen:
+            seen.add(i)
+            clean.append(i)
+    return clean
+
+
+def bullet_catalogue(master: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every bullet of the master resume in `allowed_bullets` form (the LLM prompt's shared prefix)."""
+    return allowed_bullets(bullets_from_master(master))
+
+
+def allowed_bullets(chosen: List[Bullet]) -> List[Dict[str, Any]]:
+    # Include source metadata so the LLM can attribute experiences in the cover letter
+    return [
+        {
+            "id": b.id,
+            "text": b.text,
+            "meta": {"employer": b.meta.get("employer"), "role": b.meta.get("role")},
+        }
+        for b in chosen
+    ]
+
+
+def dates_to_str(d: dict) -> str:
+    if not isinstance(d, dict):
+        return ""
+    s = d.get("start", ""); e = d.get("end", "")
+    return f"{s}–{e}" if (s or e) else ""
+
+
+def _order_key(t: str):
+    # Order sections: Experience first, Projects second, then others
+    tl = t.lower()
+    if tl == "experience":
+        return (0, t)
+    if tl.startswith("project"):
+        return (1, t)
+    return (2, t)
+
+
+def education_items(master: Dict[str, Any]) -> List[Dict[str, Any]]:
+    items = []
+    for section in master.get("sections", []):
+        if section.get("id") == "education":
+            for edu in section.get("items", []):
+                items.append({
+                    "employer": edu.get("institution", "Education"),
+                    "role": edu.get("credential", ""),
+                    "location": edu.get("location", ""),
+                    "dates": dates_to_str(edu.get("dates")),
+                    "bullets": [],
+                })
+            break
+    return items
+
+
+def build_resume_struct(master: Dict[str, Any], retriever: Union[HybridRetriever, RetrievalSession], chosen: List[Bullet],
+                        llm_out: Dict[str, Any], jd_text: str) -> Dict[str, Any]:
+    """Group selected bullets into resume sections, enforcing primaries and a per-item minimum.
+
+    Pass the JD's RetrievalSession as `retriever` to reuse its query embedding for the per-item ranking.
+    """
+    # Preserve model’s bullet order if it provided IDs; otherwise keep UI order
+    id2bullet = {b.id: b for b in chosen}
+    bullet_ids = extract_bullet_ids(llm_out)
+    if bullet_ids:
+        ordered_bullets = [id2bullet[i] for i in bullet_ids if i in id2bullet]
+    else:
+        ordered_bullets = chosen
+
+    # Group selected bullets by (section_id, item_id)
+    groups = defaultdict(list)
+    for b in ordered_bullets:
+        sec_id = b.meta.get("section_id") or "exp"
+        item_id = b.meta.get("item_id") or b.id
+        groups[(sec_id, item_id)].append(b)
+
+    # --- Enforce primary bullets + minimum bullets per included item ---
+    sections_map = defaultdict(list)  # title -> list of item dicts
+    # Rank ALL bullets of every included item by relevance to JD in a single pass
+    ranked_by_item = retriever.rank_items_bullets([item_id for _, item_id in groups], jd_text)
+
+    for (sec_id, item_id), blist in groups.items():
+        ref = blist[0]
+        title = ref.meta.get("section_title") or "Experience"
+        employer_or_name = ref.meta.get("employer") or "Experience"
+        role_line = ref.meta.get("role") or ("Project" if title.lower().startswith("project") else "")
+        location = ref.meta.get("location") or ""
+        dates = dates_to_str(ref.meta.get("dates", {}))
+        if title.lower().startswith("project"):
+            # Project name comes from employer_or_name (set to item.name in retrieval)
+            project_name_as_title = employer_or_name
+            # Aggregate unique skills across bullets for this project
+            skill_set = []
+            seen = set()
+            for b in blist:
+                for s in (b.meta.get("skills") or []):
+                    if s and s not in seen:
+                        seen.add(s)
+                        skill_set.append(s)
+            top_skills = skill_set[:3]
+            skills_as_employer = " · ".join(top_skills)
+            role_line = project_name_as_title
+            employer_or_name = skills_as_employer
+
+        all_ranked = ranked_by_item.get(item_id, [])
+
+        primaries = [b for b in all_ranked if b.meta.get("primary")]
+        secondaries = [b for b in all_ranked if not b.meta.get("primary")]
+
+        # Start with ALL primaries (must include, even if user didn’t check them)
+        ordered_ids: list[str] = []
+        for b in primaries:
+            if b.id not in ordered_ids:
+                ordered_ids.append(b.id)
+
+        # Add user-selected non-primary bullets in current (UI/LLM) order
+        for b in blist:
+            if not b.meta.get("primary") and b.id not in ordered_ids:
+                ordered_ids.append(b.id)
+
+        # Backfill with remaining secondaries by relevance until minimum is met
+        for b in secondaries:
+            if len(ordered_ids) >= MIN_BULLETS_PER_ITEM:
+                break
+            if b.id not in ordered_ids:
+                ordered_ids.append(b.id)
+
+        # Materialize texts in enforced order
+        id_to_bullet = {b.id: b for b in (all_ranked + blist)}
+        enforced_texts = [id_to_bullet[i].text for i in ordered_ids if i in id_to_bullet]
+
+        sections_map[title].append({
+            "employer": employer_or_name,
+            "role": role_line,
+            "location": location,
+            "dates": dates,
+            "bullets": enforced_texts,
+        })
+
+    ordered_titles = sorted(sections_map.keys(), key=_order_key)
+    resume_sections = [{"title": t, "items": sections_map[t]} for t in ordered_titles]
+
+    # --- Always include Education from master JSON ---
+    edu = education_items(master)
+    if edu:
+        resume_sections = [{"title": "Education", "items": edu}] + resume_sections
+
+    headline = llm_out.get("resume.headline") or (llm_out.get("resume") or {}).get("headline")
+    return {
+        "headline": headline,
+        "sections": resume_sections,
+    }
+
+
+def build_cover_letter_struct(master: Dict[str, Any], llm_out: Dict[str, Any]) -> Dict[str, Any]:
+    return llm_out.get(
+        "cover_letter",
+        {
+            "greeting": "Hiring Team",
+            "body_paragraphs": ["Thanks for considering my application."],
+            "closing": "Sincerely,",
+            "signature": master.get("profile", {}).get("full_name", ""),
+        },
+    )
+
+
+def build_txt_mirrors(profile: Dict[str, Any], resume_struct: Dict[str, Any],
+                      cl_struct: Dict[str, Any]) -> Tuple[str, str]:
+    """Plain-text versions of the resume bullets and cover letter for pasting into portals."""
+    all_bullets_txt = []
+    for sec in resume_struct.get("sections", []):
+        for it in sec.get("items", []):
+            for bt in it.get("bullets", []):
+                all_bullets_txt.append(f"- {bt}")
+    resume_txt = (
+        f"{profile.get('full_name','')}\n"
+        + (resume_struct.get("headline") or "")
+        + ("\n\n" if all_bullets_txt else "")
+        + "\n".join(all_bullets_txt)
+    )
+    cl_txt = "\n\n".join(cl_struct.get("body_paragraphs", []))
+    return resume_txt, cl_txt
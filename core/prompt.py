@@ -0,0 +1,372 @@
+# core/prompt.py
+"""Token-budgeted prompts for `compose_package`.
+
+`PromptBuilder.build` puts what does not change between JDs first: the system
+message holds the guardrails, the cover-letter guidance, the output format and
+a compact tone guide (about 400 tokens); the user message holds the allowed
+bullets grouped under their source role and then the JD. Only the allowed
+bullets are ever written.
+
+With `use_catalogue` (PROMPT_CATALOGUE=1) a caller may pass the candidate's
+whole bullet catalogue: it goes in the system message, which is then identical
+across the candidate's JDs and long enough for provider prefix caching (OpenAI
+caches prefixes of 1024+ tokens and bills them at half price), and the user
+message lists only the allowed ids. That layout puts bullets the caller did not
+allow in front of the model, so it is off by default, and it is used only when
+its billed tokens with the prefix cached are below the plain layout's, which
+takes a long JD or a small catalogue; catalogues over `catalogue_budget` tokens
+are never used.
+
+The JD is cut to `jd_budget` tokens: it is split into sections and sentences,
+duplicates and boilerplate (benefits, EEO notices, page chrome) go first, and
+the sentences that share the most terms with the allowed bullets are kept in
+their original order.
+
+Tokens are counted locally with tiktoken when it is installed, else estimated
+from word lengths. Each build also counts the old layout (the whole JD plus the
+tone file's Python repr) and reports the difference as `tokens_saved`.
+"""
+from __future__ import annotations
+import json
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.analyzer import get_analyzer
+from utils.tracing import span
+
+SYSTEM_PROMPT = (
+    "You are a resume and cover-letter composer with strict guardrails.\n"
+    "• You may ONLY use work-history bullets provided in ALLOWED_BULLETS. Use their text verbatim.\n"
+    "• Generate a headline/summary (roughly 10-16 words) and a cover letter in the provided tone, but must not add new factual claims.\n"
+    "• The cover letter should reference 1–2 specific experiences by name and attribute them to their source role/company (e.g., 'At FieldCloser…', 'As Event Manager…').\n"
+    "• Integrate references naturally into prose (no bullet lists); aim for ~300–450 words.\n"
+    "• Optimize for ATS parsing: single column, standard headings, plain bullets.\n"
+)
+
+GUIDANCE = (
+    "GUIDANCE FOR COVER LETTER:\n"
+    "- Quote or paraphrase 1–2 ALLOWED_BULLETS verbatim and attribute them with their source role/company.\n"
+    "- Weave references into natural prose (no lists); keep length ~300–450 words.\n"
+)
+
+OUTPUT_FORMAT = (
+    "Return JSON with keys: resume.headline, resume.sections[experience], "
+    "cover_letter{greeting, body_paragraphs[], closing, signature}."
+)
+
+DEFAULT_JD_BUDGET = 1200
+DEFAULT_CATALOGUE_BUDGET = 6000
+# OpenAI caches prompt prefixes from this length and bills cached tokens at this rate
+CACHE_MIN_TOKENS = 1024
+CACHED_TOKEN_RATE = 0.5
+# Longest piece of a JD ranked as a unit; longer sentences are split into windows of this size
+_WINDOW_TOKENS = 64
+
+CATALOGUE_RULE = (
+    "CANDIDATE_BULLETS below is the candidate's full work history, grouped by source role. Only the bullets whose ids "
+    "are listed under ALLOWED_BULLETS at the end of the request may be used for this job."
+)
+
+# Section headings in scraped postings. Scraped text is whitespace-normalized, so they appear inline; a heading
+# must be capitalized and followed by a colon, a line end or a capitalized word ("Benefits include…" is prose)
+_HEADING_RE = re.compile(
+    r"(?:\*\*)?\b(Responsibilities|Requirements|(?:Preferred |Minimum |Basic )?Qualifications|What you(?:'|’)ll do"
+    r"|What you(?:'|’)ll bring|What we(?:'|’)re looking for|Skills|Nice to have|About the role|About you"
+    r"|About us|About the company|Who we are|Benefits|Perks|Compensation|Equal opportunity|How to apply)\b(?:\*\*)?"
+    r"(?::|(?=\s*\n|\s*$|\s+(?-i:[A-Z•·▪])))",
+    re.I,
+)
+_SENTENCE_RE = re.compile(r"(?<=[.!?;•])\s+|\s+(?=[•·▪]\s)|\n+")
+_CORE = ("responsibilities", "requirements", "qualifications", "what you", "skills", "nice to have", "about the role",
+         "about you")
+_BOILERPLATE_SECTIONS = ("about us", "about the company", "who we are", "benefits", "perks", "compensation",
+                         "equal opportunity", "how to apply")
+_BOILERPLATE_RE = re.compile(
+    r"equal opportunity|\beeo\b|reasonable accommodation|without regard to|privacy (?:policy|notice)|cookies?\b"
+    r"|apply now|sign in|share this job|similar jobs|report this job|401\(k\)|paid time off|\bpto\b",
+    re.I,
+)
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str) -> Any:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # Encodings are downloaded on first use; offline we fall back to the estimate
+        return None
+
+
+_APPROX_RE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Token count of `text` for `model` (tiktoken), or a word-length estimate without it."""
+    if not text:
+        return 0
+    enc = _encoding(model)
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return sum(1 + (len(w) - 1) // 6 for w in _APPROX_RE.findall(text))
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: str = "gpt-4o-mini") -> int:
+    """Prompt tokens of a chat request (content plus the per-message framing)."""
+    return 3 + sum(4 + count_tokens(m["content"], model) for m in messages)
+
+
+def compact_tone_guide(tone_examples: Any) -> str:
+    """One line per tone example ("voice notes. Opening: "…" Closing: "…""), ids dropped."""
+    examples = tone_examples.get("cover_letter_tone_examples") if isinstance(tone_examples, dict) else tone_examples
+    if not isinstance(examples, list) or not all(isinstance(e, dict) for e in examples):
+        return json.dumps(tone_examples, ensure_ascii=False, separators=(",", ":"))
+    lines = []
+    for ex in examples:
+        bits = [str(ex["voice_notes"]).strip()] if ex.get("voice_notes") else []
+        bits += [f'{k.replace("_", " ").capitalize()}: "{str(v).strip()}"'
+                 for k, v in ex.items() if k not in ("id", "voice_notes") and v]
+        lines.append("- " + " ".join(bits))
+    return "\n".join(lines)
+
+
+def _role_label(meta: Optional[Dict[str, Any]]) -> str:
+    meta = meta or {}
+    employer, role = meta.get("employer") or "", meta.get("role") or ""
+    return f"{employer} — {role}" if employer and role else employer or role
+
+
+def format_bullets(allowed_bullets: List[Dict[str, Any]]) -> str:
+    """Bullets grouped under their source role (first-seen order), so each role is written once."""
+    groups: Dict[str, List[str]] = {}
+    for b in allowed_bullets:
+        groups.setdefault(_role_label(b.get("meta")), []).append(f"- {b['id']}: {b['text']}")
+    parts = [("" if not label else f"[{label}]\n") + "\n".join(lines) for label, lines in groups.items()]
+    return "\n".join(parts)
+
+
+def _segments(jd: str) -> List[Tuple[str, str]]:
+    """(section heading, sentence) pairs in document order; text before the first heading has heading ""."""
+    out: List[Tuple[str, str]] = []
+    heading, pos = "", 0
+    headings = [m for m in _HEADING_RE.finditer(jd) if m.group(1)[0].isupper()]
+    for m in headings + [None]:
+        end = m.start() if m else len(jd)
+        for sent in _SENTENCE_RE.split(jd[pos:end]):
+            sent = sent.strip(" *:\t")
+            if sent:
+                out.append((heading, sent))
+        if m:
+            heading, pos = m.group(1), m.end()
+    return out
+
+
+def _windows(text: str, size: int, model: str) -> List[str]:
+    """`text` cut at word boundaries into pieces of at most about `size` tokens; longer words are cut by characters."""
+    pieces: List[str] = []
+    words: List[str] = []
+    used = 0
+    for word in text.split():
+        cost = count_tokens(word, model)
+        if cost > size:
+            word_parts = [word[i:i + size] for i in range(0, len(word), size)]
+        else:
+            word_parts = [word]
+        for part in word_parts:
+            cost = count_tokens(part, model)
+            if words and used + cost > size:
+                pieces.append(" ".join(words))
+                words, used = [], 0
+            words.append(part)
+            used += cost
+    if words:
+        pieces.append(" ".join(words))
+    return pieces
+
+
+def _section_weight(heading: str) -> float:
+    h = heading.lower()
+    if any(h.startswith(k) for k in _BOILERPLATE_SECTIONS):
+        return -1.0
+    if any(h.startswith(k) for k in _CORE):
+        return 1.0
+    return 0.0
+
+
+def trim_jd(jd: str, budget: int, vocab: Optional[set] = None, model: str = "gpt-4o-mini") -> Tuple[str, int, int]:
+    """The JD cut to `budget` tokens, most relevant sentences kept in order; returns (text, tokens before, after).
+
+    `vocab` is the analyzer terms of the allowed bullets: sentences sharing more
+    of them rank higher; repeats and boilerplate are dropped. Sentences longer than
+    `_WINDOW_TOKENS` (scraped text often has no punctuation at all) are ranked in
+    windows of that size. The first sentence, or its first window, is always kept;
+    if nothing else survives, the JD is cut to its first `budget` tokens.
+    """
+    total = count_tokens(jd, model)
+    if total <= budget:
+        return jd, total, total
+    if budget <= 0:
+        return "", total, 0
+    analyzer = get_analyzer()
+    vocab = vocab or set()
+    window = min(budget - 1, _WINDOW_TOKENS) or 1
+    segs = [(heading, piece) for heading, sent in _segments(jd)
+            for piece in (_windows(sent, window, model) if count_tokens(sent, model) > window else [sent])]
+    seen = set()
+    scored = []
+    for i, (heading, sent) in enumerate(segs):
+        key = sent.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        terms = set(analyzer.terms(sent))
+        score = _section_weight(heading) + len(terms & vocab) / math.sqrt(len(terms) or 1)
+        if _BOILERPLATE_RE.search(sent):
+            score -= 2.0
+        scored.append((float("inf") if i == 0 else score, i, count_tokens(sent, model) + 1))
+    kept, used = set(), 0
+    for score, i, cost in sorted(scored, key=lambda s: (-s[0], s[1])):
+        if score >= 0 and used + cost <= budget:
+            kept.add(i)
+            used += cost
+    lines: List[str] = []
+    current = None
+    for i, (heading, sent) in enumerate(segs):
+        if i not in kept:
+            continue
+        if heading != current or not lines:
+            lines.append(f"{heading}: {sent}" if heading else sent)
+            current = heading
+        else:
+            lines[-1] += " " + sent
+    text = "\n".join(lines)
+    kept_tokens = count_tokens(text, model)
+    if not text:
+        text = _windows(jd, budget, model)[0]
+        kept_tokens = count_tokens(text, model)
+    return text, total, kept_tokens
+
+
+def legacy_messages(job_description: str, allowed_bullets: List[Dict[str, Any]],
+                    tone_examples: Dict[str, Any]) -> List[Dict[str, str]]:
+    """The previous prompt layout (full JD, per-bullet attribution, tone repr); only used to report savings."""
+    bullets = "\n".join(
+        f"- {b['id']}: {b['text']}"
+        + (f" (from {b['meta'].get('role')} at {b['meta'].get('employer')})"
+           if b.get("meta") and (b["meta"].get("role") or b["meta"].get("employer")) else "")
+        for b in allowed_bullets
+    )
+    roles = "\n".join(sorted({f"{b.get('meta', {}).get('employer', '')} — {b.get('meta', {}).get('role', '')}"
+                              for b in allowed_bullets if b.get("meta")}))
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": (
+            f"JOB_DESCRIPTION:\n{job_description}\n\n"
+            f"ALLOWED_BULLETS: (use verbatim text; refer by id in output)\n{bullets}"
+            f"\n\nROLES (for attribution in the cover letter):\n{roles}\n\n{GUIDANCE}"
+            f"\n\nTONE_GUIDE (examples):\n{tone_examples}\n\n{OUTPUT_FORMAT}"
+        )},
+    ]
+
+
+@lru_cache(maxsize=32)
+def _system_message(tone_guide: str, catalogue: str, model: str) -> Tuple[str, int]:
+    text = f"{SYSTEM_PROMPT}\n{GUIDANCE}\n{OUTPUT_FORMAT}\n\nTONE_GUIDE:\n{tone_guide}"
+    if catalogue:
+        text += f"\n\n{CATALOGUE_RULE}\n\nCANDIDATE_BULLETS:\n{catalogue}"
+    return text, count_tokens(text, model)
+
+
+class PromptBuilder:
+    """Builds compose_package messages under a JD token budget and reports what it saved.
+
+    `build` returns {"messages", "prompt_tokens", "prefix_tokens", "baseline_tokens",
+    "tokens_saved", "jd_tokens", "jd_kept_tokens", "with_catalogue"}; `prefix_tokens`
+    is the size of the system message shared across JDs. The counts are also
+    recorded on a `prompt.build` span. `report_savings=False` skips counting the
+    old layout; `use_catalogue=False` (the default) ignores any catalogue passed.
+    """
+
+    def __init__(self, model: str = "gpt-4o-mini", jd_budget: int = DEFAULT_JD_BUDGET,
+                 catalogue_budget: int = DEFAULT_CATALOGUE_BUDGET, report_savings: bool = True,
+                 use_catalogue: bool = False):
+        self.model = model
+        self.jd_budget = jd_budget
+        self.catalogue_budget = catalogue_budget
+        self.report_savings = report_savings
+        self.use_catalogue = use_catalogue
+
+    def system_message(self, tone_examples: Any, catalogue: Optional[List[Dict[str, Any]]] = None,
+                       model: Optional[str] = None) -> Tuple[str, int, bool]:
+        """(system message, its tokens, whether it holds the catalogue); catalogues over
+        `catalogue_budget` tokens are left out."""
+        model = model or self.model
+        tone = compact_tone_guide(tone_examples)
+        bare, bare_tokens = _system_message(tone, "", model)
+        if catalogue:
+            text, tokens = _system_message(tone, format_bullets(catalogue), model)
+            if tokens - bare_tokens <= self.catalogue_budget:
+                return text, tokens, True
+        return bare, bare_tokens, False
+
+    def build(self, job_description: str, allowed_bullets: List[Dict[str, Any]], tone_examples: Any,
+              model: Optional[str] = None, catalogue: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Messages for one JD. With `use_catalogue`, the candidate's whole bullet catalogue (same dict
+        shape as the allowed bullets) goes in the shared prefix when that is cheaper with caching."""
+        model = model or self.model
+        with span("prompt.build", bullets=len(allowed_bullets)) as s:
+            vocab = set(get_analyzer().terms(" ".join(b["text"] for b in allowed_bullets)))
+            jd, jd_tokens, jd_kept = trim_jd(job_description or "", self.jd_budget, vocab, model)
+            jd_block = f"JOB_DESCRIPTION{' (trimmed to the most relevant sections)' if jd_kept < jd_tokens else ''}:\n{jd}"
+            system, prefix_tokens, _ = self.system_message(tone_examples, None, model)
+            user = ("ALLOWED_BULLETS: (use verbatim text; refer by id in output; grouped by source role for "
+                    f"attribution)\n{format_bullets(allowed_bullets)}\n\n{jd_block}")
+            prompt_tokens = 3 + 4 + prefix_tokens + 4 + count_tokens(user, model)
+            with_catalogue = False
+            if self.use_catalogue and catalogue:
+                cat_system, cat_prefix, fits = self.system_message(tone_examples, catalogue, model)
+                listed = {b["id"] for b in catalogue}
+                extra = [b for b in allowed_bullets if b["id"] not in listed]
+                cat_user = (f"{jd_block}\n\nALLOWED_BULLETS: (ids from CANDIDATE_BULLETS; use their text verbatim "
+                            f"and refer by id in output)\n"
+                            f"{', '.join(b['id'] for b in allowed_bullets if b['id'] in listed)}")
+                if extra:
+                    cat_user += f"\n{format_bullets(extra)}"
+                cat_tokens = 3 + 4 + cat_prefix + 4 + count_tokens(cat_user, model)
+                cached = cat_prefix if cat_prefix >= CACHE_MIN_TOKENS else 0
+                if fits and cat_tokens - cached * (1 - CACHED_TOKEN_RATE) < prompt_tokens:
+                    system, prefix_tokens, user, prompt_tokens = cat_system, cat_prefix, cat_user, cat_tokens
+                    with_catalogue = True
+            messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+            baseline = (count_message_tokens(legacy_messages(job_description, allowed_bullets, tone_examples), model)
+                        if self.report_savings else prompt_tokens)
+            out = {"messages": messages, "prompt_tokens": prompt_tokens, "prefix_tokens": prefix_tokens,
+                   "baseline_tokens": baseline, "tokens_saved": baseline - prompt_tokens, "jd_tokens": jd_tokens,
+                   "jd_kept_tokens": jd_kept, "with_catalogue": with_catalogue}
+            s.update({k: v for k, v in out.items() if k != "messages"})
+        return out
+
+
+_default: Optional[PromptBuilder] = None
+
+
+def get_prompt_builder() -> PromptBuilder:
+    """Process-wide builder; PROMPT_JD_TOKENS sets the JD budget (default 1200), PROMPT_CATALOGUE=1 allows a
+    bullet catalogue in the shared prefix and PROMPT_CATALOGUE_TOKENS caps its size (default 6000)."""
+    global _default
+    if _default is None:
+        _default = PromptBuilder(
+            model=os.getenv("OPENAI_LLM_MODEL", "gpt-4o-mini"),
+            jd_budget=int(os.getenv("PROMPT_JD_TOKENS", str(DEFAULT_JD_BUDGET))),
+            catalogue_budget=int(os.getenv("PROMPT_CATALOGUE_TOKENS", str(DEFAULT_CATALOGUE_BUDGET))),
+            use_catalogue=os.getenv("PROMPT_CATALOGUE", "0") == "1",
+        )
+    return _default
@@ -1,14 +1,139 @@
 from __future__ import annotations
-from typing import List, Tuple
-from sentence_transformers import CrossEncoder
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 from .retrieval import Bullet
+from .models import load_cross_encoder
+from utils.tracing import span
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
 
 class Reranker:
-    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"):
-        self.model = CrossEncoder(model_name)
-
-    def rerank(self, query: str, candidates: List[Bullet], top_k: int = 12) -> List[Bullet]:
-        pairs = [(query, c.text) for c in candidates]
-        scores = self.model.predict(pairs)
-        ranked = sorted(zip(candidates, scores), key=lambda x: -x[1])
-        return [c for c, _ in ranked[:top_k]]
+    """Cross-encoder reranker with a bounded pair-score cache and an optional cascade.
+
+    Scores are cached per (model, JD hash, bullet id, bullet text hash), so reruns
+    over the same JD skip the model. With `cascade_n` set and hybrid scores passed
+    to `rerank`, only the top n candidates go to the cross-encoder when the hybrid
+    gap between #n and #n+1 is at least `cascade_margin`; the rest keep their
+    hybrid order after them. n is `cascade_n`, but at least `top_k + cascade_slack`,
+    so the cross-encoder always has candidates beyond `top_k` to promote; with a
+    pool no larger than that the cascade never triggers. `stats` counts what was
+    avoided.
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", model: Optional[Any] = None,
+                 cache_size: int = 4096, cascade_n: Optional[int] = None, cascade_margin: float = 0.1,
+                 cascade_slack: int = 8):
+        self.model_name = model_name
+        self._model = model
+        self._model_lock = threading.Lock()
+        self.cache_size = cache_size
+        self.cascade_n = cascade_n
+        self.cascade_margin = cascade_margin
+        self.cascade_slack = cascade_slack
+        self._cache: "OrderedDict[Tuple[str, str, str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"pairs": 0, "cache_hits": 0, "model_pairs": 0, "model_calls": 0, "cascade_skipped": 0}
+
+    @property
+    def model(self) -> Any:
+        """The cross-encoder, loaded on first use."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = load_cross_encoder(self.model_name)
+        return self._model
+
+    def warmup(self):
+        self.model.predict([("warmup", "warmup")])
+
+    def _score_many(self, queries: List[str], candidate_lists: List[List[Bullet]]) -> List[np.ndarray]:
+        """Scores per query, predicting only uncached pairs and in a single model call."""
+        keys, missing = [], []
+        known: Dict[Tuple[str, str, str, str], float] = {}
+        with self._lock:
+            for qi, (q, cands) in enumerate(zip(queries, candidate_lists)):
+                q_hash = _hash(q)
+                row = []
+                for ci, c in enumerate(cands):
+                    key = (self.model_name, q_hash, c.id, _hash(c.text))
+                    row.append(key)
+                    if key in self._cache:
+                        self._cache.move_to_end(key)
+                        known[key] = self._cache[key]
+                    else:
+                        missing.append((qi, ci, key))
+                keys.append(row)
+            n_pairs = sum(len(r) for r in keys)
+            self.stats["pairs"] += n_pairs
+            self.stats["cache_hits"] += n_pairs - len(missing)
+
+        if missing:
+            # Duplicate (query, bullet) pairs within one call are predicted once
+            unique = list(dict.fromkeys(key for _, _, key in missing))
+            first = {}
+            for qi, ci, key in missing:
+                first.setdefault(key, (qi, ci))
+            pairs = [(queries[first[k][0]], candidate_lists[first[k][0]][first[k][1]].text) for k in unique]
+            with span("rerank.predict", pairs=len(pairs)):
+                scores = self.model.predict(pairs)
+            fresh = {k: float(s) for k, s in zip(unique, scores)}
+            known.update(fresh)
+            with self._lock:
+                self.stats["model_calls"] += 1
+                self.stats["model_pairs"] += len(pairs)
+                for k, s in fresh.items():
+                    self._cache[k] = s
+                    self._cache.move_to_end(k)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return [np.array([known[k] for k in row], dtype=np.float32) for row in keys]
+
+    def _cascade(self, candidates: List[Bullet], scores: Optional[Sequence[float]],
+                 top_k: int) -> Tuple[List[Bullet], List[Bullet]]:
+        """Split candidates into (sent to the cross-encoder, kept in hybrid order)."""
+        if not self.cascade_n or scores is None:
+            return candidates, []
+        n = max(self.cascade_n, top_k + self.cascade_slack)
+        if len(candidates) <= n:
+            return candidates, []
+        order = sorted(range(len(candidates)), key=lambda i: -scores[i])
+        gap = scores[order[n - 1]] - scores[order[n]]
+        if gap < self.cascade_margin:
+            return candidates, []
+        with self._lock:
+            self.stats["cascade_skipped"] += len(candidates) - n
+        return [candidates[i] for i in order[:n]], [candidates[i] for i in order[n:]]
+
+    def rerank(self, query: str, candidates: List[Bullet], top_k: int = 12,
+               scores: Optional[Sequence[float]] = None) -> List[Bullet]:
+        """Rerank candidates; `scores` are their hybrid retrieval scores (enables the cascade)."""
+        return self.rerank_many([query], [candidates], top_k=top_k,
+                                scores=None if scores is None else [scores])[0]
+
+    def rerank_many(self, queries: List[str], candidate_lists: List[List[Bullet]],
+                    top_k: int = 12, scores: Optional[List[Sequence[float]]] = None) -> List[List[Bullet]]:
+        """Rerank candidates for several queries with a single batched `predict` call."""
+        with span("rerank", queries=len(queries), candidates=sum(map(len, candidate_lists))):
+            heads, tails = [], []
+            for i, cands in enumerate(candidate_lists):
+                head, tail = self._cascade(cands, None if scores is None else scores[i], top_k)
+                heads.append(head)
+                tails.append(tail)
+            ce_scores = self._score_many(queries, heads)
+            out: List[List[Bullet]] = []
+            for head, tail, s in zip(heads, tails, ce_scores):
+                ranked = sorted(zip(head, s), key=lambda x: -x[1])
+                out.append(([c for c, _ in ranked] + tail)[:top_k])
+            return out
+
+    def avoided_model_pairs(self) -> int:
+        """Pairs that did not reach the cross-encoder (cache hits, in-batch duplicates, cascade skips)."""
+        return self.stats["pairs"] + self.stats["cascade_skipped"] - self.stats["model_pairs"]
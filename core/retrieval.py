@@ -1,39 +1,140 @@
 # core/retrieval.py
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, Tuple, Dict, Any
+import hashlib
+import json
+import math
+import sys
+import threading
+from collections import Counter
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Iterator, List, Sequence, Tuple, Dict, Any, Optional
 
 import numpy as np
-from rank_bm25 import BM25Okapi
-from sentence_transformers import SentenceTransformer
-from utils.text import extract_keywords, normalize_text
+from utils.analyzer import Analyzer, get_analyzer
+from utils.text import normalize_text
+from utils.tracing import span
+from .embed_cache import EmbeddingCache
+from .index_artifact import (
+    ITEM_FIELDS, LIST_FIELDS, StringTable, csr, decode_strings, read_artifact, read_header, write_artifact,
+)
+from .models import load_embedder
+from .vector_index import make_vector_index, top_k_indices
+
+ITEM_KEYS = ("section_id", "section_title", "item_id", "employer", "role", "location", "dates")
+BULLET_KEYS = ("skills", "domains", "primary")
+
+
+class BulletMeta(Mapping):
+    """Read-only flat view of a bullet's metadata: its own fields over its item's shared dict."""
+
+    __slots__ = ("_b",)
+
+    def __init__(self, bullet: "Bullet"):
+        self._b = bullet
+
+    def __getitem__(self, key: str) -> Any:
+        if key in BULLET_KEYS:
+            return getattr(self._b, key)
+        return self._b.item[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in BULLET_KEYS:
+            return getattr(self._b, key)
+        return self._b.item.get(key, default)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._b.item
+        yield from BULLET_KEYS
+
+    def __len__(self) -> int:
+        return len(self._b.item) + len(BULLET_KEYS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
 
-@dataclass
 class Bullet:
-    id: str
-    text: str
-    meta: Dict[str, Any]
+    """One resume bullet.
 
+    Item-level metadata (section, employer, role, location, dates) lives in `item`,
+    a dict shared by every bullet of the same item; per-bullet fields are slots and
+    skills/domains are tuples of interned strings. `meta` gives the flat dict-like
+    view the rest of the app reads from.
+    """
 
-class HybridRetriever:
-    def __init__(self, embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        self.embed = SentenceTransformer(embedding_model)
-        self._bm25 = None
-        self._corpus_tokens = None
-        self._embeddings = None
-        self._bullets: List[Bullet] = []
-        self._item_to_idx: Dict[str, List[int]] = {}
+    __slots__ = ("id", "text", "item", "skills", "domains", "primary")
 
-    def index_from_master(self, master: Dict[str, Any]):
-        bullets: List[Bullet] = []
-        self._item_to_idx = {}
-        for section in master.get("sections", []):
-            for item in section.get("items", []):
-                for b in item.get("bullets", []):
-                    txt = normalize_text(b.get("text", ""))
-                    if not txt:
-                        continue
-                    meta = {
+    def __init__(self, id: str, text: str, item: Dict[str, Any], skills: Tuple[str, ...] = (),
+                 domains: Tuple[str, ...] = (), primary: bool = False):
+        self.id = id
+        self.text = text
+        self.item = item
+        self.skills = skills
+        self.domains = domains
+        self.primary = primary
+
+    @property
+    def meta(self) -> BulletMeta:
+        return BulletMeta(self)
+
+    def _key(self) -> Tuple:
+        return self.id, self.text, self.skills, self.domains, self.primary, self.item
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Bullet):
+            return NotImplemented
+        return self._key() == other._key()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Bullet(id={self.id!r}, text={self.text!r}, meta={self.meta!r})"
+
+
+def _interned(values: Any) -> Tuple:
+    return tuple(sys.intern(v) if isinstance(v, str) else v for v in values or ())
+
+
+def _deep_sizeof(obj: Any) -> int:
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_sizeof(x) for x in obj)
+    return size
+
+
+def bullets_nbytes(bullets: List[Bullet]) -> int:
+    """Approximate bytes held by bullets, counting shared item dicts and interned strings once."""
+    seen = set()
+    total = 0
+    for b in bullets:
+        total += sys.getsizeof(b) + sys.getsizeof(b.text) + sys.getsizeof(b.skills) + sys.getsizeof(b.domains)
+        for obj in (b.item, *b.skills, *b.domains):
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += _deep_sizeof(obj)
+    return total
+
+
+def _fingerprint(master: Dict[str, Any]) -> str:
+    blob = json.dumps(master.get("sections", []), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def bullets_from_master(master: Dict[str, Any]) -> List[Bullet]:
+    """Flatten master resume JSON into Bullets, in document order."""
+    bullets: List[Bullet] = []
+    for section in master.get("sections", []):
+        for item in section.get("items", []):
+            shared = None
+            for b in item.get("bullets", []):
+                txt = normalize_text(b.get("text", ""))
+                if not txt:
+                    continue
+                if shared is None:
+                    shared = {
                         "section_id": section.get("id"),
                         "section_title": section.get("title"),
                         "item_id": item.get("id"),
@@ -41,47 +142,600 @@ class HybridRetriever:
                         "role": item.get("role"),
                         "location": item.get("location"),
                         "dates": item.get("dates", {}),
-                        "skills": b.get("skills", []),
-                        "domains": b.get("domains", []),
-                        "primary": bool(b.get("primary", False)),
                     }
-                    bullets.append(Bullet(id=b.get("id"), text=txt, meta=meta))
-                    idx = len(bullets) - 1
-                    self._item_to_idx.setdefault(item.get("id") or "", []).append(idx)
+                bullets.append(Bullet(id=b.get("id"), text=txt, item=shared, skills=_interned(b.get("skills")),
+                                      domains=_interned(b.get("domains")), primary=bool(b.get("primary", False))))
+    return bullets
+
+
+class InvertedBM25:
+    """Okapi BM25 (same formula and idf flooring as rank_bm25.BM25Okapi) over an inverted index.
+
+    Each term keeps array-backed postings (doc ids, term frequencies), so scoring
+    concatenates the postings of the query terms and accumulates them with one
+    `np.bincount` — only documents that contain a query term are touched.
+    Documents can be added, replaced and swap-removed in place; call `refresh()`
+    afterwards to recompute the corpus statistics (idf, avgdl).
+    """
+
+    def __init__(self, corpus: List[List[str]], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.doc_len: List[int] = []
+        self.idf: Dict[str, float] = {}
+        self.average_idf = 0.0
+        self.avgdl = 0.0
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._pending: Dict[str, Tuple[List[int], List[int]]] = {}
+        for tokens in corpus:
+            self.add(tokens)
+        self.refresh()
+
+    @property
+    def corpus_size(self) -> int:
+        return len(self.doc_len)
+
+    def add(self, tokens: List[str]):
+        doc = len(self.doc_len)
+        self.doc_len.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            docs, tfs = self._pending.setdefault(term, ([], []))
+            docs.append(doc)
+            tfs.append(tf)
+
+    def _merge_pending(self):
+        for term, (docs, tfs) in self._pending.items():
+            new_docs = np.asarray(docs, dtype=np.int64)
+            new_tfs = np.asarray(tfs, dtype=np.float64)
+            if term in self._postings:
+                old_docs, old_tfs = self._postings[term]
+                new_docs = np.concatenate([old_docs, new_docs])
+                new_tfs = np.concatenate([old_tfs, new_tfs])
+            self._postings[term] = (new_docs, new_tfs)
+        self._pending = {}
+
+    def _drop(self, i: int, tokens: List[str]):
+        for term in set(tokens):
+            docs, tfs = self._postings[term]
+            keep = docs != i
+            if keep.any():
+                self._postings[term] = (docs[keep], tfs[keep])
+            else:
+                del self._postings[term]
+
+    def replace(self, i: int, old_tokens: List[str], new_tokens: List[str]):
+        self._merge_pending()
+        self._drop(i, old_tokens)
+        self.doc_len[i] = len(new_tokens)
+        for term, tf in Counter(new_tokens).items():
+            self._pending.setdefault(term, ([], []))
+            self._pending[term][0].append(i)
+            self._pending[term][1].append(tf)
+        self._merge_pending()
+
+    def swap_remove(self, i: int, tokens: List[str], last_tokens: List[str]):
+        """Remove doc i and relabel the last doc as i (mirrors the retriever's row moves)."""
+        self._merge_pending()
+        self._drop(i, tokens)
+        last = len(self.doc_len) - 1
+        if i != last:
+            for term in set(last_tokens):
+                docs, tfs = self._postings[term]
+                self._postings[term] = (np.where(docs == last, i, docs), tfs)
+            self.doc_len[i] = self.doc_len[last]
+        self.doc_len.pop()
+
+    def refresh(self):
+        self._merge_pending()
+        n = len(self.doc_len)
+        self._dl = np.asarray(self.doc_len, dtype=np.float64)
+        self.avgdl = float(self._dl.sum()) / n if n else 0.0
+        # idf exactly as BM25Okapi._calc_idf: negative idfs are floored to epsilon * mean idf
+        self.idf = {}
+        idf_sum = 0.0
+        negative = []
+        for term, (docs, _) in self._postings.items():
+            freq = len(docs)
+            idf = math.log(n - freq + 0.5) - math.log(freq + 0.5)
+            self.idf[term] = idf
+            idf_sum += idf
+            if idf < 0:
+                negative.append(term)
+        self.average_idf = idf_sum / len(self.idf) if self.idf else 0.0
+        eps = self.epsilon * self.average_idf
+        for term in negative:
+            self.idf[term] = eps
+
+    def to_arrays(self, strings: StringTable) -> Dict[str, np.ndarray]:
+        """Postings as CSR arrays over term string ids (for the index artifact)."""
+        self._merge_pending()
+        terms = list(self._postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(self._postings[t][0]) for t in terms])
+        cat = lambda xs: np.concatenate(xs) if xs else np.zeros(0)
+        return {
+            "bm25_terms": np.asarray([strings.add(t) for t in terms], dtype=np.int32),
+            "bm25_offsets": offsets,
+            "bm25_docs": cat([self._postings[t][0] for t in terms]).astype(np.int32),
+            "bm25_tf": cat([self._postings[t][1] for t in terms]).astype(np.int32),
+            "bm25_idf": np.asarray([self.idf[t] for t in terms], dtype=np.float64),
+            "bm25_doc_len": np.asarray(self.doc_len, dtype=np.int32),
+        }
+
+    @classmethod
+    def from_arrays(cls, terms: List[str], arrays: Dict[str, np.ndarray], k1: float = 1.5, b: float = 0.75,
+                    epsilon: float = 0.25, average_idf: float = 0.0) -> "InvertedBM25":
+        """Rebuild from `to_arrays` output; postings stay views into the (mmapped) arrays."""
+        bm25 = cls([], k1=k1, b=b, epsilon=epsilon)
+        o = arrays["bm25_offsets"].tolist()
+        docs, tfs = arrays["bm25_docs"], arrays["bm25_tf"]
+        bm25._postings = {t: (docs[o[i]:o[i + 1]], tfs[o[i]:o[i + 1]]) for i, t in enumerate(terms)}
+        bm25.idf = dict(zip(terms, arrays["bm25_idf"].tolist()))
+        bm25.average_idf = average_idf
+        bm25.doc_len = arrays["bm25_doc_len"].tolist()
+        bm25._dl = np.asarray(bm25.doc_len, dtype=np.float64)
+        bm25.avgdl = float(bm25._dl.sum()) / len(bm25.doc_len) if bm25.doc_len else 0.0
+        return bm25
+
+    def nbytes(self) -> int:
+        """Approximate memory held by postings, doc lengths and the idf table."""
+        total = sum(d.nbytes + t.nbytes for d, t in self._postings.values())
+        total += sum(sys.getsizeof(term) for term in self._postings) * 2  # postings + idf keys
+        total += self._dl.nbytes + 8 * len(self.doc_len) + 24 * len(self.idf)
+        return total
+
+    def get_scores(self, query: List[str], weights: Optional[Sequence[float]] = None) -> np.ndarray:
+        """BM25 per document; `weights` optionally scales each query term's contribution."""
+        n = len(self.doc_len)
+        doc_parts, weight_parts = [], []
+        for j, q in enumerate(query):
+            posting = self._postings.get(q)
+            if posting is None:
+                continue
+            docs, tf = posting
+            dl = self._dl[docs]
+            doc_parts.append(docs)
+            w = self.idf[q] * (tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * dl / self.avgdl)))
+            weight_parts.append(w if weights is None else w * weights[j])
+        if not doc_parts:
+            return np.zeros(n)
+        return np.bincount(np.concatenate(doc_parts), weights=np.concatenate(weight_parts), minlength=n)
+
 
+class HybridRetriever:
+    def __init__(self, embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 cache_dir: Optional[Path] = None, vector_index: str = "bruteforce",
+                 candidate_pool: int = 256, embedder: Optional[Any] = None, analyzer: Optional[Analyzer] = None,
+                 embed_cache: Optional[EmbeddingCache] = None, **index_kwargs):
+        self.embedding_model = embedding_model
+        # Same analyzer for bullets and JDs so BM25 terms line up
+        self.analyzer = analyzer or get_analyzer()
+        # Pass `embedder` to share one loaded model between several retrievers; otherwise it
+        # loads on first use, so a warm embedding cache can index without touching torch
+        self._embed = embedder
+        self._embed_lock = threading.Lock()
+        # Optional on-disk embedding store so restarts only encode new/edited bullets; pass
+        # `embed_cache` to share one store (and its lock) between retrievers on the same directory
+        if embed_cache is not None:
+            self.cache: Optional[EmbeddingCache] = embed_cache
+        else:
+            self.cache = EmbeddingCache(cache_dir, embedding_model) if cache_dir else None
+        self._bm25 = None
+        self._corpus_tokens = None
+        self._embeddings = None
+        # Dense search backend ("bruteforce" exact, or "ivf" approximate for large corpora)
+        self._vindex = make_vector_index(vector_index, **index_kwargs)
+        self.candidate_pool = candidate_pool
+        self._bullets: List[Bullet] = []
+        self._item_to_idx: Dict[str, List[int]] = {}
+        self._id_to_idx: Dict[str, int] = {}
+        self._master_fingerprint: Optional[str] = None
+        # Bumped on every index change so callers can key caches on (query, version)
+        self.version = 0
+        self._lock = threading.RLock()
+
+    @property
+    def embed(self) -> Any:
+        if self._embed is None:
+            with self._embed_lock:
+                if self._embed is None:
+                    self._embed = load_embedder(self.embedding_model)
+        return self._embed
+
+    def warmup(self):
+        """Load the embedding model and run one encode (first calls pay one-off setup costs)."""
+        self.embed.encode(["warmup"], normalize_embeddings=True)
+
+    def index_from_master(self, master: Dict[str, Any]):
+        bullets = bullets_from_master(master)
         self._bullets = bullets
+        self._rebuild_positions()
         # BM25
-        tokenized_corpus = [normalize_text(b.text).lower().split() for b in bullets]
-        self._bm25 = BM25Okapi(tokenized_corpus)
+        tokenized_corpus = [self.analyzer.terms(b.text) for b in bullets]
+        self._bm25 = InvertedBM25(tokenized_corpus)
         self._corpus_tokens = tokenized_corpus
         # Embeddings
-        self._embeddings = self.embed.encode([b.text for b in bullets], normalize_embeddings=True)
+        self._embeddings = self._encode_texts([b.text for b in bullets])
+        self._vindex.build(self._embeddings)
+        self._master_fingerprint = _fingerprint(master)
+        self.version += 1
+
+    # ------------------------
+    # Index artifact
+    # ------------------------
+    def save_index(self, path: Path):
+        """Compile the current index into one versioned file (see core.index_artifact)."""
+        with self._lock:
+            strings = StringTable()
+            item_rows: Dict[Tuple, int] = {}
+            item_cols: Dict[str, List[int]] = {f: [] for f in ITEM_FIELDS + ("dates",)}
+            bullet_item, bullet_id, bullet_text, primary = [], [], [], []
+            lists: Dict[str, List[List[int]]] = {f: [] for f in LIST_FIELDS}
+            # Metadata values are stored as JSON so numbers and bools keep their type
+            enc = lambda v: None if v is None else json.dumps(v, sort_keys=True)
+            for b in self._bullets:
+                key = tuple(enc(b.item.get(f)) for f in ITEM_FIELDS) + (enc(b.item.get("dates", {})),)
+                row = item_rows.get(key)
+                if row is None:
+                    row = item_rows[key] = len(item_rows)
+                    for f, v in zip(item_cols, key):
+                        item_cols[f].append(strings.add(v))
+                bullet_item.append(row)
+                bullet_id.append(strings.add(b.id))
+                bullet_text.append(strings.add(b.text))
+                primary.append(b.primary)
+                for f in LIST_FIELDS:
+                    lists[f].append([strings.add(enc(x)) for x in getattr(b, f)])
+
+            arrays = {f"item_{f}": np.asarray(v, dtype=np.int32) for f, v in item_cols.items()}
+            arrays.update({
+                "bullet_item": np.asarray(bullet_item, dtype=np.int32),
+                "bullet_id": np.asarray(bullet_id, dtype=np.int32),
+                "bullet_text": np.asarray(bullet_text, dtype=np.int32),
+                "bullet_primary": np.asarray(primary, dtype=np.uint8),
+            })
+            for f, rows in lists.items():
+                arrays[f"bullet_{f}_offsets"], arrays[f"bullet_{f}"] = csr(rows)
+            item_ids = list(self._item_to_idx)
+            arrays["item_index_keys"] = np.asarray([strings.add(k) for k in item_ids], dtype=np.int32)
+            arrays["item_index_offsets"], arrays["item_index_rows"] = csr([self._item_to_idx[k] for k in item_ids])
+            arrays.update(self._bm25.to_arrays(strings))
+            arrays["embeddings"] = np.asarray(self._embeddings, dtype=np.float16)
+            arrays.update(strings.arrays())
+            header = {
+                "model": self.embedding_model,
+                "content_hash": self._master_fingerprint,
+                "analyzer": self.analyzer.signature,
+                "bullets": len(self._bullets),
+                "bm25": {"k1": self._bm25.k1, "b": self._bm25.b, "epsilon": self._bm25.epsilon,
+                         "average_idf": self._bm25.average_idf},
+            }
+            write_artifact(path, header, arrays)
+
+    def open_index(self, path: Path, master: Optional[Dict[str, Any]] = None) -> bool:
+        """Load an artifact written by `save_index`. Returns False (index untouched) when the file is
+        missing, another format version, built with a different model or analyzer, or stale for `master`."""
+        header = read_header(path)
+        if header is None or header.get("model") != self.embedding_model:
+            return False
+        if header.get("analyzer") != self.analyzer.signature:
+            return False
+        if master is not None and header.get("content_hash") != _fingerprint(master):
+            return False
+        header, a = read_artifact(path)
+        strings = decode_strings(a["str_blob"], a["str_offsets"])
+        s = lambda i: None if i < 0 else strings[i]
+        j = lambda i: None if i < 0 else json.loads(strings[i])
+        cols = {f: a[f"item_{f}"].tolist() for f in ITEM_FIELDS + ("dates",)}
+        items = [{f: j(cols[f][r]) for f in ITEM_FIELDS + ("dates",)} for r in range(len(cols["dates"]))]
+        lists = {f: (a[f"bullet_{f}_offsets"].tolist(), a[f"bullet_{f}"].tolist()) for f in LIST_FIELDS}
+        bullets = []
+        for i, (row, bid, text, prim) in enumerate(zip(a["bullet_item"].tolist(), a["bullet_id"].tolist(),
+                                                       a["bullet_text"].tolist(), a["bullet_primary"].tolist())):
+            skills, domains = (tuple(j(v) for v in vals[o[i]:o[i + 1]]) for o, vals in lists.values())
+            bullets.append(Bullet(id=s(bid), text=s(text), item=items[row], skills=skills,
+                                  domains=domains, primary=bool(prim)))
+
+        o = a["item_index_offsets"].tolist()
+        rows = a["item_index_rows"].tolist()
+        item_to_idx = {s(k): rows[o[j]:o[j + 1]] for j, k in enumerate(a["item_index_keys"].tolist())}
+        params = header["bm25"]
+        bm25 = InvertedBM25.from_arrays([strings[t] for t in a["bm25_terms"].tolist()], a, k1=params["k1"],
+                                        b=params["b"], epsilon=params["epsilon"], average_idf=params["average_idf"])
+        # Stored as float16 on disk; widened into RAM here (a full copy) so searches run on float32 BLAS
+        embeddings = a["embeddings"].astype(np.float32)
+        with self._lock:
+            self._bullets = bullets
+            self._id_to_idx = {b.id: i for i, b in enumerate(bullets)}
+            self._item_to_idx = item_to_idx
+            self._bm25 = bm25
+            self._corpus_tokens = None
+            self._embeddings = embeddings
+            self._vindex.build(embeddings)
+            self._master_fingerprint = header["content_hash"]
+            self.version += 1
+        return True
+
+    def open_or_build_index(self, path: Path, master: Dict[str, Any]) -> bool:
+        """Open the artifact if it is current for `master` and this model, else rebuild and rewrite it.
+        Returns True when the artifact was used as-is."""
+        if self.open_index(path, master):
+            return True
+        self.index_from_master(master)
+        self.save_index(path)
+        return False
+
+    def _rebuild_positions(self):
+        self._id_to_idx = {b.id: i for i, b in enumerate(self._bullets)}
+        self._item_to_idx = {}
+        for i, b in enumerate(self._bullets):
+            self._item_to_idx.setdefault(b.item.get("item_id") or "", []).append(i)
+
+    # ------------------------
+    # Incremental updates
+    # ------------------------
+    def sync_master(self, master: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Patch the index to match `master`, touching only bullets that changed.
+
+        Returns the applied diff as {"added": [...], "updated": [...], "removed": [...]} ids.
+        """
+        if self._bm25 is None or not self._bullets:
+            self.index_from_master(master)
+            return {"added": [b.id for b in self._bullets], "updated": [], "removed": []}
+        fingerprint = _fingerprint(master)
+        if fingerprint == self._master_fingerprint:
+            return {"added": [], "updated": [], "removed": []}
+
+        new_bullets = bullets_from_master(master)
+        new_ids = {b.id for b in new_bullets}
+        removed = [b.id for b in self._bullets if b.id not in new_ids]
+        added, updated = [], []
+        for b in new_bullets:
+            i = self._id_to_idx.get(b.id)
+            if i is None:
+                added.append(b)
+            elif self._bullets[i] != b:
+                updated.append(b)
+
+        with self._lock:
+            self.remove_bullets(removed)
+            self.update_bullets(updated)
+            self.add_bullets(added)
+            self._master_fingerprint = fingerprint
+        return {"added": [b.id for b in added], "updated": [b.id for b in updated], "removed": removed}
+
+    def add_bullets(self, bullets: List[Bullet]):
+        """Append new bullets; only their texts are encoded."""
+        bullets = [b for b in bullets if b.id not in self._id_to_idx]
+        if not bullets:
+            return
+        with self._lock:
+            self._ensure_tokens()
+            vecs = self._encode_texts([b.text for b in bullets])
+            for b in bullets:
+                idx = len(self._bullets)
+                self._bullets.append(b)
+                self._id_to_idx[b.id] = idx
+                self._item_to_idx.setdefault(b.item.get("item_id") or "", []).append(idx)
+                self._bm25_add(self.analyzer.terms(b.text))
+            self._embeddings = np.concatenate([np.asarray(self._embeddings), np.asarray(vecs)])
+            self._vindex.refresh(self._embeddings)
+            self._bm25_refresh()
+            self.version += 1
+
+    def update_bullets(self, bullets: List[Bullet]):
+        """Replace bullets in place by id; re-encode only those whose text changed."""
+        bullets = [b for b in bullets if b.id in self._id_to_idx]
+        if not bullets:
+            return
+        with self._lock:
+            self._ensure_tokens()
+            changed_text = [b for b in bullets if self._bullets[self._id_to_idx[b.id]].text != b.text]
+            if changed_text:
+                vecs = self._encode_texts([b.text for b in changed_text])
+                self._ensure_writable_embeddings()
+                for b, v in zip(changed_text, vecs):
+                    i = self._id_to_idx[b.id]
+                    self._embeddings[i] = v
+                    self._bm25_replace(i, self.analyzer.terms(b.text))
+            regroup = False
+            for b in bullets:
+                i = self._id_to_idx[b.id]
+                regroup |= self._bullets[i].item.get("item_id") != b.item.get("item_id")
+                self._bullets[i] = b
+            if regroup:
+                self._rebuild_positions()
+            if changed_text:
+                self._vindex.refresh(self._embeddings)
+                self._bm25_refresh()
+            self.version += 1
+
+    def remove_bullets(self, ids: List[str]):
+        """Drop bullets by id, moving the last row into each freed slot."""
+        ids = [i for i in ids if i in self._id_to_idx]
+        if not ids:
+            return
+        with self._lock:
+            self._ensure_tokens()
+            self._ensure_writable_embeddings()
+            for bid in ids:
+                i = self._id_to_idx.pop(bid)
+                last = len(self._bullets) - 1
+                self._item_to_idx[self._bullets[i].item.get("item_id") or ""].remove(i)
+                self._bm25_swap_remove(i)
+                if i != last:
+                    moved = self._bullets[last]
+                    self._bullets[i] = moved
+                    self._embeddings[i] = self._embeddings[last]
+                    self._id_to_idx[moved.id] = i
+                    positions = self._item_to_idx[moved.item.get("item_id") or ""]
+                    positions[positions.index(last)] = i
+                self._bullets.pop()
+            self._item_to_idx = {k: v for k, v in self._item_to_idx.items() if v}
+            self._embeddings = self._embeddings[: len(self._bullets)]
+            self._vindex.refresh(self._embeddings)
+            self._bm25_refresh()
+            self.version += 1
+
+    def _ensure_tokens(self):
+        # Indexes opened from an artifact tokenize on the first incremental edit, not at load
+        if self._corpus_tokens is None:
+            self._corpus_tokens = [self.analyzer.terms(b.text) for b in self._bullets]
+
+    def _ensure_writable_embeddings(self):
+        # Cached embeddings arrive as a read-only mmap view; copy before patching rows.
+        if not self._embeddings.flags.writeable:
+            self._embeddings = np.array(self._embeddings)
 
-    def search(self, jd_text: str, top_k: int = 30) -> List[Tuple[Bullet, float]]:
+    # Keep the token lists alongside the BM25 postings so patches know which terms to touch.
+    def _bm25_add(self, tokens: List[str]):
+        self._bm25.add(tokens)
+        self._corpus_tokens.append(tokens)
+
+    def _bm25_replace(self, i: int, tokens: List[str]):
+        self._bm25.replace(i, self._corpus_tokens[i], tokens)
+        self._corpus_tokens[i] = tokens
+
+    def _bm25_swap_remove(self, i: int):
+        self._bm25.swap_remove(i, self._corpus_tokens[i], self._corpus_tokens[-1])
+        self._corpus_tokens[i] = self._corpus_tokens[-1]
+        self._corpus_tokens.pop()
+
+    def _bm25_refresh(self):
+        self._bm25.refresh()
+
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        def encode(xs: List[str]) -> np.ndarray:
+            return self.embed.encode(xs, normalize_embeddings=True)
+
+        with span("retrieval.encode", texts=len(texts)):
+            if self.cache is None:
+                return encode(texts)
+            return self.cache.get_or_encode(texts, encode)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate bytes held by this index, per component plus "total"."""
+        usage = {
+            "embeddings": int(self._embeddings.nbytes) if self._embeddings is not None else 0,
+            "bm25": self._bm25.nbytes() if self._bm25 is not None else 0,
+            "bullets": bullets_nbytes(self._bullets),
+            "tokens": sum(_deep_sizeof(t) for t in (self._corpus_tokens or [])),
+        }
+        usage["total"] = sum(usage.values())
+        return usage
+
+    @property
+    def cache_stats(self) -> Dict[str, int]:
+        """Embedding cache hit/miss counts (zeros when caching is disabled)."""
+        if self.cache is None:
+            return {"hits": 0, "misses": 0, "entries": 0}
+        return self.cache.stats()
+
+    def encode_query(self, text: str) -> np.ndarray:
+        with span("retrieval.encode_query", queries=1):
+            return self.embed.encode([text], normalize_embeddings=True)[0]
+
+    def query_terms(self, jd_text: str) -> List[Tuple[str, float]]:
+        """Weighted BM25 query terms for a JD (see utils.analyzer)."""
+        with span("retrieval.keywords", chars=len(jd_text)) as s:
+            terms = self.analyzer.query_terms(jd_text, top_k=128)
+            s["terms"] = len(terms)
+        return terms
+
+    def search(self, jd_text: str, top_k: int = 30, q_emb: Optional[np.ndarray] = None,
+               keywords: Optional[List[Tuple[str, float]]] = None) -> List[Tuple[Bullet, float]]:
+        """Hybrid search; pass a precomputed `q_emb`/`keywords` (from `query_terms`) to skip re-deriving them."""
         assert self._bm25 is not None and self._embeddings is not None
-        # Query tokens for BM25
-        keywords = extract_keywords(jd_text, top_k=128)
-        bm25_scores = self._bm25.get_scores(keywords)
         # Embedding query
-        q_emb = self.embed.encode([jd_text], normalize_embeddings=True)[0]
-        cos = (self._embeddings @ q_emb)
-        # Hybrid score (weighted sum)
-        bm25_norm = (bm25_scores - bm25_scores.min()) / (bm25_scores.ptp() + 1e-6)
-        cos_norm = (cos - cos.min()) / (cos.ptp() + 1e-6)
-        hybrid = 0.6 * cos_norm + 0.4 * bm25_norm
-        idx = np.argsort(-hybrid)[:top_k]
-        results = [(self._bullets[i], float(hybrid[i])) for i in idx]
-        return results
-
-    def rank_item_bullets(self, item_id: str, query_text: str) -> List[Bullet]:
-        """Return all bullets for a given item_id, ranked by semantic similarity to the JD."""
-        idxs = self._item_to_idx.get(item_id or "", []) or []
-        if not idxs:
+        if q_emb is None:
+            q_emb = self.encode_query(jd_text)
+        return self._search_one(jd_text, q_emb, top_k, keywords)
+
+    def search_many(self, jd_texts: List[str], top_k: int = 30) -> List[List[Tuple[Bullet, float]]]:
+        """`search` over many JDs with every query embedding computed in one `encode` call."""
+        assert self._bm25 is not None and self._embeddings is not None
+        if not jd_texts:
             return []
-        q_emb = self.embed.encode([query_text], normalize_embeddings=True)[0]
-        subset = [(i, float(self._embeddings[i] @ q_emb)) for i in idxs]
-        subset.sort(key=lambda t: -t[1])
-        return [self._bullets[i] for i, _ in subset]
+        with span("retrieval.encode_query", queries=len(jd_texts)):
+            q_embs = self.embed.encode(list(jd_texts), normalize_embeddings=True)
+        return [self._search_one(t, q, top_k) for t, q in zip(jd_texts, q_embs)]
+
+    def _search_one(self, jd_text: str, q_emb: np.ndarray, top_k: int,
+                    keywords: Optional[List[Tuple[str, float]]] = None) -> List[Tuple[Bullet, float]]:
+        # Query terms for BM25, weighted by how often the JD repeats them
+        if keywords is None:
+            keywords = self.query_terms(jd_text)
+        # sync_master patches rows, postings and the vector index in place under the same lock, so
+        # scoring holds it to see one consistent index (the query encode above runs outside it)
+        with self._lock:
+            if not self._bullets:
+                return []
+            with span("retrieval.bm25", terms=len(keywords)):
+                bm25_scores = self._bm25.get_scores([t for t, _ in keywords], [w for _, w in keywords])
+            with span("retrieval.dense", docs=len(self._bullets)):
+                if self._vindex.exact:
+                    cos = (self._embeddings @ q_emb)
+                    cand = None
+                else:
+                    # Approximate: score only the ANN neighbours plus the best BM25 matches,
+                    # normalizing cosine over that candidate pool instead of the full corpus.
+                    pool = max(top_k, self.candidate_pool)
+                    ann_idx, _ = self._vindex.search(q_emb, pool)
+                    cand = np.union1d(ann_idx, top_k_indices(bm25_scores, pool))
+                    cos = self._embeddings[cand] @ q_emb
+                    bm25_scores = bm25_scores[cand]
+            # Hybrid score (weighted sum)
+            bm25_norm = (bm25_scores - bm25_scores.min()) / (np.ptp(bm25_scores) + 1e-6)
+            cos_norm = (cos - cos.min()) / (np.ptp(cos) + 1e-6)
+            hybrid = 0.6 * cos_norm + 0.4 * bm25_norm
+            idx = top_k_indices(hybrid, top_k)
+            rows = idx if cand is None else cand[idx]
+            return [(self._bullets[r], float(hybrid[i])) for r, i in zip(rows, idx)]
+
+    def diversify(self, hits: List[Tuple[Bullet, float]], k: int = 12, lambda_: float = 0.7,
+                  **kwargs) -> List[Bullet]:
+        """MMR diversification of `search` hits using this index's bullet embeddings."""
+        with self._lock:
+            rows = [self._id_to_idx[b.id] for b, _ in hits]
+            emb = self._embeddings[rows]
+        with span("retrieval.diversify", candidates=len(hits)):
+            return mmr_diversify(hits, emb, k=k, lambda_=lambda_, **kwargs)
+
+    def rank_item_bullets(self, item_id: str, query_text: str = "",
+                          q_emb: Optional[np.ndarray] = None) -> List[Bullet]:
+        """Return all bullets for a given item_id, ranked by semantic similarity to the JD."""
+        return self.rank_items_bullets([item_id], query_text, q_emb=q_emb).get(item_id or "", [])
+
+    def rank_items_bullets(self, item_ids: List[str], query_text: str = "",
+                           q_emb: Optional[np.ndarray] = None) -> Dict[str, List[Bullet]]:
+        """Rank the bullets of many items at once: one query encode, one gather, one segment sort.
+
+        Keyed by item id, with None ids under "" (as `rank_item_bullets` reads them).
+        """
+        keys = list(dict.fromkeys(iid or "" for iid in item_ids))
+        out: Dict[str, List[Bullet]] = {k: [] for k in keys}
+        if q_emb is None:
+            with self._lock:
+                if not any(self._item_to_idx.get(k) for k in keys):
+                    return out
+            # Model forward pass outside the lock, so sync_master and other sessions are not blocked
+            q_emb = self.encode_query(query_text)
+        with self._lock, span("retrieval.rank_items", items=len(keys)):
+            groups = [(k, self._item_to_idx.get(k, [])) for k in keys]
+            groups = [(k, idxs) for k, idxs in groups if idxs]
+            if not groups:
+                return out
+            flat = np.fromiter((i for _, idxs in groups for i in idxs), dtype=np.int64)
+            seg = np.repeat(np.arange(len(groups)), [len(idxs) for _, idxs in groups])
+            scores = self._embeddings[flat] @ q_emb
+            # Group by item, best score first; ties keep bullet order within the item
+            order = np.lexsort((np.arange(len(flat)), -scores, seg))
+            bounds = np.cumsum([0] + [len(idxs) for _, idxs in groups])
+            ranked = flat[order]
+            for g, (k, _) in enumerate(groups):
+                out[k] = [self._bullets[i] for i in ranked[bounds[g]:bounds[g + 1]]]
+            return out
 
 
 def diversify(bullets: List[Tuple[Bullet, float]], k: int = 12) -> List[Bullet]:
@@ -91,7 +745,7 @@ def diversify(bullets: List[Tuple[Bullet, float]], k: int = 12) -> List[Bullet]:
     seen_emp: Dict[str, int] = {}
     for b, _ in bullets:
         start = b.text[:40].lower()
-        emp = b.meta.get("employer")
+        emp = b.item.get("employer")
         if start in seen_starts:
             continue
         if emp:
@@ -104,3 +758,44 @@ def diversify(bullets: List[Tuple[Bullet, float]], k: int = 12) -> List[Bullet]:
         if len(selected) >= k:
             break
     return selected
+
+
+def mmr_diversify(bullets: List[Tuple[Bullet, float]], embeddings: np.ndarray, k: int = 12,
+                  lambda_: float = 0.7, max_per_employer: int = 6, dup_threshold: float = 0.92) -> List[Bullet]:
+    """Maximal marginal relevance over (bullet, score) hits with row-aligned, L2-normalised embeddings.
+
+    Each step picks argmax of lambda * relevance - (1 - lambda) * max cosine to the
+    bullets already picked; relevance is the hit score min-max scaled to [0, 1].
+    Candidates at or above `dup_threshold` cosine to a pick (paraphrases), sharing
+    its first 40 characters, or from an employer already at `max_per_employer`
+    are dropped. One matrix-vector product per pick.
+    """
+    n = len(bullets)
+    if n == 0 or k <= 0:
+        return []
+    emb = np.asarray(embeddings, dtype=np.float32)
+    rel = np.fromiter((s for _, s in bullets), dtype=np.float64, count=n)
+    spread = np.ptp(rel)
+    rel = (rel - rel.min()) / spread if spread > 0 else np.ones(n)
+    _, starts = np.unique([b.text[:40].lower() for b, _ in bullets], return_inverse=True)
+    emps = [b.item.get("employer") or "" for b, _ in bullets]
+    emp_names, emp_codes = np.unique(emps, return_inverse=True)
+    emp_left = np.full(len(emp_names), max_per_employer)
+    if "" in emp_names:
+        emp_left[np.searchsorted(emp_names, "")] = n  # no employer => no cap
+
+    available = np.ones(n, dtype=bool)
+    max_sim = np.zeros(n)
+    selected: List[Bullet] = []
+    while len(selected) < k and available.any():
+        mmr = np.where(available, lambda_ * rel - (1 - lambda_) * max_sim, -np.inf)
+        i = int(np.argmax(mmr))
+        selected.append(bullets[i][0])
+        sims = emb @ emb[i]
+        max_sim = np.maximum(max_sim, sims)
+        available &= (sims < dup_threshold) & (starts != starts[i])
+        e = emp_codes[i]
+        emp_left[e] -= 1
+        if emp_left[e] <= 0:
+            available &= emp_codes != e
+    return selected
@@ -0,0 +1,207 @@
+# core/scheduler.py
+"""Micro-batching of model inference shared across concurrent callers.
+
+Streamlit runs every browser session in its own thread, and each one calls the
+shared models with tiny inputs (one JD to encode, ~24 pairs to rerank). A
+`MicroBatcher` queues those requests, and one worker thread concatenates
+whatever is queued (up to `max_batch` inputs) into a single model call and
+hands each caller its slice through a `Future`. While callers are concurrent
+(the last batch coalesced more than one request) it also waits up to
+`max_wait_ms` after the first request for more; a lone caller never waits.
+Fixed per-call costs (tokenizer setup, framework dispatch, thread-pool spin-up)
+are paid once per batch, and model calls never overlap, so concurrent sessions
+stop oversubscribing the CPU.
+
+`BatchedEmbedder` and `BatchedCrossEncoder` wrap models behind the same
+`encode` / `predict` calls the retriever and reranker already make; given a
+`loader` instead of a model, they load it on first use.
+"""
+from __future__ import annotations
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.tracing import span
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Runs `fn(inputs) -> outputs` (aligned, sliceable) on one worker thread over coalesced requests.
+
+    A request is a list of inputs; it is never split, so a request larger than
+    `max_batch` runs as a batch of its own. `stats` counts requests, batches
+    and inputs.
+    """
+
+    def __init__(self, fn: Callable[[List[Any]], Sequence[Any]], max_batch: int = 64, max_wait_ms: float = 5.0,
+                 name: str = "batcher"):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self.reset_stats()
+        self._wait = False
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._carry: Optional[Tuple[List[Any], Future]] = None
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, inputs: Sequence[Any]) -> Future:
+        """Queue one request; the future resolves to outputs for exactly these inputs."""
+        fut: Future = Future()
+        if self._closed:
+            raise RuntimeError(f"{self.name} is closed")
+        if not inputs:
+            fut.set_result([])
+            return fut
+        self._queue.put((list(inputs), fut))
+        return fut
+
+    def __call__(self, inputs: Sequence[Any]) -> Any:
+        return self.submit(inputs).result()
+
+    def close(self):
+        """Finish queued requests, then stop the worker."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._worker.join()
+
+    def _collect(self) -> Optional[List[Tuple[List[Any], Future]]]:
+        first = self._carry or self._queue.get()
+        self._carry = None
+        if first is _STOP:
+            return None
+        batch, size = [first], len(first[0])
+        deadline = time.monotonic() + (self.max_wait if self._wait else 0.0)
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                req = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if req is _STOP or size + len(req[0]) > self.max_batch:
+                # Runs first in the next batch (or stops the worker once this one is done)
+                self._carry = req
+                break
+            batch.append(req)
+            size += len(req[0])
+        self._wait = len(batch) > 1
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            batch = [(inputs, fut) for inputs, fut in batch if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            flat = [x for inputs, _ in batch for x in inputs]
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["inputs"] += len(flat)
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(flat))
+            try:
+                with span(f"{self.name}.batch", requests=len(batch), inputs=len(flat)):
+                    out = self.fn(flat)
+            except BaseException as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            offset = 0
+            for inputs, fut in batch:
+                fut.set_result(out[offset:offset + len(inputs)])
+                offset += len(inputs)
+
+    def reset_stats(self):
+        self.stats = {"requests": 0, "batches": 0, "inputs": 0, "largest_batch": 0}
+
+    def mean_batch(self) -> float:
+        return self.stats["inputs"] / self.stats["batches"] if self.stats["batches"] else 0.0
+
+
+class _LazyModel:
+    """`model` given up front, or loaded by `loader()` on first access (once, under a lock)."""
+
+    def __init__(self, model: Any = None, loader: Optional[Callable[[], Any]] = None):
+        if model is None and loader is None:
+            raise ValueError("pass a model or a loader")
+        self._model = model
+        self._loader = loader
+        self._load_lock = threading.Lock()
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = self._loader()
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+class BatchedEmbedder(_LazyModel):
+    """SentenceTransformer stand-in whose `encode(..., normalize_embeddings=True)` calls are micro-batched.
+
+    Calls with other options go straight to the model (on the caller's thread).
+    Other attributes are forwarded to the wrapped model.
+    """
+
+    def __init__(self, model: Any = None, max_batch: int = 64, max_wait_ms: float = 5.0,
+                 loader: Optional[Callable[[], Any]] = None):
+        super().__init__(model, loader)
+        self.batcher = MicroBatcher(lambda texts: self.model.encode(texts, normalize_embeddings=True),
+                                    max_batch=max_batch, max_wait_ms=max_wait_ms, name="encode")
+
+    def encode(self, sentences, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        if not normalize_embeddings or kwargs:
+            return self.model.encode(sentences, normalize_embeddings=normalize_embeddings, **kwargs)
+        single = isinstance(sentences, str)
+        out = np.asarray(self.batcher([sentences] if single else list(sentences)))
+        return out[0] if single else out
+
+    def close(self):
+        self.batcher.close()
+
+
+class BatchedCrossEncoder(_LazyModel):
+    """CrossEncoder stand-in whose `predict(pairs)` calls are micro-batched."""
+
+    def __init__(self, model: Any = None, max_batch: int = 256, max_wait_ms: float = 5.0,
+                 loader: Optional[Callable[[], Any]] = None):
+        super().__init__(model, loader)
+        self.batcher = MicroBatcher(lambda pairs: np.asarray(self.model.predict(pairs)),
+                                    max_batch=max_batch, max_wait_ms=max_wait_ms, name="predict")
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], **kwargs) -> np.ndarray:
+        if kwargs:
+            return self.model.predict(pairs, **kwargs)
+        return np.asarray(self.batcher(list(pairs)))
+
+    def close(self):
+        self.batcher.close()
+
+
+def batcher_stats(*models: Any) -> Dict[str, Dict[str, float]]:
+    """`stats` (plus mean batch size) of every micro-batched model among `models`."""
+    out = {}
+    for m in models:
+        b = getattr(m, "batcher", None) if isinstance(m, (BatchedEmbedder, BatchedCrossEncoder)) else None
+        if b is not None:
+            out[b.name] = {**b.stats, "mean_batch": round(b.mean_batch(), 2)}
+    return out
@@ -0,0 +1,102 @@
+# core/session.py
+from __future__ import annotations
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .retrieval import Bullet, HybridRetriever, diversify
+from .reranker import Reranker
+from utils.tracing import span
+
+
+def jd_hash(jd_text: str) -> str:
+    return hashlib.sha1(jd_text.encode("utf-8")).hexdigest()
+
+
+class RetrievalSession:
+    """Everything derived from one JD against one index version, computed once.
+
+    Holds the JD embedding, its BM25 keywords, the hybrid hits and the reranked
+    candidates, and memoizes per-item bullet rankings so the resume builder's
+    backfill reuses the same query embedding instead of re-encoding the JD.
+    With `mmr_lambda` set, candidates are picked by MMR over the bullet embeddings
+    instead of the text-prefix `diversify`.
+    """
+
+    def __init__(self, retriever: HybridRetriever, reranker: Reranker, jd_text: str,
+                 top_k: int = 40, diversify_k: int = 24, rerank_k: int = 16, mmr_lambda: Optional[float] = None):
+        self.retriever = retriever
+        self.jd_text = jd_text
+        self.jd_hash = jd_hash(jd_text)
+        self.version = retriever.version
+        with span("retrieval.session", chars=len(jd_text)):
+            self.q_emb: np.ndarray = retriever.encode_query(jd_text)
+            self.keywords: List[Tuple[str, float]] = retriever.query_terms(jd_text)
+            self.hits: List[Tuple[Bullet, float]] = retriever.search(jd_text, top_k=top_k, q_emb=self.q_emb,
+                                                                     keywords=self.keywords)
+            if mmr_lambda is None:
+                self.candidates: List[Bullet] = diversify(self.hits, k=diversify_k)
+            else:
+                self.candidates = retriever.diversify(self.hits, k=diversify_k, lambda_=mmr_lambda)
+            hybrid = {b.id: s for b, s in self.hits}
+            self.ranked: List[Bullet] = reranker.rerank(jd_text, self.candidates, top_k=rerank_k,
+                                                        scores=[hybrid[b.id] for b in self.candidates])
+        self._item_rankings: Dict[str, List[Bullet]] = {}
+
+    def rank_item_bullets(self, item_id: str, query_text: Optional[str] = None) -> List[Bullet]:
+        """Same contract as HybridRetriever.rank_item_bullets, scored against this session's JD."""
+        return self.rank_items_bullets([item_id]).get(item_id or "", [])
+
+    def rank_items_bullets(self, item_ids: List[str], query_text: Optional[str] = None) -> Dict[str, List[Bullet]]:
+        """Bulk variant; only items not ranked earlier in this session hit the index."""
+        missing = [i for i in dict.fromkeys(item_ids) if (i or "") not in self._item_rankings]
+        if missing:
+            self._item_rankings.update(self.retriever.rank_items_bullets(missing, q_emb=self.q_emb))
+        return {i or "": self._item_rankings[i or ""] for i in item_ids}
+
+
+class SessionCache:
+    """LRU of RetrievalSessions keyed by (JD hash, index version).
+
+    Streamlit reruns on every widget interaction; with this in a cached resource
+    an unchanged JD costs a dict lookup instead of encode + search + rerank. Any
+    index change bumps `retriever.version`, so stale sessions are never served.
+    """
+
+    def __init__(self, retriever: HybridRetriever, reranker: Reranker, max_sessions: int = 32,
+                 top_k: int = 40, diversify_k: int = 24, rerank_k: int = 16, mmr_lambda: Optional[float] = None):
+        self.retriever = retriever
+        self.reranker = reranker
+        self.max_sessions = max_sessions
+        self.params = {"top_k": top_k, "diversify_k": diversify_k, "rerank_k": rerank_k, "mmr_lambda": mmr_lambda}
+        self.hits = 0
+        self.misses = 0
+        self._sessions: "OrderedDict[Tuple[str, int], RetrievalSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, jd_text: str) -> RetrievalSession:
+        key = (jd_hash(jd_text), self.retriever.version)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                self.hits += 1
+                return session
+            self.misses += 1
+        session = RetrievalSession(self.retriever, self.reranker, jd_text, **self.params)
+        with self._lock:
+            self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,136 @@
+# core/tenants.py
+from __future__ import annotations
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.io import read_json, DATA
+from .embed_cache import EmbeddingCache
+from .retrieval import Bullet, HybridRetriever
+from .reranker import Reranker
+from .models import load_embedder
+
+TENANT_ID_RE = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$")
+
+
+def load_tenant_master(tenant_id: str, root: Path = DATA / "tenants") -> Dict[str, Any]:
+    """Default loader: `data/tenants/<tenant_id>.json`."""
+    if not TENANT_ID_RE.match(tenant_id or ""):
+        raise ValueError(f"Invalid tenant id: {tenant_id!r}")
+    path = root / f"{tenant_id}.json"
+    if not path.exists():
+        raise KeyError(f"No master resume for tenant {tenant_id!r} ({path})")
+    return read_json(path)
+
+
+class TenantRetrievalService:
+    """Many candidates' master resumes served from one process.
+
+    One embedding model and one cross-encoder are shared by every tenant; each
+    tenant gets its own bullet index (a HybridRetriever built on the shared model),
+    loaded on first use and evicted least-recently-used once the summed index size
+    exceeds `memory_budget_mb`. Searches only ever see the requested tenant's bullets.
+    """
+
+    def __init__(self, embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 cross_encoder_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 loader: Callable[[str], Dict[str, Any]] = load_tenant_master,
+                 memory_budget_mb: float = 1024.0, cache_dir: Optional[Path] = None,
+                 vector_index: str = "bruteforce", embedder: Optional[Any] = None,
+                 reranker: Optional[Reranker] = None):
+        self.embedding_model = embedding_model
+        self.embed = embedder if embedder is not None else load_embedder(embedding_model)
+        self.reranker = reranker if reranker is not None else Reranker(model_name=cross_encoder_model)
+        self.loader = loader
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.cache_dir = cache_dir
+        # One embedding store for every tenant: per-tenant instances on the same files would race
+        # on writes and overwrite each other's key lists
+        self.embed_cache = EmbeddingCache(cache_dir, embedding_model) if cache_dir else None
+        self.vector_index = vector_index
+        self.evictions = 0
+        self._tenants: "OrderedDict[str, HybridRetriever]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _build(self, master: Dict[str, Any]) -> HybridRetriever:
+        r = HybridRetriever(embedding_model=self.embedding_model, embed_cache=self.embed_cache,
+                            vector_index=self.vector_index, embedder=self.embed)
+        r.index_from_master(master)
+        return r
+
+    def _install(self, tenant_id: str, r: HybridRetriever):
+        # Caller holds self._lock
+        self._tenants[tenant_id] = r
+        self._tenants.move_to_end(tenant_id)
+        self._sizes[tenant_id] = r.memory_usage()["total"]
+        while sum(self._sizes.values()) > self.memory_budget and len(self._tenants) > 1:
+            victim = next(iter(self._tenants))
+            if victim == tenant_id:
+                break
+            del self._tenants[victim]
+            del self._sizes[victim]
+            self.evictions += 1
+
+    def retriever(self, tenant_id: str) -> HybridRetriever:
+        """The tenant's index, loading it via `loader` on a miss."""
+        with self._lock:
+            r = self._tenants.get(tenant_id)
+            if r is not None:
+                self._tenants.move_to_end(tenant_id)
+                return r
+            load_lock = self._loading.setdefault(tenant_id, threading.Lock())
+        # Build outside the service lock so other tenants keep serving meanwhile
+        with load_lock:
+            with self._lock:
+                r = self._tenants.get(tenant_id)
+                if r is not None:
+                    self._tenants.move_to_end(tenant_id)
+                    return r
+            r = self._build(self.loader(tenant_id))
+            with self._lock:
+                self._install(tenant_id, r)
+                self._loading.pop(tenant_id, None)
+        return r
+
+    def load(self, tenant_id: str, master: Dict[str, Any]) -> HybridRetriever:
+        """Index (or re-sync) a tenant from an in-memory master resume."""
+        with self._lock:
+            r = self._tenants.get(tenant_id)
+        if r is None:
+            r = self._build(master)
+        else:
+            r.sync_master(master)
+        with self._lock:
+            self._install(tenant_id, r)
+        return r
+
+    def evict(self, tenant_id: str) -> bool:
+        with self._lock:
+            self._sizes.pop(tenant_id, None)
+            return self._tenants.pop(tenant_id, None) is not None
+
+    def search(self, tenant_id: str, jd_text: str, top_k: int = 30) -> List[Tuple[Bullet, float]]:
+        return self.retriever(tenant_id).search(jd_text, top_k=top_k)
+
+    def rerank(self, jd_text: str, candidates: List[Bullet], top_k: int = 12) -> List[Bullet]:
+        return self.reranker.rerank(jd_text, candidates, top_k=top_k)
+
+    def tenants(self) -> List[str]:
+        """Loaded tenants, least recently used first."""
+        with self._lock:
+            return list(self._tenants)
+
+    def memory_usage(self) -> Dict[str, Dict[str, int]]:
+        """Per-tenant index memory breakdown (bytes); shared models are not included."""
+        with self._lock:
+            loaded = list(self._tenants.items())
+        usage = {tid: r.memory_usage() for tid, r in loaded}
+        with self._lock:
+            for tid, u in usage.items():
+                if tid in self._sizes:
+                    self._sizes[tid] = u["total"]
+        return usage
@@ -0,0 +1,121 @@
+# core/vector_index.py
+from __future__ import annotations
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, via argpartition (O(n) + O(k log k))."""
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+class BruteForceIndex:
+    """Exact inner-product search over the full embedding matrix (default)."""
+
+    name = "bruteforce"
+    exact = True
+
+    def __init__(self):
+        self._emb: Optional[np.ndarray] = None
+
+    def build(self, embeddings: np.ndarray):
+        self._emb = embeddings
+
+    def refresh(self, embeddings: np.ndarray):
+        self._emb = embeddings
+
+    def search(self, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self._emb @ q
+        idx = top_k_indices(scores, k)
+        return idx, scores[idx]
+
+
+class IVFIndex:
+    """Inverted-file index: spherical k-means coarse quantizer, probe the closest lists.
+
+    Pure NumPy. `n_lists` defaults to ~sqrt(N); `n_probe` trades recall for latency.
+    `refresh` re-buckets rows against the trained centroids (no retraining), which
+    is what incremental index updates use.
+    """
+
+    name = "ivf"
+    exact = False
+
+    def __init__(self, n_lists: Optional[int] = None, n_probe: int = 16, train_iters: int = 10,
+                 train_sample: int = 64, seed: int = 0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_iters = train_iters
+        self.train_sample = train_sample  # training rows per list
+        self.seed = seed
+        self._emb: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        self._order: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    def build(self, embeddings: np.ndarray):
+        n = embeddings.shape[0]
+        if n == 0:
+            # Nothing to train on; the next refresh with rows trains the quantizer
+            self._emb, self.centroids, self._order, self._offsets = embeddings, None, None, None
+            return
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(n, n_lists * self.train_sample)
+        sample = np.asarray(embeddings[rng.choice(n, size=sample_size, replace=False)], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)].copy()
+        for _ in range(self.train_iters):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=n_lists)
+            empty = counts == 0
+            # Re-seed empty lists from random sample rows
+            sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()))]
+            centroids = sums / (np.linalg.norm(sums, axis=1, keepdims=True) + 1e-12)
+        self.centroids = centroids
+        self.refresh(embeddings)
+
+    def refresh(self, embeddings: np.ndarray):
+        if self.centroids is None:
+            self.build(embeddings)
+            return
+        self._emb = embeddings
+        n = embeddings.shape[0]
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 65536):
+            block = np.asarray(embeddings[start:start + 65536], dtype=np.float32)
+            assign[start:start + 65536] = np.argmax(block @ self.centroids.T, axis=1)
+        self._order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=self.centroids.shape[0])
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def candidates(self, q: np.ndarray) -> np.ndarray:
+        probe = top_k_indices(self.centroids @ q, min(self.n_probe, self.centroids.shape[0]))
+        return np.concatenate([self._order[self._offsets[c]:self._offsets[c + 1]] for c in probe])
+
+    def search(self, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self.centroids is None or self._emb is None or not len(self._emb):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        cand = self.candidates(q)
+        scores = self._emb[cand] @ q
+        top = top_k_indices(scores, k)
+        return cand[top], scores[top]
+
+
+VECTOR_INDEXES = {"bruteforce": BruteForceIndex, "ivf": IVFIndex}
+
+
+def make_vector_index(name: str = "bruteforce", **kwargs):
+    try:
+        return VECTOR_INDEXES[name.lower()](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown vector index {name!r}; choose from {sorted(VECTOR_INDEXES)}") from None
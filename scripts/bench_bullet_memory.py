@@ -0,0 +1,84 @@
+# scripts/bench_bullet_memory.py
+"""Memory of the bullet store: compact `Bullet` vs. the old per-bullet dataclass + meta dict.
+
+    python -m scripts.bench_bullet_memory --bullets 100000
+
+Both layouts are built from the same synthetic master under tracemalloc; the
+legacy one is reproduced here (dataclass with its own ten-key meta dict and list
+copies of skills/domains) so the comparison keeps working after the switch.
+Also times `diversify` over each layout's bullets.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from utils.text import normalize_text
+from core.retrieval import bullets_from_master, bullets_nbytes, diversify
+from scripts.synthetic import synthetic_master
+
+
+@dataclass
+class LegacyBullet:
+    id: str
+    text: str
+    meta: Dict[str, Any]
+
+
+def legacy_bullets(master: Dict[str, Any]) -> List[LegacyBullet]:
+    out = []
+    for section in master.get("sections", []):
+        for item in section.get("items", []):
+            for b in item.get("bullets", []):
+                meta = {
+                    "section_id": section.get("id"), "section_title": section.get("title"),
+                    "item_id": item.get("id"), "employer": item.get("employer") or item.get("name"),
+                    "role": item.get("role"), "location": item.get("location"), "dates": item.get("dates", {}),
+                    "skills": list(b.get("skills", [])), "domains": list(b.get("domains", [])),
+                    "primary": bool(b.get("primary", False)),
+                }
+                out.append(LegacyBullet(id=b.get("id"), text=normalize_text(b.get("text", "")), meta=meta))
+    return out
+
+
+def measure(build: Callable[[], List[Any]]) -> Tuple[List[Any], int, float]:
+    gc.collect()
+    tracemalloc.start()
+    t = time.perf_counter()
+    bullets = build()
+    elapsed = time.perf_counter() - t
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return bullets, size, elapsed
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--bullets", type=int, default=100_000)
+    ap.add_argument("--bullets-per-item", type=int, default=6)
+    args = ap.parse_args(argv)
+
+    # Copies of skills lists etc. are made by both builders; the master itself is excluded
+    master = synthetic_master(args.bullets, bullets_per_item=args.bullets_per_item)
+    legacy, legacy_bytes, legacy_s = measure(lambda: legacy_bullets(master))
+    del legacy
+    compact, compact_bytes, compact_s = measure(lambda: bullets_from_master(master))
+
+    hits = [(b, 1.0) for b in compact]
+    t = time.perf_counter()
+    diversify(hits, k=24)
+    div_ms = (time.perf_counter() - t) * 1000
+
+    mb = 1024 * 1024
+    print(f"{args.bullets} bullets ({args.bullets_per_item} per item)")
+    print(f"  legacy dataclass + meta dict : {legacy_bytes / mb:8.1f} MB  built in {legacy_s:.2f}s")
+    print(f"  compact slots + shared item  : {compact_bytes / mb:8.1f} MB  built in {compact_s:.2f}s")
+    print(f"  saved {1 - compact_bytes / legacy_bytes:.0%}; bullets_nbytes estimate {bullets_nbytes(compact) / mb:.1f} MB")
+    print(f"  diversify over all bullets: {div_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
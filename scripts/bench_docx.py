@@ -0,0 +1,149 @@
+# scripts/bench_docx.py
+"""Benchmark .docx rendering: per-render style setup vs the cached template.
+
+    python -m scripts.bench_docx --docs 200 --bullets 16 --workers 4
+
+The legacy path (fresh `Document()`, `_set_base_styles`, one `add_paragraph`
+per line) is reproduced here and timed against core.export_docx, which clones
+a template saved once per process and emits paragraphs with pre-resolved
+style ids. Both paths render the same synthetic packages; styles.xml and
+document.xml of every pair must be byte-identical, otherwise the script exits 1.
+With --workers, whole packages (resume + cover letter + text mirrors) are also
+rendered in memory in this process vs. through a render process pool.
+"""
+from __future__ import annotations
+import argparse
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Inches
+
+from core.export_docx import (_set_base_styles, make_render_pool, render_cover_letter_docx, render_package,
+                              render_resume_docx)
+from scripts.synthetic import synthetic_master, synthetic_package
+
+PARTS = ("word/styles.xml", "word/document.xml")
+
+
+def legacy_resume(profile: Dict[str, Any], resume_json: Dict[str, Any], out_path: Path) -> Path:
+    doc = Document()
+    _set_base_styles(doc)
+    section = doc.sections[0]
+    section.top_margin = Inches(0.5)
+    section.bottom_margin = Inches(0.5)
+    section.left_margin = Inches(0.6)
+    section.right_margin = Inches(0.6)
+    p = doc.add_paragraph(style="Name")
+    p.add_run(profile.get("full_name", ""))
+    p.alignment = WD_ALIGN_PARAGRAPH.LEFT
+    contact = profile.get("contact", {})
+    bits = [contact.get("email", ""), contact.get("phone", ""), contact.get("city", "")]
+    bits += [f"{l.get('url')}" for l in contact.get("links", [])]
+    c = doc.add_paragraph(style="Default")
+    c.add_run(" • ".join([b for b in bits if b]))
+    c.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+    headline = resume_json.get("headline")
+    if headline:
+        r = doc.add_paragraph(style="Section Title").add_run(headline)
+        r.bold = True
+        r.italic = True
+    for section in resume_json.get("sections", []):
+        title = section.get("title", "Experience")
+        doc.add_paragraph(title.upper() + "  –––––––––––––––––––––––––––––––––––––––––––––––", style="Section Title")
+        for item in section.get("items", []):
+            header = doc.add_paragraph(style="Job Title")
+            header.add_run(item.get("role", "")).bold = True
+            tail = [b for b in [item.get("employer", ""), item.get("location", ""), item.get("dates", "")] if b]
+            if tail:
+                header.add_run(f" — {' | '.join(tail)}")
+            for txt in item.get("bullets", []):
+                doc.add_paragraph(txt, style="Description")
+    doc.save(str(out_path))
+    return out_path
+
+
+def legacy_cover_letter(profile: Dict[str, Any], cl_json: Dict[str, Any], out_path: Path) -> Path:
+    doc = Document()
+    _set_base_styles(doc)
+    contact = profile.get("contact", {})
+    doc.add_paragraph(profile.get("full_name", ""), style="Default")
+    doc.add_paragraph("\n".join([x for x in [contact.get("email"), contact.get("phone"), contact.get("city")] if x]),
+                      style="Default")
+    doc.add_paragraph("")
+    doc.add_paragraph(f"Dear {cl_json.get('greeting', 'Hiring Team')}", style="Default")
+    doc.add_paragraph("")
+    for para in cl_json.get("body_paragraphs", []):
+        doc.add_paragraph(para, style="Default")
+    doc.add_paragraph("")
+    doc.add_paragraph("")
+    doc.add_paragraph(cl_json.get("closing", "Sincerely,"), style="Default")
+    doc.add_paragraph(profile.get("full_name", ""), style="Default")
+    doc.save(str(out_path))
+    return out_path
+
+
+def parts(path: Path) -> Dict[str, bytes]:
+    with zipfile.ZipFile(path) as z:
+        return {p: z.read(p) for p in PARTS}
+
+
+def run(render: Callable[[Dict[str, Any], Dict[str, Any], Path], Path], profile, docs: List[Dict[str, Any]],
+        out_dir: Path) -> float:
+    t = time.perf_counter()
+    for i, d in enumerate(docs):
+        render(profile, d, out_dir / f"{i}.docx")
+    return time.perf_counter() - t
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--docs", type=int, default=200)
+    ap.add_argument("--bullets", type=int, default=16, help="bullets per resume")
+    ap.add_argument("--workers", type=int, default=0, help="also time render_package through a pool of N processes")
+    args = ap.parse_args(argv)
+
+    master = synthetic_master(max(args.bullets * 4, 100))
+    profile = master["profile"]
+    all_bullets = [b["text"] for s in master["sections"] for it in s["items"] for b in it.get("bullets", [])]
+    pkgs = [synthetic_package(master, all_bullets[i % 7::7][:args.bullets]) for i in range(args.docs)]
+
+    mismatched = 0
+    print(f"{'document':<14} {'legacy docs/s':>14} {'template docs/s':>16} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind, key, legacy, fast in (("resume", "resume", legacy_resume, render_resume_docx),
+                                        ("cover letter", "cover_letter", legacy_cover_letter, render_cover_letter_docx)):
+            docs = [p[key] for p in pkgs]
+            a, b = Path(tmp) / f"{key}_legacy", Path(tmp) / f"{key}_fast"
+            a.mkdir()
+            b.mkdir()
+            fast(profile, docs[0], b / "warm.docx")
+            t_legacy = run(legacy, profile, docs, a)
+            t_fast = run(fast, profile, docs, b)
+            mismatched += sum(parts(a / f"{i}.docx") != parts(b / f"{i}.docx") for i in range(len(docs)))
+            print(f"{kind:<14} {len(docs) / t_legacy:>14.1f} {len(docs) / t_fast:>16.1f} {t_legacy / t_fast:>7.2f}x")
+    print(f"{'/'.join(PARTS)} identical: {'yes' if not mismatched else f'NO ({mismatched} documents differ)'}")
+
+    if args.workers:
+        t = time.perf_counter()
+        for p in pkgs:
+            render_package(profile, p["resume"], p["cover_letter"])
+        t_serial = time.perf_counter() - t
+        with make_render_pool(args.workers) as pool, ThreadPoolExecutor(2 * args.workers) as threads:
+            list(threads.map(lambda p: render_package(profile, p["resume"], p["cover_letter"], pool=pool), pkgs[:args.workers]))
+            t = time.perf_counter()
+            list(threads.map(lambda p: render_package(profile, p["resume"], p["cover_letter"], pool=pool), pkgs))
+            t_pool = time.perf_counter() - t
+        print(f"render_package: in-process {len(pkgs) / t_serial:.1f} packages/s, "
+              f"{args.workers} workers {len(pkgs) / t_pool:.1f} packages/s")
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# scripts/bench_prompt.py
+"""Prompt size for compose_package: the old layout vs core.prompt.PromptBuilder.
+
+    python -m scripts.bench_prompt --chars 1500 5000 15000 40000 --budget 1200
+
+Builds both layouts for synthetic JDs of each length (with a scraped-page tail
+of benefits / EEO boilerplate) and the repo's tone file, and prints prompt
+tokens, the shared (cacheable) prefix, tokens saved and build time. With
+--catalogue the synthetic master's bullets are offered for the prefix
+(PROMPT_CATALOGUE=1); the "catalogue" column shows whether the builder took it.
+Counts come from tiktoken when installed, else from core.prompt's estimate.
+--check asserts the JD trim and the catalogue rules instead (see `check`) and
+exits 1 on failure.
+"""
+from __future__ import annotations
+import argparse
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from core.prompt import CACHE_MIN_TOKENS, CACHED_TOKEN_RATE, PromptBuilder, _encoding, count_tokens, trim_jd
+from scripts.synthetic import synthetic_jds, synthetic_master
+from utils.io import DATA, read_json
+
+BOILERPLATE = (" Benefits: medical, dental and vision, 401(k) match, paid time off. We are an equal opportunity employer"
+               " and consider all applicants without regard to race, color or religion. Apply now. Share this job.")
+
+
+def check(budget: int, tone: Any, allowed: List[Dict[str, Any]], catalogue: List[Dict[str, Any]]) -> int:
+    """Assert that over-budget JDs keep close to `budget` tokens (scraped text with no sentence
+    punctuation, a first segment longer than the budget), that the default builder never writes
+    bullets outside `allowed`, and that the catalogue is only taken when it is cheaper; return 1 on failure."""
+    rng = random.Random(0)
+    words = "python data pipelines kubernetes scalable services mentor engineers customers growth".split()
+    failures = []
+
+    def expect(ok: bool, what: str):
+        if not ok:
+            failures.append(what)
+
+    flat = " ".join(rng.choice(words) for _ in range(budget * 4))
+    text, total, kept = trim_jd(flat, budget, {"python", "kubernet"})
+    print(f"unpunctuated: {total} -> {kept} tokens")
+    expect(budget * 0.8 <= kept <= budget, "unpunctuated: keeps most of the budget")
+    expect(count_tokens(text) == kept, "unpunctuated: reported count matches the text")
+
+    title = "Senior Platform Engineer " + " ".join(rng.choice(words) for _ in range(budget * 3))
+    text, total, kept = trim_jd(f"{title} Responsibilities: write code.", budget)
+    print(f"long title:   {total} -> {kept} tokens")
+    expect(text.startswith("Senior Platform Engineer"), "long title: its first window is kept")
+    expect(budget * 0.8 <= kept <= budget, "long title: keeps most of the budget")
+
+    text, total, kept = trim_jd("Benefits: " + "paid time off, 401(k) match " * budget, budget)
+    print(f"boilerplate:  {total} -> {kept} tokens")
+    expect(0 < kept <= budget, "boilerplate only: not empty, within budget")
+
+    jd = synthetic_jds(1, n_chars=1500)[0]
+    outside = [b["text"] for b in catalogue if b["id"] not in {a["id"] for a in allowed}]
+    plain = PromptBuilder(jd_budget=budget).build(jd, allowed, tone, catalogue=catalogue)
+    prompt = "\n".join(m["content"] for m in plain["messages"])
+    print(f"default:      catalogue={plain['with_catalogue']} prompt={plain['prompt_tokens']}")
+    expect(not plain["with_catalogue"] and not any(t in prompt for t in outside),
+           "default: no bullets outside the allowed ones")
+    opted = PromptBuilder(jd_budget=budget, use_catalogue=True)
+    for n in (1500, 40000):
+        r = opted.build(synthetic_jds(1, n_chars=n)[0], allowed, tone, catalogue=catalogue)
+        p = opted.build(synthetic_jds(1, n_chars=n)[0], allowed, tone)
+        billed = r["prompt_tokens"] - (r["prefix_tokens"] * (1 - CACHED_TOKEN_RATE)
+                                       if r["with_catalogue"] and r["prefix_tokens"] >= CACHE_MIN_TOKENS else 0)
+        print(f"opt-in {n:>5}: catalogue={r['with_catalogue']} billed={billed:.0f} plain={p['prompt_tokens']}")
+        expect(billed <= p["prompt_tokens"], f"opt-in {n} chars: never costs more than the plain layout")
+
+    for what in failures:
+        print(f"FAILED {what}")
+    print("ok" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--chars", type=int, nargs="+", default=[1500, 5000, 15000, 40000], help="JD lengths")
+    ap.add_argument("--budget", type=int, default=1200, help="JD token budget")
+    ap.add_argument("--bullets", type=int, default=14, help="allowed bullets per prompt")
+    ap.add_argument("--catalogue", action="store_true", help="offer the master's bullet catalogue for the prefix")
+    ap.add_argument("--model", default="gpt-4o-mini")
+    ap.add_argument("--check", action="store_true", help="assert the JD trim on edge cases; exit 1 on failure")
+    args = ap.parse_args(argv)
+
+    tone = read_json(DATA / "tone_examples.json")
+    master = synthetic_master(max(args.bullets * 3, 60))
+    allowed = [{"id": b["id"], "text": b["text"], "meta": {"employer": it.get("employer"), "role": it.get("role")}}
+               for s in master["sections"] for it in s["items"] for b in it.get("bullets", [])]
+    if args.check:
+        sys.exit(check(args.budget, tone, allowed[:args.bullets], allowed))
+    catalogue = allowed if args.catalogue else None
+    allowed = allowed[:args.bullets]
+    builder = PromptBuilder(model=args.model, jd_budget=args.budget, use_catalogue=args.catalogue)
+    counter = "tiktoken" if _encoding(args.model) is not None else "estimate"
+    print(f"{args.bullets} bullets; JD budget {args.budget} tokens; counts: {counter}")
+    print(f"{'JD chars':>9} {'JD tokens':>10} {'old prompt':>11} {'new prompt':>11} {'prefix':>7} {'saved':>7} "
+          f"{'catalogue':>9} {'build ms':>9}")
+    for n in args.chars:
+        jd = synthetic_jds(1, n_chars=n)[0] + BOILERPLATE
+        t = time.perf_counter()
+        r = builder.build(jd, allowed, tone, catalogue=catalogue)
+        ms = (time.perf_counter() - t) * 1000
+        print(f"{n:>9} {r['jd_tokens']:>10} {r['baseline_tokens']:>11} {r['prompt_tokens']:>11} {r['prefix_tokens']:>7} "
+              f"{r['tokens_saved'] / r['baseline_tokens']:>6.0%} {'yes' if r['with_catalogue'] else 'no':>9} {ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
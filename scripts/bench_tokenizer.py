@@ -0,0 +1,95 @@
+# scripts/bench_tokenizer.py
+"""Micro-benchmark of JD keyword extraction and bullet tokenization on very long pages.
+
+    python -m scripts.bench_tokenizer --chars 50000 200000 --repeats 20
+
+Compares the previous regex-substitute + split + set-dedupe keyword extractor and
+`normalize_text(...).lower().split()` bullet tokenizer against utils.analyzer.
+Long JDs are synthetic job text padded with scraped-page noise (navigation,
+URLs, cookie banners). Reports latency, throughput and peak allocation.
+"""
+from __future__ import annotations
+import argparse
+import random
+import re
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from utils.analyzer import Analyzer
+from utils.text import normalize_text
+from scripts.synthetic import synthetic_jd, synthetic_master
+
+NOISE = [
+    "Home | Jobs | Companies | Salaries | Sign in", "https://example.com/careers/apply?ref=nav&utm_source=feed",
+    "We use cookies to improve your experience. Accept all cookies?", "© 2024 Example Corp. All rights reserved.",
+    "Share this job: LinkedIn · Twitter · Email", "Similar jobs near Springfield, IL (25 miles)",
+]
+
+
+def legacy_keywords(jd_text: str, top_k: int = 128) -> List[str]:
+    text = re.sub(r"[^A-Za-z0-9+/#&.,\- ]", " ", jd_text).lower()
+    seen, out = set(), []
+    for t in text.split():
+        if len(t) > 2 and t not in seen:
+            seen.add(t)
+            out.append(t)
+    return out[:top_k]
+
+
+def legacy_tokenize(text: str) -> List[str]:
+    return normalize_text(text).lower().split()
+
+
+def long_jd(rng: random.Random, n_chars: int) -> str:
+    parts, size = [], 0
+    while size < n_chars:
+        p = synthetic_jd(rng, 1200) if rng.random() < 0.5 else " ".join(rng.choices(NOISE, k=8))
+        parts.append(p)
+        size += len(p) + 1
+    return "\n".join(parts)
+
+
+def bench(fn: Callable[[], object], repeats: int) -> Tuple[float, int]:
+    fn()
+    t = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    per_call = (time.perf_counter() - t) / repeats
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return per_call, peak
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--chars", type=int, nargs="+", default=[50_000, 200_000])
+    ap.add_argument("--bullets", type=int, default=5000)
+    ap.add_argument("--repeats", type=int, default=20)
+    ap.add_argument("--stem", action="store_true")
+    args = ap.parse_args(argv)
+
+    analyzer = Analyzer(stem=args.stem)
+    rng = random.Random(0)
+    print(f"{'case':<34} {'ms':>9} {'MB/s':>8} {'peak KiB':>10}")
+    for n in args.chars:
+        jd = long_jd(rng, n)
+        mb = len(jd) / 1e6
+        for name, fn in (("legacy extract_keywords", lambda: legacy_keywords(jd)),
+                         ("analyzer.query_terms", lambda: analyzer.query_terms(jd, top_k=128))):
+            t, peak = bench(fn, args.repeats)
+            print(f"{name + f' ({len(jd) // 1000}k chars)':<34} {t * 1000:>9.2f} {mb / t:>8.1f} {peak / 1024:>10.0f}")
+
+    master = synthetic_master(args.bullets)
+    texts = [b["text"] for s in master["sections"] for it in s["items"] for b in it.get("bullets", [])]
+    mb = sum(map(len, texts)) / 1e6
+    for name, fn in (("legacy bullet tokenize", lambda: [legacy_tokenize(t) for t in texts]),
+                     ("analyzer.terms", lambda: [analyzer.terms(t) for t in texts])):
+        t, peak = bench(fn, max(1, args.repeats // 4))
+        print(f"{name + f' ({len(texts)} bullets)':<34} {t * 1000:>9.2f} {mb / t:>8.1f} {peak / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# scripts/bench_vector_index.py
+"""Recall and latency of the vector index backends against exact search.
+
+    python -m scripts.bench_vector_index --sizes 10000 100000 --dim 384 --k 40
+
+Vectors are synthetic unit vectors drawn around random topic centres (roughly how
+bullet embeddings cluster). "exact-argsort" is the previous full-sort path; every
+other row is compared to it for recall@k.
+"""
+from __future__ import annotations
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from core.vector_index import BruteForceIndex, IVFIndex, top_k_indices
+
+
+def clustered_vectors(n: int, dim: int, n_topics: int, rng: np.random.Generator, spread: float = 0.6) -> np.ndarray:
+    centres = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    x = centres[rng.integers(0, n_topics, size=n)] + spread * rng.standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def _percentiles(times: List[float]) -> Dict[str, float]:
+    ms = np.array(times) * 1000
+    return {"p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95))}
+
+
+def bench_size(n: int, dim: int, k: int, n_queries: int, probes: List[int], seed: int) -> List[Dict]:
+    rng = np.random.default_rng(seed)
+    emb = clustered_vectors(n, dim, n_topics=max(8, n // 500), rng=rng)
+    queries = clustered_vectors(n_queries, dim, n_topics=max(8, n // 500), rng=rng)
+
+    rows = []
+    truth, times = [], []
+    for q in queries:
+        t = time.perf_counter()
+        scores = emb @ q
+        idx = np.argsort(-scores)[:k]
+        times.append(time.perf_counter() - t)
+        truth.append(set(idx.tolist()))
+    rows.append({"n": n, "backend": "exact-argsort", "recall": 1.0, "build_s": 0.0, **_percentiles(times)})
+
+    brute = BruteForceIndex()
+    brute.build(emb)
+    times, recall = [], []
+    for q, t_set in zip(queries, truth):
+        t = time.perf_counter()
+        idx, _ = brute.search(q, k)
+        times.append(time.perf_counter() - t)
+        recall.append(len(t_set & set(idx.tolist())) / k)
+    rows.append({"n": n, "backend": "bruteforce", "recall": float(np.mean(recall)), "build_s": 0.0,
+                 **_percentiles(times)})
+
+    t = time.perf_counter()
+    ivf = IVFIndex(seed=seed)
+    ivf.build(emb)
+    build_s = time.perf_counter() - t
+    for n_probe in probes:
+        ivf.n_probe = n_probe
+        times, recall = [], []
+        for q, t_set in zip(queries, truth):
+            t = time.perf_counter()
+            idx, _ = ivf.search(q, k)
+            times.append(time.perf_counter() - t)
+            recall.append(len(t_set & set(idx.tolist())) / k)
+        rows.append({"n": n, "backend": f"ivf(lists={ivf.centroids.shape[0]},probe={n_probe})",
+                     "recall": float(np.mean(recall)), "build_s": build_s, **_percentiles(times)})
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--k", type=int, default=40)
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--probes", type=int, nargs="+", default=[4, 8, 16, 32])
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", default=None, help="also write rows to this JSON file")
+    args = ap.parse_args()
+
+    rows = []
+    for n in args.sizes:
+        rows.extend(bench_size(n, args.dim, args.k, args.queries, args.probes, args.seed))
+    print(f"{'n':>9}  {'backend':<28} {'recall@k':>8} {'p50 ms':>8} {'p95 ms':>8} {'build s':>8}")
+    for r in rows:
+        print(f"{r['n']:>9}  {r['backend']:<28} {r['recall']:>8.3f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['build_s']:>8.2f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# scripts/benchmark.py
+"""Reproducible benchmark of the retrieve -> diversify -> rerank -> export pipeline.
+
+    python -m scripts.benchmark --sizes 50 500 5000 50000 100000 --out out/bench/run.json
+    python -m scripts.benchmark --compare out/bench/before.json out/bench/after.json
+
+Synthetic master resumes (scripts/synthetic.py) are indexed at each size and each
+stage is timed separately over synthetic JDs, reporting p50/p95/mean latency,
+throughput and peak RSS. By default the embedding model and cross-encoder are the
+deterministic offline stand-ins from scripts/stub_models.py; pass --real-models to
+load EMBEDDING_MODEL / CROSS_ENCODER_MODEL instead.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from utils.io import OUT
+from core.retrieval import HybridRetriever, diversify
+from core.reranker import Reranker
+from core.export_docx import render_resume_docx, render_cover_letter_docx
+from scripts.synthetic import synthetic_master, synthetic_jds, synthetic_package
+from scripts.stub_models import HashingEmbedder, OverlapCrossEncoder
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def summarize(times: List[float], items: int = 1) -> Dict[str, float]:
+    ms = np.asarray(times) * 1000
+    total = float(np.sum(times))
+    return {
+        "n": len(times),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "mean_ms": float(ms.mean()),
+        "throughput_per_s": (len(times) * items / total) if total else 0.0,
+    }
+
+
+def timed(fn: Callable[[], Any]) -> float:
+    t = time.perf_counter()
+    fn()
+    return time.perf_counter() - t
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def make_models(real: bool):
+    if not real:
+        return HashingEmbedder(), OverlapCrossEncoder(), "stub"
+    from core.models import load_embedder, load_cross_encoder
+    embed_model = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    ce_model = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    return load_embedder(embed_model), load_cross_encoder(ce_model), f"{embed_model} + {ce_model}"
+
+
+def bench_size(n_bullets: int, jds: List[str], embedder, cross_encoder, args) -> Dict[str, Any]:
+    master = synthetic_master(n_bullets, seed=args.seed)
+    stages: Dict[str, Dict[str, float]] = {}
+
+    retriever = None
+    index_times = []
+    for _ in range(args.index_repeats):
+        retriever = HybridRetriever(embedding_model="benchmark", embedder=embedder,
+                                    vector_index=args.vector_index)
+        index_times.append(timed(lambda: retriever.index_from_master(master)))
+    stages["index_from_master"] = summarize(index_times, items=n_bullets)
+
+    reranker = Reranker(model_name="benchmark", model=cross_encoder)
+    search_t, div_t, mmr_t, rerank_t, rank_t, bulk_t = [], [], [], [], [], []
+    reranked_lists = []
+    for jd in jds:
+        hits = []
+        search_t.append(timed(lambda: hits.extend(retriever.search(jd, top_k=40))))
+        diversified = []
+        div_t.append(timed(lambda: diversified.extend(diversify(hits, k=24))))
+        pool = retriever.search(jd, top_k=500)
+        mmr_t.append(timed(lambda: retriever.diversify(pool, k=24, lambda_=0.7)))
+        reranked = []
+        rerank_t.append(timed(lambda: reranked.extend(reranker.rerank(jd, diversified, top_k=16))))
+        reranked_lists.append(reranked)
+        item_ids = list(dict.fromkeys(b.meta.get("item_id") for b in reranked))
+        for item_id in item_ids:
+            rank_t.append(timed(lambda: retriever.rank_item_bullets(item_id, jd)))
+        bulk_t.append(timed(lambda: retriever.rank_items_bullets(item_ids, jd)))
+    stages["search"] = summarize(search_t)
+    stages["diversify"] = summarize(div_t)
+    stages["diversify_mmr_500"] = summarize(mmr_t)
+    stages["rerank"] = summarize(rerank_t)
+    stages["rank_item_bullets"] = summarize(rank_t)
+    stages["rank_items_bullets"] = summarize(bulk_t)
+
+    profile = master["profile"]
+    resume_t, cl_t = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, reranked in enumerate(reranked_lists[: args.render_docs]):
+            pkg = synthetic_package(master, [b.text for b in reranked])
+            resume_t.append(timed(lambda: render_resume_docx(profile, pkg["resume"], Path(tmp) / f"r{i}.docx")))
+            cl_t.append(timed(lambda: render_cover_letter_docx(profile, pkg["cover_letter"], Path(tmp) / f"c{i}.docx")))
+    stages["render_resume_docx"] = summarize(resume_t)
+    stages["render_cover_letter_docx"] = summarize(cl_t)
+
+    return {"bullets": n_bullets, "stages": stages, "peak_rss_mb": peak_rss_mb()}
+
+
+def run(args) -> Dict[str, Any]:
+    embedder, cross_encoder, models = make_models(args.real_models)
+    jds = synthetic_jds(args.queries, seed=args.seed, n_chars=args.jd_chars)
+    results = []
+    for n in args.sizes:
+        print(f"[bench] {n} bullets…", file=sys.stderr, flush=True)
+        results.append(bench_size(n, jds, embedder, cross_encoder, args))
+    return {
+        "meta": {
+            "revision": args.label or git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "models": models,
+            "vector_index": args.vector_index,
+            "queries": args.queries,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"revision {report['meta']['revision']}  models: {report['meta']['models']}")
+    print(f"{'bullets':>8}  {'stage':<26} {'p50 ms':>9} {'p95 ms':>9} {'per s':>10}")
+    for r in report["results"]:
+        for name, s in r["stages"].items():
+            print(f"{r['bullets']:>8}  {name:<26} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['throughput_per_s']:>10.1f}")
+        print(f"{r['bullets']:>8}  {'peak RSS (MB)':<26} {r['peak_rss_mb']:>9.1f}")
+
+
+def compare(before_path: Path, after_path: Path):
+    before = json.loads(before_path.read_text(encoding="utf-8"))
+    after = json.loads(after_path.read_text(encoding="utf-8"))
+    print(f"{before['meta']['revision']} -> {after['meta']['revision']} (p50 ms, ratio > 1 is slower)")
+    old = {(r["bullets"], k): v for r in before["results"] for k, v in r["stages"].items()}
+    for r in after["results"]:
+        for name, s in r["stages"].items():
+            prev = old.get((r["bullets"], name))
+            if prev is None:
+                continue
+            ratio = s["p50_ms"] / prev["p50_ms"] if prev["p50_ms"] else float("inf")
+            print(f"{r['bullets']:>8}  {name:<26} {prev['p50_ms']:>9.2f} -> {s['p50_ms']:>9.2f}  x{ratio:.2f}")
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5_000, 50_000, 100_000])
+    ap.add_argument("--queries", type=int, default=20, help="synthetic JDs per size")
+    ap.add_argument("--jd-chars", type=int, default=2500)
+    ap.add_argument("--index-repeats", type=int, default=1)
+    ap.add_argument("--render-docs", type=int, default=10, help="documents rendered per size")
+    ap.add_argument("--vector-index", default="bruteforce")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--real-models", action="store_true", help="load EMBEDDING_MODEL/CROSS_ENCODER_MODEL")
+    ap.add_argument("--label", default=None, help="name for this run (default: git short sha)")
+    ap.add_argument("--out", type=Path, default=None, help="JSON report path (default: out/bench/<label>.json)")
+    ap.add_argument("--compare", type=Path, nargs=2, metavar=("BEFORE", "AFTER"), help="diff two reports and exit")
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args)
+    out = args.out or OUT / "bench" / f"{report['meta']['revision']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print_report(report)
+    print(f"[bench] wrote {out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# scripts/build_index.py
+"""Compile master_resume.json into the single-file retrieval index the app opens at startup.
+
+    python -m scripts.build_index
+    python -m scripts.build_index --master data/master_resume.json --out data/.cache/index/retrieval.idx
+    python -m scripts.build_index --check      # exit 1 if the artifact is missing or stale
+
+The app rebuilds a stale artifact itself (different model or edited master);
+running this ahead of deploys just moves that cost out of the first request.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from dotenv import load_dotenv
+
+from utils.io import read_json, DATA, CACHE
+from core.index_artifact import read_header
+from core.retrieval import HybridRetriever, _fingerprint
+from utils.analyzer import get_analyzer
+
+DEFAULT_INDEX = CACHE / "index" / "retrieval.idx"
+
+
+def main(argv: List[str] | None = None):
+    load_dotenv()
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--master", type=Path, default=DATA / "master_resume.json")
+    ap.add_argument("--out", type=Path, default=Path(os.getenv("INDEX_PATH") or DEFAULT_INDEX))
+    ap.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+    ap.add_argument("--check", action="store_true", help="only report whether the artifact is current")
+    args = ap.parse_args(argv)
+
+    master = read_json(args.master)
+    header = read_header(args.out)
+    # Same checks as HybridRetriever.open_index, so "current" means the app will use it
+    current = (bool(header) and header.get("model") == args.model and header.get("analyzer") == get_analyzer().signature
+               and header.get("content_hash") == _fingerprint(master))
+    if args.check:
+        print(f"{args.out}: {'current' if current else 'missing or stale'}")
+        sys.exit(0 if current else 1)
+
+    cache_dir = os.getenv("EMBEDDING_CACHE_DIR", str(CACHE / "embeddings"))
+    retriever = HybridRetriever(embedding_model=args.model, cache_dir=Path(cache_dir) if cache_dir else None)
+    t = time.perf_counter()
+    retriever.index_from_master(master)
+    retriever.save_index(args.out)
+    built = time.perf_counter() - t
+
+    t = time.perf_counter()
+    HybridRetriever(embedding_model=args.model, embedder=retriever.embed).open_index(args.out, master)
+    opened = time.perf_counter() - t
+    size = args.out.stat().st_size / 1024
+    print(f"{args.out}: {len(retriever._bullets)} bullets, {size:.1f} KiB, built in {built:.2f}s, opens in {opened * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
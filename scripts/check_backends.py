@@ -0,0 +1,111 @@
+# scripts/check_backends.py
+"""Compare an ONNX / int8 model backend against the fp32 PyTorch path.
+
+    python -m scripts.check_backends --backend int8
+    python -m scripts.check_backends --backend onnx --embedding-model sentence-transformers/all-MiniLM-L6-v2
+
+Each backend loads in its own process (so RSS deltas are not polluted by the
+other model) and encodes / scores the same bullets and JDs. Reports load time,
+encode/predict latency, speedup and memory delta, plus ranking agreement with
+fp32: mean top-k overlap of the dense search and of the cross-encoder ordering.
+Exits non-zero when the overlap falls below --min-overlap.
+"""
+from __future__ import annotations
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from scripts.synthetic import synthetic_master, synthetic_jds
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _worker(kind: str, spec: str, bullets: List[str], jds: List[str], repeats: int) -> Dict[str, Any]:
+    from core.models import load_embedder, load_cross_encoder
+    before = _rss_mb()
+    t = time.perf_counter()
+    model = load_embedder(spec) if kind == "embedder" else load_cross_encoder(spec)
+    load_s = time.perf_counter() - t
+    rss = _rss_mb() - before
+    times = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        if kind == "embedder":
+            docs = model.encode(bullets, normalize_embeddings=True, batch_size=64)
+            queries = model.encode(jds, normalize_embeddings=True)
+            out = queries @ docs.T
+        else:
+            pairs = [(jd, b) for jd in jds for b in bullets]
+            out = np.asarray(model.predict(pairs, batch_size=64)).reshape(len(jds), len(bullets))
+        times.append(time.perf_counter() - t)
+    return {"load_s": load_s, "rss_mb": rss, "run_s": float(np.median(times)), "scores": np.asarray(out, dtype=np.float32)}
+
+
+def _run(kind: str, spec: str, bullets: List[str], jds: List[str], repeats: int) -> Dict[str, Any]:
+    with mp.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_worker, (kind, spec, bullets, jds, repeats))
+
+
+def topk_overlap(ref: np.ndarray, got: np.ndarray, k: int) -> float:
+    k = min(k, ref.shape[1])
+    a = np.argsort(-ref, axis=1)[:, :k]
+    b = np.argsort(-got, axis=1)[:, :k]
+    return float(np.mean([len(set(x) & set(y)) / k for x, y in zip(a, b)]))
+
+
+def compare(kind: str, name: str, backend: str, bullets: List[str], jds: List[str], args) -> bool:
+    ref = _run(kind, name, bullets, jds, args.repeats)
+    got = _run(kind, f"{backend}:{name}", bullets, jds, args.repeats)
+    overlap = topk_overlap(ref["scores"], got["scores"], args.k)
+    drift = float(np.max(np.abs(ref["scores"] - got["scores"])))
+    ok = overlap >= args.min_overlap
+    print(f"{kind}: {name}")
+    print(f"  {'':<8} {'load s':>8} {'run ms':>9} {'RSS MB':>8}")
+    for label, r in (("fp32", ref), (backend, got)):
+        print(f"  {label:<8} {r['load_s']:>8.2f} {r['run_s'] * 1000:>9.1f} {r['rss_mb']:>8.1f}")
+    print(f"  speedup x{ref['run_s'] / got['run_s']:.2f}, memory saved {ref['rss_mb'] - got['rss_mb']:.1f} MB")
+    print(f"  top-{args.k} overlap {overlap:.3f} (min {args.min_overlap}), max |score diff| {drift:.4f}"
+          f"  {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--backend", choices=["onnx", "int8"], default="int8")
+    ap.add_argument("--embedding-model", default=os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+    ap.add_argument("--cross-encoder-model",
+                    default=os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"))
+    ap.add_argument("--bullets", type=int, default=500, help="synthetic bullets to embed")
+    ap.add_argument("--rerank-bullets", type=int, default=32, help="bullets scored per JD by the cross-encoder")
+    ap.add_argument("--queries", type=int, default=10)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--min-overlap", type=float, default=0.9)
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    from core.models import parse_model_spec
+    master = synthetic_master(args.bullets, seed=args.seed)
+    bullets = [b["text"] for s in master["sections"] for it in s["items"] for b in it.get("bullets", [])]
+    jds = synthetic_jds(args.queries, seed=args.seed, n_chars=1500)
+    ok = compare("embedder", parse_model_spec(args.embedding_model)[1], args.backend, bullets, jds, args)
+    ok &= compare("cross-encoder", parse_model_spec(args.cross_encoder_model)[1], args.backend,
+                  bullets[: args.rerank_bullets], jds, args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# scripts/check_reranker.py
+"""Assert the cross-encoder cascade and score cache behave as documented.
+
+    python -m scripts.check_reranker
+
+Uses the offline stand-in cross-encoder (scores by query-term overlap) on a
+hand-built candidate list in which the best match by the cross-encoder has
+the lowest hybrid score. Checks that:
+
+- the cascade never cuts the pool below `top_k + cascade_slack`, so that
+  candidate is still promoted when `cascade_n <= top_k`
+- with a larger pool and a decisive gap the cascade does skip candidates
+- a rerun of the same JD is served from the score cache
+
+Exits non-zero when a check fails.
+"""
+from __future__ import annotations
+import argparse
+import sys
+from typing import List
+
+from core.reranker import Reranker
+from core.retrieval import Bullet
+from scripts.stub_models import OverlapCrossEncoder
+
+JD = "kafka streaming platform engineer"
+
+
+def _pool(n: int) -> List[Bullet]:
+    """`n` filler bullets with falling hybrid rank, the last one matching the JD."""
+    bullets = [Bullet(id=f"b{i}", text=f"Organized team offsite number {i}", item={}) for i in range(n - 1)]
+    return bullets + [Bullet(id="match", text="Built kafka streaming platform", item={})]
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--top-k", type=int, default=16)
+    args = ap.parse_args(argv)
+    failures = []
+
+    def expect(ok: bool, what: str):
+        if not ok:
+            failures.append(what)
+
+    top_k = args.top_k
+    # Hybrid scores fall in steps of 0.2, so every gap is decisive for the default margin
+    cands = _pool(top_k + 8)
+    scores = [10.0 - 0.2 * i for i in range(len(cands))]
+    reranker = Reranker(model_name="check", model=OverlapCrossEncoder(), cascade_n=top_k)
+    ranked = reranker.rerank(JD, cands, top_k=top_k, scores=scores)
+    ids = [b.id for b in ranked]
+    print(f"cascade_n={top_k}, pool {len(cands)}: match at rank {ids.index('match') + 1 if 'match' in ids else None}, "
+          f"stats={reranker.stats}")
+    expect(bool(ranked) and ranked[0].id == "match", "low-hybrid, high cross-encoder candidate promoted to #1")
+    expect(reranker.stats["cascade_skipped"] == 0, "no cascade when the pool is not larger than top_k + slack")
+
+    big = _pool(4 * top_k)
+    big_scores = [10.0 - 0.2 * i for i in range(len(big))]
+    reranker = Reranker(model_name="check", model=OverlapCrossEncoder(), cascade_n=top_k)
+    ranked = reranker.rerank(JD, big, top_k=top_k, scores=big_scores)
+    n = top_k + reranker.cascade_slack
+    print(f"cascade_n={top_k}, pool {len(big)}: stats={reranker.stats}")
+    expect(reranker.stats["cascade_skipped"] == len(big) - n, f"cascade sends exactly top_k + slack = {n}")
+    expect(len(ranked) == top_k, "returns top_k results")
+
+    before = reranker.stats["model_pairs"]
+    again = reranker.rerank(JD, big, top_k=top_k, scores=big_scores)
+    expect(again == ranked and reranker.stats["model_pairs"] == before, "rerun served from the score cache")
+
+    for what in failures:
+        print(f"FAILED {what}")
+    print("ok" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
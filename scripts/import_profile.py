@@ -0,0 +1,67 @@
+# scripts/import_profile.py
+"""Import-time profile of the app's startup path.
+
+    python -m scripts.import_profile
+    python -m scripts.import_profile --modules sentence_transformers openai docx bs4 --top 15
+
+Runs `python -X importtime` in a fresh interpreter for the given modules (by
+default everything app.py imports before the first render) and prints the
+total plus the slowest top-level packages by cumulative time. The heavy
+packages that now load lazily are listed separately so a regression that pulls
+one back into startup shows up immediately.
+"""
+from __future__ import annotations
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+APP_STARTUP = ["dotenv", "streamlit", "utils.io", "core.jd_parser", "core.retrieval", "core.reranker", "core.session"]
+LAZY = ["sentence_transformers", "torch", "transformers", "openai", "docx", "bs4", "requests", "lxml"]
+
+
+def importtime(modules: List[str]) -> List[Tuple[int, int, str]]:
+    """(self us, cumulative us, dotted name) for every module imported."""
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(proc.stderr.strip().splitlines()[-1] if proc.stderr else f"import failed: {code}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = (p.strip() for p in line[len("import time:"):].split("|"))
+        rows.append((int(self_us), int(cum_us), name))
+    return rows
+
+
+def by_package(rows: List[Tuple[int, int, str]]) -> Dict[str, int]:
+    """Self time summed per top-level package (nested imports counted once)."""
+    totals: Dict[str, int] = defaultdict(int)
+    for self_us, _, name in rows:
+        totals[name.strip().split(".")[0]] += self_us
+    return totals
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--modules", nargs="+", default=APP_STARTUP)
+    ap.add_argument("--top", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    rows = importtime(args.modules)
+    total = sum(r[0] for r in rows)
+    print(f"import {' '.join(args.modules)}: {total / 1000:.1f} ms across {len(rows)} modules")
+    print(f"{'package':<28} {'self ms':>9} {'share':>7}")
+    for pkg, us in sorted(by_package(rows).items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"{pkg:<28} {us / 1000:>9.1f} {us / total:>7.1%}")
+
+    loaded = {r[2].strip().split(".")[0] for r in rows}
+    eager = [m for m in LAZY if m in loaded]
+    if eager:
+        print(f"\nloaded at startup but meant to be lazy: {', '.join(eager)}")
+
+
+if __name__ == "__main__":
+    main()
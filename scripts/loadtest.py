@@ -0,0 +1,136 @@
+# scripts/loadtest.py
+"""Load test: N concurrent app sessions against shared models, direct vs micro-batched.
+
+    python -m scripts.loadtest --sessions 1 4 8 16 --requests 20
+    python -m scripts.loadtest --sessions 8 --real-models
+
+Each simulated session is a thread that runs what the app does for a new JD
+(`RetrievalSession`: encode the query, hybrid search, MMR, cross-encoder
+rerank) over distinct synthetic JDs. "direct" calls the shared models from
+every session thread; "batched" routes them through core.scheduler. Reports
+throughput, p50/p95/p99 latency per session request and the mean batch size.
+
+The offline stand-in models are nearly free per call, so by default they are
+wrapped in a CPU cost model: every call burns `--call-ms` plus `--item-ms` per
+input of pure-Python CPU time, the way a real model pays tokenizer setup and
+framework dispatch per call. Pass --real-models to measure EMBEDDING_MODEL /
+CROSS_ENCODER_MODEL instead.
+"""
+from __future__ import annotations
+import argparse
+import threading
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from core.retrieval import HybridRetriever
+from core.reranker import Reranker
+from core.scheduler import BatchedCrossEncoder, BatchedEmbedder, batcher_stats
+from core.session import RetrievalSession
+from scripts.benchmark import make_models
+from scripts.synthetic import synthetic_jds, synthetic_master
+
+
+def _burn(ms: float):
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+class CostModel:
+    """Delegates encode/predict after burning call_ms + item_ms * inputs of CPU (holds the GIL, like a busy core)."""
+
+    def __init__(self, model: Any, call_ms: float, item_ms: float):
+        self.model = model
+        self.call_ms = call_ms
+        self.item_ms = item_ms
+
+    def encode(self, sentences, **kwargs):
+        _burn(self.call_ms + self.item_ms * (1 if isinstance(sentences, str) else len(sentences)))
+        return self.model.encode(sentences, **kwargs)
+
+    def predict(self, pairs, **kwargs):
+        _burn(self.call_ms + self.item_ms * len(pairs))
+        return self.model.predict(pairs, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+
+def run_mode(mode: str, n_sessions: int, jds: List[str], master, embedder, cross_encoder, args) -> Dict[str, Any]:
+    if mode == "batched":
+        embedder = BatchedEmbedder(embedder, max_wait_ms=args.wait_ms)
+        cross_encoder = BatchedCrossEncoder(cross_encoder, max_wait_ms=args.wait_ms)
+    retriever = HybridRetriever(embedding_model="loadtest", embedder=embedder)
+    retriever.index_from_master(master)
+    reranker = Reranker(model_name="loadtest", model=cross_encoder)
+    for m in (embedder, cross_encoder):
+        if hasattr(m, "batcher"):
+            m.batcher.reset_stats()  # report session traffic only, not the index build
+    latencies: List[float] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(n_sessions + 1)
+
+    def session(i: int):
+        mine = jds[i * args.requests:(i + 1) * args.requests]
+        barrier.wait()
+        for jd in mine:
+            t = time.perf_counter()
+            RetrievalSession(retriever, reranker, jd, mmr_lambda=0.7)
+            with lock:
+                latencies.append(time.perf_counter() - t)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(n_sessions)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    stats = batcher_stats(embedder, cross_encoder)
+    for m in (embedder, cross_encoder):
+        if hasattr(m, "close"):
+            m.close()
+    ms = np.asarray(latencies) * 1000
+    return {
+        "requests_per_s": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_batch": {k: v["mean_batch"] for k, v in stats.items()},
+    }
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 8, 16])
+    ap.add_argument("--requests", type=int, default=20, help="JDs per session")
+    ap.add_argument("--bullets", type=int, default=500)
+    ap.add_argument("--wait-ms", type=float, default=5.0, help="micro-batch max wait")
+    ap.add_argument("--call-ms", type=float, default=8.0, help="cost model: CPU per model call")
+    ap.add_argument("--item-ms", type=float, default=0.3, help="cost model: CPU per input")
+    ap.add_argument("--real-models", action="store_true")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    embedder, cross_encoder, models = make_models(args.real_models)
+    if not args.real_models:
+        embedder = CostModel(embedder, args.call_ms, args.item_ms)
+        cross_encoder = CostModel(cross_encoder, args.call_ms, args.item_ms)
+        models += f" (cost model: {args.call_ms} ms/call + {args.item_ms} ms/input)"
+    master = synthetic_master(args.bullets, seed=args.seed)
+    jds = synthetic_jds(max(args.sessions) * args.requests, seed=args.seed, n_chars=1500)
+    print(f"models: {models}; {args.bullets} bullets; max wait {args.wait_ms} ms")
+    print(f"{'sessions':>8} {'mode':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  mean batch")
+    for n in args.sessions:
+        for mode in ("direct", "batched"):
+            r = run_mode(mode, n, jds, master, embedder, cross_encoder, args)
+            batch = ", ".join(f"{k} {v}" for k, v in r["mean_batch"].items()) or "-"
+            print(f"{n:>8} {mode:>8} {r['requests_per_s']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                  f"{r['p99_ms']:>8.1f}  {batch}")
+
+
+if __name__ == "__main__":
+    main()
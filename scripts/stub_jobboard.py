@@ -0,0 +1,165 @@
+# scripts/stub_jobboard.py
+"""Local job-board fixture for exercising core.fetcher.
+
+    python -m scripts.stub_jobboard --port 8090 --latency 0.2
+    python -m scripts.stub_jobboard --check     # assert per-host limits, 304 reuse, fresh hits, errors
+
+`GET /jobs/<n>` returns a deterministic HTML job page (synthetic JD inside
+<main>, plus navigation/footer noise) with an ETag and Last-Modified header,
+and answers conditional requests with 304. `server.stats` records requests,
+304s and the peak number of requests in flight, so per-host limits and cache
+revalidation can be checked from a script.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from scripts.synthetic import synthetic_jd
+
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+def job_page(n: int) -> bytes:
+    jd = synthetic_jd(random.Random(n), 2500)
+    nav = " | ".join(["Home", "Jobs", "Companies", "Salaries", "Sign in"])
+    return (f"<html><head><title>Job {n}</title></head><body><nav>{nav}</nav>"
+            f"<main><h1>Job {n}</h1><p>{jd}</p></main>"
+            f"<footer>© 2024 Stub Board · Cookies · Privacy</footer></body></html>").encode("utf-8")
+
+
+def make_handler(latency: float, stats: dict):
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            with lock:
+                stats["requests"] += 1
+                stats["in_flight"] += 1
+                stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+            try:
+                time.sleep(latency)
+                parts = self.path.strip("/").split("/")
+                if len(parts) != 2 or parts[0] != "jobs" or not parts[1].isdigit():
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = job_page(int(parts[1]))
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    with lock:
+                        stats["not_modified"] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", LAST_MODIFIED)
+                self.end_headers()
+                self.wfile.write(body)
+            finally:
+                with lock:
+                    stats["in_flight"] -= 1
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8090, latency: float = 0.1) -> ThreadingHTTPServer:
+    """Start the fixture in a daemon thread; `server.stats` holds the counters, `.shutdown()` stops it."""
+    stats = {"requests": 0, "not_modified": 0, "in_flight": 0, "peak_in_flight": 0}
+    server = ThreadingHTTPServer((host, port), make_handler(latency, stats))
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def check(port: int, latency: float, n: int, per_host: int = 4) -> int:
+    """Fetch `n` pages cold, revalidated (304) and fresh from cache, plus a few failing URLs;
+    print each phase and return 1 if any expectation fails."""
+    from core.fetcher import JDFetcher, PageCache
+    server = serve(port=port, latency=latency)
+    stats = server.stats
+    urls = [f"http://127.0.0.1:{port}/jobs/{i}" for i in range(n)]
+    failures = []
+
+    def expect(ok: bool, what: str):
+        if not ok:
+            failures.append(what)
+
+    def phase(label: str, fetcher: JDFetcher, batch):
+        t = time.perf_counter()
+        texts = fetcher.fetch_many(batch)
+        print(f"{label:<11} {sum(1 for x in texts if x)}/{len(batch)} pages in {time.perf_counter() - t:.2f}s  "
+              f"server={stats}  fetcher={fetcher.stats}")
+        return texts
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = JDFetcher(cache_dir=Path(tmp), concurrency=8, per_host=per_host, min_interval=0.0, max_age=0)
+        cold = phase("cold", fetcher, urls)
+        expect(all(x and "Job" in x for x in cold), "cold: every page fetched")
+        expect(stats["requests"] == n and fetcher.stats["downloaded"] == n, "cold: one download per page")
+        expect(stats["peak_in_flight"] <= per_host, f"cold: peak in flight {stats['peak_in_flight']} <= per_host")
+
+        # An unknown charset in a cached entry must not break revalidation
+        meta_path, _ = PageCache(Path(tmp))._paths(urls[0])
+        meta_path.write_text(meta_path.read_text(encoding="utf-8").replace('"utf-8"', '"no-such-charset"'),
+                             encoding="utf-8")
+        requests_before = stats["requests"]
+        again = phase("revalidate", fetcher, urls)
+        expect(again == cold, "revalidate: same text from the cached bodies")
+        expect(stats["not_modified"] == n and fetcher.stats["not_modified"] == n, "revalidate: every page answered 304")
+        expect(fetcher.stats["downloaded"] == n, "revalidate: nothing re-downloaded")
+        expect(stats["requests"] - requests_before == n, "revalidate: one conditional request per page")
+        fetcher.close()
+
+        fresh_fetcher = JDFetcher(cache_dir=Path(tmp), concurrency=8, per_host=per_host, min_interval=0.0)
+        requests_before = stats["requests"]
+        fresh = phase("fresh", fresh_fetcher, urls)
+        expect(fresh == cold and fresh_fetcher.stats["fresh"] == n, "fresh: every page served from disk")
+        expect(stats["requests"] == requests_before, "fresh: no requests")
+
+        # Failures stay per URL: a 404 and a refused connection next to good pages
+        bad = [f"http://127.0.0.1:{port}/nope", "http://127.0.0.1:9/jobs/1"]
+        mixed = phase("errors", fresh_fetcher, bad + urls[:2])
+        expect(mixed[:2] == [None, None] and all(mixed[2:]), "errors: failing URLs give None, others still fetched")
+        fresh_fetcher.close()
+    server.shutdown()
+    for what in failures:
+        print(f"FAILED {what}")
+    print("ok" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8090)
+    ap.add_argument("--latency", type=float, default=0.1)
+    ap.add_argument("--check", action="store_true", help="run the fetcher against the fixture; exit 1 on failure")
+    ap.add_argument("--pages", type=int, default=40)
+    args = ap.parse_args()
+    if args.check:
+        sys.exit(check(args.port, args.latency, args.pages))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.latency, {
+        "requests": 0, "not_modified": 0, "in_flight": 0, "peak_in_flight": 0}))
+    print(f"stub job board on http://{args.host}:{args.port}/jobs/<n>")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
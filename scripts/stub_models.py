@@ -0,0 +1,57 @@
+# scripts/stub_models.py
+"""Deterministic, offline stand-ins for SentenceTransformer and CrossEncoder.
+
+They expose the subset of the real APIs the pipeline calls (`encode`, `predict`),
+so benchmarks and load tests run without downloading models. Scores are only
+loosely meaningful (hashed bag-of-words / token overlap); timings of everything
+around the model are real.
+"""
+from __future__ import annotations
+import re
+import zlib
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class HashingEmbedder:
+    """Feature-hashed bag of words (crc32 buckets with signs) -> dense float32 vectors."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, sentences, normalize_embeddings: bool = False, batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for tok in _tokens(text):
+                h = zlib.crc32(tok.encode("utf-8"))
+                out[i, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True) + 1e-12
+        return out[0] if single else out
+
+
+class OverlapCrossEncoder:
+    """Scores (query, passage) pairs by the share of passage tokens found in the query."""
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        cache = {}
+        scores = np.zeros(len(pairs), dtype=np.float32)
+        for i, (query, passage) in enumerate(pairs):
+            q = cache.get(query)
+            if q is None:
+                q = cache[query] = set(_tokens(query))
+            p = _tokens(passage)
+            scores[i] = sum(t in q for t in p) / (len(p) or 1)
+        return scores
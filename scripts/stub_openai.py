@@ -0,0 +1,144 @@
+# scripts/stub_openai.py
+"""Local stand-in for the OpenAI chat completions endpoint.
+
+    python -m scripts.stub_openai --port 8089 --latency 0.5 --rate-limit-every 5
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=stub python batch.py jds.jsonl
+
+Every request gets the same canned package after `--latency` seconds (streamed in
+small deltas when the request sets "stream"); every Nth
+request is answered with 429 + Retry-After so retry/backoff paths get exercised.
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PACKAGE = {
+    "resume": {"headline": "Builder who ships reliable products end to end.", "sections": []},
+    "cover_letter": {
+        "greeting": "Hiring Team",
+        "body_paragraphs": ["First paragraph from the stub server.", "Second paragraph from the stub server."],
+        "closing": "Sincerely,",
+        "signature": "",
+    },
+}
+
+
+def _usage(req: dict, content: str) -> dict:
+    # Rough token estimate (~4 characters per token) so usage reporting can be exercised
+    prompt = sum(len(m.get("content") or "") for m in req.get("messages", [])) // 4
+    completion = len(content) // 4
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def make_handler(latency: float, rate_limit_every: int, retry_after: float):
+    counter = itertools.count(1)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so client connection pooling is observable
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: dict, headers: dict | None = None):
+            raw = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def _stream(self, req: dict, n: int):
+            # Server-sent events, one small content delta per event, spread over `latency`.
+            content = json.dumps(PACKAGE)
+            pieces = [content[i:i + 8] for i in range(0, len(content), 8)]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def chunk(data: str):
+                raw = data.encode("utf-8")
+                self.wfile.write(f"{len(raw):x}\r\n".encode() + raw + b"\r\n")
+                self.wfile.flush()
+
+            for piece in pieces:
+                time.sleep(latency / len(pieces))
+                event = {
+                    "id": f"chatcmpl-stub-{n}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": req.get("model", "stub"),
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                chunk(f"data: {json.dumps(event)}\n\n")
+            if (req.get("stream_options") or {}).get("include_usage"):
+                event = {"id": f"chatcmpl-stub-{n}", "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": req.get("model", "stub"), "choices": [], "usage": _usage(req, content)}
+                chunk(f"data: {json.dumps(event)}\n\n")
+            chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            req = json.loads(self.rfile.read(length) or b"{}")
+            with lock:
+                n = next(counter)
+            if not self.path.endswith("/chat/completions"):
+                self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+                return
+            if rate_limit_every and n % rate_limit_every == 0:
+                self._send(429, {"error": {"message": "rate limited", "type": "rate_limit_error"}},
+                           {"Retry-After": str(retry_after)})
+                return
+            if req.get("stream"):
+                self._stream(req, n)
+                return
+            time.sleep(latency)
+            self._send(200, {
+                "id": f"chatcmpl-stub-{n}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": req.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": json.dumps(PACKAGE)},
+                    "finish_reason": "stop",
+                }],
+                "usage": _usage(req, json.dumps(PACKAGE)),
+            })
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8089, latency: float = 0.2,
+          rate_limit_every: int = 0, retry_after: float = 0.1) -> ThreadingHTTPServer:
+    """Start the stub in a daemon thread and return the server (call `.shutdown()` to stop)."""
+    server = ThreadingHTTPServer((host, port), make_handler(latency, rate_limit_every, retry_after))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--latency", type=float, default=0.2, help="seconds to wait before answering")
+    ap.add_argument("--rate-limit-every", type=int, default=0, help="answer every Nth request with 429")
+    ap.add_argument("--retry-after", type=float, default=0.1)
+    args = ap.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port),
+                                 make_handler(args.latency, args.rate_limit_every, args.retry_after))
+    print(f"stub OpenAI server on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
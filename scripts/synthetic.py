@@ -0,0 +1,119 @@
+# scripts/synthetic.py
+"""Deterministic synthetic master resumes and job descriptions for benchmarks."""
+from __future__ import annotations
+import random
+from typing import Any, Dict, List
+
+VERBS = [
+    "Built", "Designed", "Led", "Launched", "Automated", "Scaled", "Migrated", "Optimized", "Negotiated",
+    "Shipped", "Managed", "Analyzed", "Implemented", "Refactored", "Coordinated", "Mentored", "Reduced",
+]
+OBJECTS = [
+    "data pipelines", "customer onboarding flows", "pricing experiments", "live event productions",
+    "ETL jobs", "REST APIs", "marketing campaigns", "sales playbooks", "dashboards", "ML models",
+    "mobile apps", "CI/CD pipelines", "vendor contracts", "support workflows", "search ranking",
+    "recommendation systems", "billing integrations", "A/B tests", "SQL warehouses", "inventory systems",
+]
+TOOLS = [
+    "Python", "SQL", "React", "TypeScript", "AWS", "GCP", "Kubernetes", "Docker", "Airflow", "Spark",
+    "Tableau", "Figma", "Salesforce", "HubSpot", "Excel", "PyTorch", "FastAPI", "Postgres", "Shopify", "Canva",
+]
+OUTCOMES = [
+    "cutting latency by {n}%", "growing revenue {n}%", "saving {n} hours per week", "for {n}+ clients",
+    "reducing churn {n}%", "serving {n}k daily users", "lifting conversion {n}%", "across {n} teams",
+]
+DOMAINS = ["Fintech", "E-commerce", "Events", "Healthcare", "Logistics", "Media", "SaaS", "Education"]
+ROLES = ["Software Engineer", "Product Manager", "Data Analyst", "Event Manager", "Growth Lead", "Consultant"]
+JD_FILLER = [
+    "You will partner with cross-functional teams to deliver measurable outcomes.",
+    "We value ownership, clear communication and a bias for action.",
+    "The ideal candidate thrives in ambiguity and enjoys mentoring others.",
+    "Benefits include flexible hours, health coverage and a learning budget.",
+]
+
+
+def _bullet_text(rng: random.Random) -> str:
+    tools = rng.sample(TOOLS, 2)
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(5, 95))
+    return f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} with {tools[0]} and {tools[1]}, {outcome}."
+
+
+def synthetic_master(n_bullets: int, seed: int = 0, bullets_per_item: int = 6) -> Dict[str, Any]:
+    """Master resume JSON shaped like data/master_resume.json with `n_bullets` bullets."""
+    rng = random.Random(seed)
+    exp_items, proj_items = [], []
+    n_items = max(1, -(-n_bullets // bullets_per_item))
+    made = 0
+    for i in range(n_items):
+        bullets = []
+        for j in range(min(bullets_per_item, n_bullets - made)):
+            bullets.append({
+                "id": f"b_{i}_{j}",
+                "primary": j == 0,
+                "text": _bullet_text(rng),
+                "skills": rng.sample(TOOLS, 3),
+                "domains": rng.sample(DOMAINS, 2),
+            })
+        made += len(bullets)
+        start = rng.randint(2010, 2023)
+        dates = {"start": f"{rng.randint(1, 12):02d}/{start}", "end": f"{rng.randint(1, 12):02d}/{start + rng.randint(1, 3)}"}
+        if i % 4 == 3:
+            proj_items.append({"id": f"proj_{i}", "name": f"Project {i}", "dates": dates, "bullets": bullets})
+        else:
+            exp_items.append({
+                "id": f"exp_{i}",
+                "employer": f"Company {i % 97}",
+                "location": "Remote",
+                "dates": dates,
+                "role": rng.choice(ROLES),
+                "bullets": bullets,
+            })
+    return {
+        "profile": {
+            "full_name": "Sam Synthetic",
+            "contact": {"email": "sam@example.com", "phone": "(555) 010-0000", "city": "Springfield",
+                        "links": [{"label": "Portfolio", "url": "example.com"}]},
+        },
+        "sections": [
+            {"id": "exp", "title": "Work Experience", "items": exp_items},
+            {"id": "projects", "title": "Projects", "items": proj_items},
+            {"id": "education", "title": "Education", "items": [
+                {"id": "edu_1", "institution": "State University", "credential": "B.Sc.",
+                 "dates": {"start": "2006", "end": "2010"}},
+            ]},
+        ],
+    }
+
+
+def synthetic_jd(rng: random.Random, n_chars: int = 2500) -> str:
+    role = rng.choice(ROLES)
+    parts = [f"{role} – {rng.choice(DOMAINS)}", "Responsibilities"]
+    while sum(len(p) for p in parts) < n_chars:
+        r = rng.random()
+        if r < 0.4:
+            parts.append(f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(TOOLS)}.")
+        elif r < 0.7:
+            parts.append(f"Experience with {', '.join(rng.sample(TOOLS, 3))}.")
+        else:
+            parts.append(rng.choice(JD_FILLER))
+        if rng.random() < 0.05:
+            parts.append(rng.choice(["Requirements", "Qualifications"]))
+    return " ".join(parts)
+
+
+def synthetic_jds(n: int, seed: int = 0, n_chars: int = 2500) -> List[str]:
+    rng = random.Random(seed + 1)
+    return [synthetic_jd(rng, n_chars) for _ in range(n)]
+
+
+def synthetic_package(master: Dict[str, Any], bullets: List[str], n_paragraphs: int = 4) -> Dict[str, Any]:
+    """Resume/cover-letter structs like build_resume_struct/build_cover_letter_struct produce."""
+    items = [{"employer": "Company 1", "role": "Software Engineer", "location": "Remote", "dates": "2020–2023",
+              "bullets": bullets[i:i + 4]} for i in range(0, len(bullets), 4)]
+    return {
+        "resume": {"headline": "Engineer who ships measurable results.",
+                   "sections": [{"title": "Work Experience", "items": items}]},
+        "cover_letter": {"greeting": "Hiring Team", "closing": "Sincerely,",
+                         "signature": master["profile"]["full_name"],
+                         "body_paragraphs": [" ".join(bullets[:3]) or "Paragraph."] * n_paragraphs},
+    }
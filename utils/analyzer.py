@@ -0,0 +1,104 @@
+# utils/analyzer.py
+"""Shared text analyzer for BM25 indexing and JD queries.
+
+Both sides go through the same `Analyzer`, so a bullet token and a JD token
+match exactly when they should: "Python," and "python" are one term, while
+"c++", "c#", "node.js" and "ci/cd" stay intact.
+
+The text is lowercased and whitespace-split in C; each distinct raw token is
+then cleaned once (precompiled `findall`, stopword filter, optional light
+stemming) and memoized, so per-token Python work on long scraped JDs is a dict
+lookup. Query terms are counted on the raw split with `Counter` and only the
+distinct tokens are cleaned.
+"""
+from __future__ import annotations
+import math
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# A term starts on a letter/digit; + # & . / ' - may follow (trailing . & / ' - are stripped)
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#&./'-]*")
+_TRAILING = ".&/'-"
+
+STOPWORDS: FrozenSet[str] = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each either etc few for from further had has
+have having he her here hers herself him himself his how i if in into is it its itself just may me might
+more most must my myself no nor not now of off on once only or other our ours ourselves out over own per
+same shall she should so some such than that the their theirs them themselves then there these they this
+those through to too under until up upon us very via was we were what when where which while who whom why
+will with within without would you your yours yourself yourselves
+""".split())
+
+
+@lru_cache(maxsize=65536)
+def light_stem(term: str) -> str:
+    """Conservative suffix stripping (plurals, -ing, -ed); leaves short terms and symbols alone."""
+    if len(term) <= 3 or not term.isalpha():
+        return term
+    if term.endswith("ies") and len(term) > 4:
+        return term[:-3] + "y"
+    if term.endswith("sses"):
+        return term[:-2]
+    if term.endswith("ing") and len(term) > 5:
+        return term[:-3]
+    if term.endswith("ed") and len(term) > 4:
+        return term[:-2]
+    if term.endswith("s") and not term.endswith(("ss", "us", "is")):
+        return term[:-1]
+    return term
+
+
+class Analyzer:
+    def __init__(self, stopwords: FrozenSet[str] = STOPWORDS, min_len: int = 2, stem: bool = False):
+        self.stopwords = stopwords
+        self.min_len = min_len
+        self.stem = stem
+        self._clean = lru_cache(maxsize=1 << 17)(self._clean_token)
+
+    @property
+    def signature(self) -> str:
+        """Identifies the analysis settings; indexes built with a different signature are stale."""
+        return f"v1:min{self.min_len}:stop{len(self.stopwords)}:{'stem' if self.stem else 'nostem'}"
+
+    def _clean_token(self, raw: str) -> Tuple[str, ...]:
+        """Terms inside one whitespace-delimited lowercase token ("(aws/gcp)," -> ("aws/gcp",))."""
+        out = []
+        for t in TOKEN_RE.findall(raw):
+            t = t.rstrip(_TRAILING)
+            if len(t) >= self.min_len and t not in self.stopwords:
+                out.append(light_stem(t) if self.stem else t)
+        return tuple(out)
+
+    def terms(self, text: str) -> List[str]:
+        """Index/query terms in document order (duplicates kept)."""
+        if not text:
+            return []
+        clean = self._clean
+        return [t for raw in text.lower().split() for t in clean(raw)]
+
+    def query_terms(self, text: str, top_k: int = 128) -> List[Tuple[str, float]]:
+        """Distinct query terms weighted 1 + log(tf), heaviest first (ties keep first occurrence)."""
+        if not text:
+            return []
+        clean = self._clean
+        counts: Dict[str, int] = {}
+        for raw, c in Counter(text.lower().split()).items():
+            for t in clean(raw):
+                counts[t] = counts.get(t, 0) + c
+        ranked = sorted(counts.items(), key=lambda kv: -kv[1])[:top_k]
+        return [(t, 1.0 + math.log(c)) for t, c in ranked]
+
+
+_default: Optional[Analyzer] = None
+
+
+def get_analyzer() -> Analyzer:
+    """Process-wide analyzer; set BM25_STEM=1 to enable stemming."""
+    global _default
+    if _default is None:
+        _default = Analyzer(stem=os.getenv("BM25_STEM", "0").lower() in ("1", "true", "yes"))
+    return _default
@@ -4,6 +4,7 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 DATA = ROOT / "data"
 OUT = ROOT / "out"
+CACHE = DATA / ".cache"
 OUT.mkdir(exist_ok=True)
 
 
@@ -1,6 +1,8 @@
 import re
 from typing import List
 
+from utils.analyzer import get_analyzer
+
 WHITESPACE_RE = re.compile(r"\s+")
 
 def normalize_text(s: str) -> str:
@@ -12,17 +14,5 @@ def normalize_text(s: str) -> str:
 
 
 def extract_keywords(jd_text: str, top_k: int = 64) -> List[str]:
-    """Very lightweight keyword extractor: dedup lowercased tokens >2 chars.
-    Enough for MVP hybrid retrieval. Swap with spaCy/Rake/KeyBERT later.
-    """
-    if not jd_text:
-        return []
-    text = re.sub(r"[^A-Za-z0-9+/#&.,\- ]", " ", jd_text).lower()
-    tokens = [t for t in text.split() if len(t) > 2]
-    seen = set()
-    keywords = []
-    for t in tokens:
-        if t not in seen:
-            seen.add(t)
-            keywords.append(t)
-    return keywords[:top_k]
\ No newline at end of file
+    """Distinct JD terms, most frequent first (stopwords dropped; see utils.analyzer)."""
+    return [t for t, _ in get_analyzer().query_terms(jd_text, top_k=top_k)]
\ No newline at end of file
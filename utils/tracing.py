@@ -0,0 +1,342 @@
+# utils/tracing.py
+"""Lightweight spans for the JD -> resume pipeline.
+
+    with span("retrieval.bm25", terms=len(terms)) as s:
+        scores = ...
+        s["docs"] = len(scores)
+
+    @traced("llm.parse_json")
+    def _parse_json(content): ...
+
+A finished span becomes a record {"name", "ms", "ts", "parent", **attrs} that
+goes to every registered sink (`add_sink`) and to the innermost `collect()`
+block in the current context (the app uses that for its per-run breakdown).
+With no sinks and no collector a span only yields its attrs dict.
+
+Sinks: `HistogramSink` (in-process latency histograms plus totals of numeric
+attrs such as token counts), `JsonLogSink` (one JSON line per span) and
+`PrometheusSink` (the histograms rendered to a text-format file for a
+node_exporter textfile collector). `configure_from_env` reads TRACE_SINKS, e.g.
+
+    TRACE_SINKS=histogram,jsonl:out/trace.jsonl,prom:out/metrics.prom
+
+(paths default to out/trace.jsonl and out/metrics.prom).
+"""
+from __future__ import annotations
+import atexit
+import bisect
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, IO, Iterator, List, Optional, TypeVar, Union
+
+from .io import OUT
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Upper bounds (ms) of the latency buckets; the last bucket is +Inf
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_parent: ContextVar[Optional[str]] = ContextVar("trace_parent", default=None)
+_collector: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("trace_collector", default=None)
+_sinks: List["Sink"] = []
+_sinks_lock = threading.Lock()
+_log = logging.getLogger(__name__)
+_failing: set = set()  # ids of sinks whose failure was already logged
+
+
+class Sink:
+    def emit(self, record: Dict[str, Any]):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+
+def add_sink(sink: Sink) -> Sink:
+    with _sinks_lock:
+        _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink: Sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+def sinks() -> List[Sink]:
+    return list(_sinks)
+
+
+def emit(name: str, ms: float, **attrs: Any):
+    """Record an already-measured span (e.g. time to first streamed token)."""
+    collector = _collector.get()
+    if not _sinks and collector is None:
+        return
+    record = {"name": name, "ms": ms, "ts": time.time(), "parent": _parent.get(), **attrs}
+    if collector is not None:
+        collector.append(record)
+    for sink in list(_sinks):
+        # Spans close inside instrumented code: a failing sink must never fail the pipeline
+        try:
+            sink.emit(record)
+        except Exception:
+            if id(sink) not in _failing:
+                _failing.add(id(sink))
+                _log.warning("trace sink %s failed (further errors not logged)", type(sink).__name__, exc_info=True)
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "_t0", "_token")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> Dict[str, Any]:
+        self._token = _parent.set(self.name)
+        self._t0 = time.perf_counter()
+        return self.attrs
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        ms = (time.perf_counter() - self._t0) * 1000
+        _parent.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        emit(self.name, ms, **self.attrs)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ("attrs",)
+
+    def __init__(self, attrs: Dict[str, Any]):
+        self.attrs = attrs
+
+    def __enter__(self) -> Dict[str, Any]:
+        return self.attrs
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+def span(name: str, **attrs: Any) -> ContextManager[Dict[str, Any]]:
+    """Time the block; attrs (plus anything set on the yielded dict) travel with the record."""
+    if not _sinks and _collector.get() is None:
+        return _NoSpan(attrs)
+    return _Span(name, attrs)
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator form of `span`; the span is named after the function unless `name` is given."""
+    def wrap(fn: F) -> F:
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+        return inner  # type: ignore[return-value]
+    return wrap
+
+
+@contextmanager
+def collect() -> Iterator[List[Dict[str, Any]]]:
+    """Capture the records of every span finished in this context (not in worker threads)."""
+    records: List[Dict[str, Any]] = []
+    token = _collector.set(records)
+    try:
+        yield records
+    finally:
+        _collector.reset(token)
+
+
+def start_collecting() -> List[Dict[str, Any]]:
+    """`collect()` for code that cannot wrap a block (a Streamlit script run): collects until called again."""
+    records: List[Dict[str, Any]] = []
+    _collector.set(records)
+    return records
+
+
+def summarize(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per span name (first-seen order): calls, total/mean/max ms and summed numeric attrs."""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for r in records:
+        row = rows.setdefault(r["name"], {"span": r["name"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+        row["calls"] += 1
+        row["total_ms"] += r["ms"]
+        row["max_ms"] = max(row["max_ms"], r["ms"])
+        for k, v in r.items():
+            if k not in ("name", "ms", "ts") and isinstance(v, (int, float)) and not isinstance(v, bool):
+                row[k] = row.get(k, 0) + v
+    for row in rows.values():
+        row["mean_ms"] = row["total_ms"] / row["calls"]
+    return list(rows.values())
+
+
+class HistogramSink(Sink):
+    """Latency histogram (BUCKETS_MS) and numeric-attr totals per span name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans: Dict[str, Dict[str, Any]] = {}
+
+    def emit(self, record: Dict[str, Any]):
+        with self._lock:
+            h = self.spans.get(record["name"])
+            if h is None:
+                h = self.spans[record["name"]] = {"count": 0, "sum_ms": 0.0,
+                                                  "buckets": [0] * (len(BUCKETS_MS) + 1), "totals": {}}
+            h["count"] += 1
+            h["sum_ms"] += record["ms"]
+            h["buckets"][bisect.bisect_left(BUCKETS_MS, record["ms"])] += 1
+            for k, v in record.items():
+                if k not in ("name", "ms", "ts") and isinstance(v, (int, float)) and not isinstance(v, bool):
+                    h["totals"][k] = h["totals"].get(k, 0) + v
+
+    def quantile(self, name: str, q: float) -> float:
+        """Bucket upper bound containing quantile q (ms); inf when it falls in the overflow bucket."""
+        with self._lock:
+            h = self.spans.get(name)
+            if not h or not h["count"]:
+                return 0.0
+            target, seen = q * h["count"], 0
+            for i, n in enumerate(h["buckets"]):
+                seen += n
+                if seen >= target:
+                    return BUCKETS_MS[i] if i < len(BUCKETS_MS) else float("inf")
+        return float("inf")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            names = list(self.spans)
+        out = {}
+        for name in names:
+            h = self.spans[name]
+            out[name] = {"count": h["count"], "mean_ms": h["sum_ms"] / h["count"],
+                         "p50_ms": self.quantile(name, 0.5), "p95_ms": self.quantile(name, 0.95), **h["totals"]}
+        return out
+
+
+class JsonLogSink(Sink):
+    """One JSON object per span, appended to a file path or written to an open stream."""
+
+    def __init__(self, target: Union[str, Path, IO[str]]):
+        self._lock = threading.Lock()
+        if isinstance(target, (str, Path)):
+            Path(target).parent.mkdir(parents=True, exist_ok=True)
+            self._f: IO[str] = open(target, "a", encoding="utf-8")
+            self._owned = True
+        else:
+            self._f, self._owned = target, False
+
+    def emit(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._f.write(line + "\n")
+            self._f.flush()
+
+    def flush(self):
+        with self._lock:
+            self._f.flush()
+
+    def close(self):
+        if self._owned:
+            self._f.close()
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PrometheusSink(HistogramSink):
+    """HistogramSink rewritten as a Prometheus text-format file at most every `interval` seconds."""
+
+    def __init__(self, path: Union[str, Path], interval: float = 5.0, prefix: str = "appassist"):
+        super().__init__()
+        self.path = Path(path)
+        self.interval = interval
+        self.prefix = prefix
+        self._last_write = 0.0
+        self._write_lock = threading.Lock()
+
+    def emit(self, record: Dict[str, Any]):
+        super().emit(record)
+        # One writer at a time; threads that find a write in progress just skip it
+        if time.monotonic() - self._last_write >= self.interval and self._write_lock.acquire(blocking=False):
+            try:
+                if time.monotonic() - self._last_write >= self.interval:
+                    self._write()
+            finally:
+                self._write_lock.release()
+
+    def render(self) -> str:
+        p = self.prefix
+        lines = [f"# HELP {p}_span_seconds Pipeline stage latency.", f"# TYPE {p}_span_seconds histogram"]
+        totals = []
+        with self._lock:
+            for name, h in sorted(self.spans.items()):
+                lbl = _label(name)
+                cum = 0
+                for bound, n in zip(BUCKETS_MS + (float("inf"),), h["buckets"]):
+                    cum += n
+                    le = "+Inf" if bound == float("inf") else repr(bound / 1000)
+                    lines.append(f'{p}_span_seconds_bucket{{span="{lbl}",le="{le}"}} {cum}')
+                lines.append(f'{p}_span_seconds_sum{{span="{lbl}"}} {h["sum_ms"] / 1000}')
+                lines.append(f'{p}_span_seconds_count{{span="{lbl}"}} {h["count"]}')
+                totals += [(lbl, _label(k), v) for k, v in sorted(h["totals"].items())]
+        if totals:
+            lines += [f"# HELP {p}_span_attr_total Sum of numeric span attributes (counts, tokens).",
+                      f"# TYPE {p}_span_attr_total counter"]
+            lines += [f'{p}_span_attr_total{{span="{s}",attr="{a}"}} {v}' for s, a, v in totals]
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        with self._write_lock:
+            self._write()
+
+    def _write(self):
+        # Caller holds self._write_lock
+        self._last_write = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=self.path.name + ".", suffix=".tmp", dir=self.path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.replace(tmp, self.path)
+        except BaseException:
+            with suppress(OSError):
+                os.unlink(tmp)
+            raise
+
+
+_configured = False
+
+
+def configure_from_env() -> List[Sink]:
+    """Register the sinks named in TRACE_SINKS (once per process); returns all registered sinks."""
+    global _configured
+    with _sinks_lock:
+        if _configured:
+            return list(_sinks)
+        _configured = True
+    for spec in filter(None, (s.strip() for s in os.getenv("TRACE_SINKS", "").split(","))):
+        kind, _, arg = spec.partition(":")
+        if kind == "histogram":
+            add_sink(HistogramSink())
+        elif kind == "jsonl":
+            add_sink(JsonLogSink(arg or OUT / "trace.jsonl"))
+        elif kind == "prom":
+            add_sink(PrometheusSink(arg or OUT / "metrics.prom"))
+        else:
+            raise ValueError(f"Unknown trace sink {spec!r} (histogram, jsonl:<path>, prom:<path>)")
+    atexit.register(lambda: [s.flush() for s in sinks()])
+    return sinks()